@@ -1,5 +1,11 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Any
+from typing import List, Optional
+from .filters import MetadataFilter
+from .hybrid import RRF_K, candidate_count, check_weights, reciprocal_rank_fusion
+from .results import SearchResult
+
+_generation_lock = threading.Lock()
 
 class VectorDBAdapter(ABC):
     @abstractmethod
@@ -7,9 +13,72 @@ class VectorDBAdapter(ABC):
         pass
 
     @abstractmethod
-    def query(self, vector: List[float], top_k: int = 5) -> List[Any]:
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
         pass
 
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        # Results are returned in input order. Adapters that can answer several
+        # queries in one round trip should override this fallback.
+        return [
+            self.query(vector, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+            for vector in vectors
+        ]
+
+    @property
+    def supports_lexical(self) -> bool:
+        # Adapters opt into lexical search by defining
+        # lexical_query(text, top_k, filters, include_metadata, include_embedding):
+        # a full-text match on ids and metadata strings, scored by the negated text rank.
+        return callable(getattr(self, "lexical_query", None))
+
+    def hybrid_query(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = RRF_K,
+        candidates: Optional[int] = None,
+    ) -> List[SearchResult]:
+        # Fuses two separate queries; adapters that can run both sides in one
+        # round trip should override this fallback. Without lexical search the
+        # result is the vector ranking alone, scored the same way.
+        check_weights(vector_weight, text_weight)
+        limit = candidate_count(top_k, candidates)
+        projection = dict(filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        rankings, weights = [self.query(vector, top_k=limit, **projection)], [vector_weight]
+        if self.supports_lexical:
+            rankings.append(self.lexical_query(text, top_k=limit, **projection))
+            weights.append(text_weight)
+        return reciprocal_rank_fusion(rankings, weights, top_k, rrf_k)
+
     @abstractmethod
     def delete(self, ids: List[str]) -> None:
         pass
+
+    @property
+    def generation(self) -> int:
+        # Incremented after every write so cached search results can tell they are stale.
+        return getattr(self, "_generation", 0)
+
+    def _bump_generation(self) -> None:
+        with _generation_lock:
+            self._generation = self.generation + 1
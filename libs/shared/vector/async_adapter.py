@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from .filters import MetadataFilter
+from .results import SearchResult
+
+_generation_lock = threading.Lock()
+
+class AsyncVectorDBAdapter(ABC):
+    @abstractmethod
+    async def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        pass
+
+    @abstractmethod
+    async def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        pass
+
+    async def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        # Results are returned in input order; the fallback keeps every query in flight at once.
+        return list(await asyncio.gather(*(
+            self.query(vector, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+            for vector in vectors
+        )))
+
+    @abstractmethod
+    async def delete(self, ids: List[str]) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @property
+    def generation(self) -> int:
+        return getattr(self, "_generation", 0)
+
+    def _bump_generation(self) -> None:
+        with _generation_lock:
+            self._generation = self.generation + 1
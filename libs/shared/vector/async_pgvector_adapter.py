@@ -0,0 +1,159 @@
+import asyncio
+import json
+import asyncpg
+from typing import List, Optional
+from .async_adapter import AsyncVectorDBAdapter
+from .binary_codec import decode_vector, encode_vector
+from .filters import MetadataFilter, compile_filter
+from .quantization import PG_QUANTIZATIONS, pg_candidate_order
+from .results import SearchResult, parse_vector, projection_columns, result_from_row
+
+class AsyncPgVectorAdapter(AsyncVectorDBAdapter):
+    def __init__(
+        self,
+        conn_str: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        vector_schema: str = "public",
+        pool: Optional[asyncpg.Pool] = None,
+        wire_format: str = "text",
+        quantization: str = "none",
+        rerank: int = 4,
+        dim: int = 1536,
+    ):
+        if wire_format not in ("text", "binary"):
+            raise ValueError(f"Unknown wire_format {wire_format!r}; expected 'text' or 'binary'")
+        if quantization not in PG_QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {', '.join(PG_QUANTIZATIONS)}")
+        self.conn_str = conn_str
+        self.vector_schema = vector_schema
+        # "binary" exchanges vectors as packed float32 and returns embeddings as ndarrays
+        self.wire_format = wire_format
+        # Same candidate-then-rerank scheme as PgVectorAdapter
+        self.quantization = quantization
+        self.rerank = rerank
+        self.dim = dim
+        self._pool = pool
+        self._pool_options = dict(min_size=min_size, max_size=max_size, max_inactive_connection_lifetime=max_idle)
+        self._pool_lock = asyncio.Lock()
+
+    async def pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(self.conn_str, init=self._init_connection, **self._pool_options)
+        return self._pool
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+        if self.wire_format == "binary":
+            await conn.set_type_codec(
+                "vector", encoder=encode_vector, decoder=decode_vector, schema=self.vector_schema, format="binary"
+            )
+        else:
+            await conn.set_type_codec(
+                "vector", encoder=_vector_literal, decoder=parse_vector, schema=self.vector_schema, format="text"
+            )
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+
+    async def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            await conn.executemany("""
+                INSERT INTO vectors (id, embedding, metadata)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata
+            """, list(zip(ids, vectors, metadata)))
+        self._bump_generation()
+
+    async def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        where, params = _where(filters, first_index=3)
+        columns = projection_columns(include_metadata, include_embedding)
+        pool = await self.pool()
+        rows = await pool.fetch(
+            self._nearest("$1", columns, where, len(params)), vector, top_k, *params, *self._candidate_limit(top_k)
+        )
+        return [result_from_row(row, include_metadata, include_embedding) for row in rows]
+
+    async def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if not vectors:
+            return []
+        where, params = _where(filters, first_index=3)
+        columns = projection_columns(include_metadata, include_embedding)
+        pool = await self.pool()
+        rows = await pool.fetch(f"""
+            SELECT q.ord, v.id, v.distance{projection_columns(include_metadata, include_embedding, "v.")}
+            FROM unnest({self._vector_array}) WITH ORDINALITY AS q(embedding, ord)
+            CROSS JOIN LATERAL ({self._nearest("q.embedding", columns, where, len(params))}) v
+            ORDER BY q.ord, v.distance
+        """, self._query_array(vectors), top_k, *params, *self._candidate_limit(top_k))
+        results: List[List[SearchResult]] = [[] for _ in vectors]
+        for ord_, *row in rows:
+            results[ord_ - 1].append(result_from_row(row, include_metadata, include_embedding))
+        return results
+
+    def _nearest(self, query: str, columns: str, where: str, n_params: int) -> str:
+        # $2 is top_k and filter parameters start at $3; the candidate limit follows them.
+        if self.quantization == "none":
+            return f"""
+                SELECT id, embedding <-> {query} AS distance{columns}
+                FROM vectors
+                {where}
+                ORDER BY embedding <-> {query}
+                LIMIT $2
+            """
+        return f"""
+            SELECT id, distance{columns}
+            FROM (
+                SELECT id, embedding <-> {query} AS distance{columns}
+                FROM vectors
+                {where}
+                ORDER BY {pg_candidate_order(self.quantization, self.dim, query)}
+                LIMIT ${3 + n_params}
+            ) candidates
+            ORDER BY distance
+            LIMIT $2
+        """
+
+    def _candidate_limit(self, top_k: int) -> tuple:
+        return () if self.quantization == "none" else (top_k * self.rerank,)
+
+    @property
+    def _vector_array(self) -> str:
+        return "$1::vector[]" if self.wire_format == "binary" else "$1::text[]::vector[]"
+
+    def _query_array(self, vectors: List[List[float]]) -> list:
+        # Text mode ships literals as text[] so no vector[] codec is needed.
+        if self.wire_format == "binary":
+            return list(vectors)
+        return [_vector_literal(v) for v in vectors]
+
+    async def delete(self, ids: List[str]) -> None:
+        pool = await self.pool()
+        await pool.execute("DELETE FROM vectors WHERE id = ANY($1::text[])", list(ids))
+        self._bump_generation()
+
+def _where(filters: Optional[MetadataFilter], first_index: int):
+    predicate, params = compile_filter(filters, placeholder=lambda i: f"${i}", first_index=first_index)
+    return (f"WHERE {predicate}" if predicate else ""), params
+
+def _vector_literal(vec: List[float]) -> str:
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
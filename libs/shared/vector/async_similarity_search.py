@@ -0,0 +1,48 @@
+import asyncio
+from typing import List, Optional
+from .async_adapter import AsyncVectorDBAdapter
+from .embedding_service import EmbeddingService
+from .filters import MetadataFilter
+from .results import SearchResult
+
+class AsyncSimilaritySearch:
+    def __init__(self, vector_db: AsyncVectorDBAdapter, embedder: EmbeddingService):
+        self.vector_db = vector_db
+        self.embedder = embedder
+
+    async def search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Embedding is CPU/blocking work; keep it off the event loop.
+        query_vec = (await asyncio.to_thread(self.embedder.embed, [query_text]))[0]
+        return await self.vector_db.query(
+            query_vec,
+            top_k=top_k,
+            filters=filters,
+            include_metadata=include_metadata,
+            include_embedding=include_embedding,
+        )
+
+    async def search_batch(
+        self,
+        query_texts: List[str],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if not query_texts:
+            return []
+        query_vecs = await asyncio.to_thread(self.embedder.embed, query_texts)
+        return await self.vector_db.query_batch(
+            query_vecs,
+            top_k=top_k,
+            filters=filters,
+            include_metadata=include_metadata,
+            include_embedding=include_embedding,
+        )
@@ -0,0 +1,101 @@
+import asyncio
+import os
+from typing import List, Any, Awaitable, Callable, Optional
+from supabase import acreate_client, AsyncClient
+from .async_adapter import AsyncVectorDBAdapter
+from .chunking import ChunkFailure, WriteReport, chunk_ids, chunk_records, finish
+from .filters import MetadataFilter, containment_filter
+from .results import SearchResult, result_from_record
+
+class AsyncSupabaseVectorAdapter(AsyncVectorDBAdapter):
+    def __init__(
+        self,
+        url: str = None,
+        key: str = None,
+        client: Optional[AsyncClient] = None,
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 2 * 1024 * 1024,
+        parallelism: int = 4,
+        delete_chunk_size: int = 200,
+    ):
+        self.url = url or os.getenv("SUPABASE_URL")
+        self.key = key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        self._client = client
+        # Same chunking limits as SupabaseVectorAdapter
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.parallelism = parallelism
+        self.delete_chunk_size = delete_chunk_size
+        self._client_lock = asyncio.Lock()
+
+    async def client(self) -> AsyncClient:
+        # acreate_client is a coroutine, so the client is built on first use.
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await acreate_client(self.url, self.key)
+        return self._client
+
+    async def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        # Raises PartialWriteError after all chunks ran if any failed; its report
+        # lists the failed ids so only those need retrying.
+        records = [
+            {"id": ids[i], "embedding": vectors[i], "metadata": metadata[i]} for i in range(len(ids))
+        ]
+        client = await self.client()
+        report = await self._send_chunks(
+            list(chunk_records(records, self.chunk_size, self.max_chunk_bytes)),
+            lambda chunk: client.table("vectors").upsert(chunk).execute(),
+            lambda chunk: [record["id"] for record in chunk],
+        )
+        if report.rows:
+            self._bump_generation()
+        finish(report, "upsert")
+
+    async def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Same custom RPC as the sync adapter
+        client = await self.client()
+        params = {"query_embedding": vector, "top_k": top_k, "include_embedding": include_embedding}
+        if filters:
+            # vector_search (supabase/migrations) filters with metadata @> filter
+            params["filter"] = containment_filter(filters)
+        response = await client.rpc("vector_search", params).execute()
+        return [result_from_record(row, include_metadata, include_embedding) for row in response.data]
+
+    async def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        client = await self.client()
+        report = await self._send_chunks(
+            list(chunk_ids(ids, self.delete_chunk_size)),
+            lambda chunk: client.table("vectors").delete().in_("id", chunk).execute(),
+            lambda chunk: chunk,
+        )
+        if report.rows:
+            self._bump_generation()
+        finish(report, "delete")
+
+    async def _send_chunks(
+        self, chunks: List[list], send: Callable[[list], Awaitable[Any]], ids_of: Callable[[list], List[str]]
+    ) -> WriteReport:
+        report = WriteReport(chunks=len(chunks))
+        semaphore = asyncio.Semaphore(max(1, self.parallelism))
+
+        async def run(chunk: list) -> None:
+            async with semaphore:
+                await send(chunk)
+
+        outcomes = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+        for i, (chunk, outcome) in enumerate(zip(chunks, outcomes)):
+            if isinstance(outcome, BaseException):
+                report.failures.append(ChunkFailure(index=i, ids=ids_of(chunk), error=outcome))
+            else:
+                report.rows += len(chunk)
+        return report
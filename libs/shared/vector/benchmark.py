@@ -0,0 +1,315 @@
+"""
+Benchmark suite for the vector adapters.
+
+Runs every adapter available in this environment against synthetic data and
+prints machine-readable JSON. Each (adapter, rows) case runs in a fresh
+process so peak RSS is attributable to that case alone.
+
+    python -m libs.shared.vector.benchmark --sizes 10000,100000 --output bench.json
+    python -m libs.shared.vector.benchmark --codec   # text vs binary vector encoding only
+
+Postgres-backed adapters run only when ``VECTOR_BENCH_DSN`` points at a
+disposable database with the ``vectors`` migration applied, e.g. a local
+``pgvector/pgvector`` container; otherwise they are reported as skipped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .adapter import VectorDBAdapter
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_DIM = 1536
+ID_PREFIX = "bench-"
+
+
+class BenchmarkSkip(Exception):
+    """Raised by an adapter factory when the adapter cannot run here."""
+
+
+def _memory(dim: int, rows: int, workdir: str) -> VectorDBAdapter:
+    from .memory_adapter import InMemoryVectorAdapter
+
+    return InMemoryVectorAdapter(dim=dim, capacity=rows)
+
+
+def _mmap(dim: int, rows: int, workdir: str) -> VectorDBAdapter:
+    from .mmap_adapter import MmapVectorAdapter
+
+    return MmapVectorAdapter(os.path.join(workdir, "mmap"), dim=dim)
+
+
+def _ivf(dim: int, rows: int, workdir: str) -> VectorDBAdapter:
+    from .ivf_index import IVFVectorAdapter
+
+    nlist = max(1, int(np.sqrt(rows)))
+    return IVFVectorAdapter(dim=dim, nlist=nlist, nprobe=max(1, nlist // 16), min_train_size=min(rows, 39 * nlist))
+
+
+def _quantized(quantization: str) -> Callable[[int, int, str], VectorDBAdapter]:
+    def factory(dim: int, rows: int, workdir: str) -> VectorDBAdapter:
+        from .quantization import QuantizedVectorAdapter
+
+        # Full-precision rows go to a memory-mapped file so peak RSS reflects the codes.
+        return QuantizedVectorAdapter(
+            dim=dim, quantization=quantization, capacity=rows, path=os.path.join(workdir, "full.f32")
+        )
+
+    return factory
+
+
+def _pgvector(dim: int, rows: int, workdir: str, wire_format: str = "text") -> VectorDBAdapter:
+    dsn = os.getenv("VECTOR_BENCH_DSN")
+    if not dsn:
+        raise BenchmarkSkip("VECTOR_BENCH_DSN is not set")
+    try:
+        import psycopg2
+        from .pgvector_adapter import PgVectorAdapter
+
+        psycopg2.connect(dsn, connect_timeout=3).close()
+    except Exception as e:
+        raise BenchmarkSkip(f"Postgres unavailable: {e}")
+    return PgVectorAdapter(dsn, max_size=4, wire_format=wire_format)
+
+
+def _pgvector_binary(dim: int, rows: int, workdir: str) -> VectorDBAdapter:
+    return _pgvector(dim, rows, workdir, wire_format="binary")
+
+
+def _remove_pgvector_rows(adapter: VectorDBAdapter) -> None:
+    # One set-based statement: adapter.delete issues a DELETE per id, which on
+    # a million rows can outlast the benchmark itself.
+    with adapter.pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM vectors WHERE id LIKE %s", (ID_PREFIX + "%",))
+        conn.commit()
+
+
+ADAPTERS: Dict[str, Callable[[int, int, str], VectorDBAdapter]] = {
+    "memory": _memory,
+    "mmap": _mmap,
+    "ivf": _ivf,
+    "float16": _quantized("float16"),
+    "int8": _quantized("int8"),
+    "binary": _quantized("binary"),
+    "pgvector": _pgvector,
+    "pgvector-binary": _pgvector_binary,
+}
+
+
+def synthetic_blocks(rows: int, dim: int, block: int = 10_000, seed: int = 0) -> Iterator[np.ndarray]:
+    """Unit-normalised Gaussian vectors generated block by block to keep memory bounded."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, block):
+        data = rng.standard_normal((min(block, rows - start), dim), dtype=np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        yield data
+
+
+def latency_summary(samples_ms: Sequence[float]) -> dict:
+    if not len(samples_ms):
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "count": len(samples_ms),
+        "mean_ms": float(np.mean(samples_ms)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def run_case(
+    adapter_name: str,
+    rows: int,
+    dim: int = DEFAULT_DIM,
+    queries: int = 200,
+    batch_size: int = 1000,
+    query_batch_size: int = 32,
+    top_k: int = 10,
+    delete_fraction: float = 0.1,
+    seed: int = 0,
+) -> dict:
+    result = {"adapter": adapter_name, "rows": rows, "dim": dim, "top_k": top_k}
+    with tempfile.TemporaryDirectory(prefix="vector-bench-") as workdir:
+        try:
+            adapter = ADAPTERS[adapter_name](dim, rows, workdir)
+        except BenchmarkSkip as e:
+            return {**result, "skipped": str(e)}
+        ids = [f"{ID_PREFIX}{i}" for i in range(rows)]
+        try:
+            bulk = getattr(adapter, "bulk_upsert", None)
+            start = time.perf_counter()
+            offset = 0
+            for block in synthetic_blocks(rows, dim, block=batch_size, seed=seed):
+                block_ids = ids[offset:offset + len(block)]
+                if bulk is not None:
+                    bulk(block_ids, block.tolist(), [{}] * len(block))
+                else:
+                    adapter.upsert(block_ids, block, [{}] * len(block))
+                offset += len(block)
+            elapsed = time.perf_counter() - start
+            result["upsert"] = {
+                "method": "bulk_upsert" if bulk is not None else "upsert",
+                "seconds": elapsed,
+                "rows_per_sec": rows / elapsed if elapsed else 0.0,
+            }
+
+            query_vecs = next(synthetic_blocks(queries, dim, block=queries, seed=seed + 1))
+            single = []
+            for vec in query_vecs:
+                start = time.perf_counter()
+                adapter.query(vec.tolist(), top_k=top_k)
+                single.append((time.perf_counter() - start) * 1000)
+            result["query"] = latency_summary(single)
+
+            batched = []
+            for start_row in range(0, queries, query_batch_size):
+                batch = query_vecs[start_row:start_row + query_batch_size].tolist()
+                start = time.perf_counter()
+                adapter.query_batch(batch, top_k=top_k)
+                batched.append((time.perf_counter() - start) * 1000)
+            result["query_batch"] = {
+                **latency_summary(batched),
+                "batch_size": query_batch_size,
+                "per_query_ms": float(np.sum(batched) / queries) if queries else 0.0,
+            }
+
+            doomed = ids[: int(rows * delete_fraction)]
+            start = time.perf_counter()
+            for offset in range(0, len(doomed), batch_size):
+                adapter.delete(doomed[offset:offset + batch_size])
+            elapsed = time.perf_counter() - start
+            result["delete"] = {
+                "rows": len(doomed),
+                "seconds": elapsed,
+                "rows_per_sec": len(doomed) / elapsed if elapsed else 0.0,
+            }
+        finally:
+            if adapter_name.startswith("pgvector"):
+                # Never leave benchmark rows behind in a shared database.
+                _remove_pgvector_rows(adapter)
+            close = getattr(adapter, "close", None)
+            if close is not None:
+                close()
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_mb"] = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return result
+
+
+def codec_benchmark(dim: int = DEFAULT_DIM, vectors: int = 1000, seed: int = 0) -> dict:
+    """CPU cost and size of the text and binary ``vector`` wire encodings, per vector."""
+    from .binary_codec import decode_vector, encode_vector
+    from .pgvector_adapter import _vector_literal
+    from .results import parse_vector
+
+    data = next(synthetic_blocks(vectors, dim, block=vectors, seed=seed))
+    rows = list(data)
+    codecs = {
+        "text": (_vector_literal, parse_vector),
+        "binary": (encode_vector, decode_vector),
+    }
+    report = {"dim": dim, "vectors": vectors}
+    for name, (encode, decode) in codecs.items():
+        start = time.perf_counter()
+        encoded = [encode(row) for row in rows]
+        encode_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for payload in encoded:
+            decode(payload)
+        decode_s = time.perf_counter() - start
+        report[name] = {
+            "encode_us": encode_s / vectors * 1e6,
+            "decode_us": decode_s / vectors * 1e6,
+            "bytes": sum(len(payload) for payload in encoded) / vectors,
+        }
+    for key in ("encode_us", "decode_us", "bytes"):
+        binary = report["binary"][key]
+        report[f"{key.split('_')[0]}_ratio"] = report["text"][key] / binary if binary else 0.0
+    return report
+
+
+def _run_isolated(kwargs: dict) -> dict:
+    return run_case(**kwargs)
+
+
+def run_suite(
+    adapters: Optional[List[str]] = None,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    isolate: bool = True,
+    **case_options,
+) -> dict:
+    adapters = adapters or list(ADAPTERS)
+    unknown = set(adapters) - set(ADAPTERS)
+    if unknown:
+        raise ValueError(f"Unknown adapters: {', '.join(sorted(unknown))}")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for rows in sizes:
+        for name in adapters:
+            kwargs = {"adapter_name": name, "rows": rows, **case_options}
+            if isolate:
+                with context.Pool(1) as pool:
+                    results.append(pool.apply(_run_isolated, (kwargs,)))
+            else:
+                results.append(run_case(**kwargs))
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the vector adapters")
+    parser.add_argument("--adapters", default=",".join(ADAPTERS), help="comma-separated adapter names")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated row counts")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--query-batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--codec", action="store_true", help="only compare the text and binary vector encodings")
+    args = parser.parse_args(argv)
+
+    if args.codec:
+        report = codec_benchmark(dim=args.dim, seed=args.seed)
+    else:
+        report = run_suite(
+            adapters=[a for a in args.adapters.split(",") if a],
+            sizes=[int(s) for s in args.sizes.split(",") if s],
+            dim=args.dim,
+            queries=args.queries,
+            batch_size=args.batch_size,
+            query_batch_size=args.query_batch_size,
+            top_k=args.top_k,
+            seed=args.seed,
+        )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Binary wire format for the pgvector ``vector`` type.
+
+pgvector's binary representation (``vector_send``/``vector_recv``) is an
+int16 dimension, an unused int16 and the components as big-endian float32.
+Encoding and decoding go straight between NumPy arrays and packed buffers, so
+a 1536-dim embedding costs one ``astype`` instead of formatting and parsing
+1536 decimal strings.
+
+psycopg2 can only bind text parameters, so the sync adapter moves binary data
+through ``COPY ... (FORMAT binary)``; ``copy_binary`` and ``read_copy_binary``
+implement that framing. asyncpg uses ``encode_vector``/``decode_vector``
+directly as a binary type codec.
+"""
+import json
+import struct
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_VECTOR_HEADER = struct.Struct(">HH")
+_INT16 = struct.Struct(">h")
+_INT32 = struct.Struct(">i")
+_INT64 = struct.Struct(">q")
+_FLOAT8 = struct.Struct(">d")
+_JSONB_VERSION = b"\x01"
+
+
+def encode_vector(vec: Any) -> bytes:
+    arr = np.asarray(vec, dtype=">f4")
+    if arr.ndim != 1:
+        raise ValueError(f"Expected a 1-d vector, got shape {arr.shape}")
+    return _VECTOR_HEADER.pack(len(arr), 0) + arr.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    dim, _ = _VECTOR_HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=_VECTOR_HEADER.size).astype(np.float32)
+
+
+def encode_jsonb(value: Any) -> bytes:
+    return _JSONB_VERSION + json.dumps(value).encode()
+
+
+def decode_jsonb(data: bytes) -> Any:
+    return json.loads(bytes(data[1:]))
+
+
+# Binary send/recv functions for the column types the adapters move over COPY.
+ENCODERS = {
+    "int8": _INT64.pack,
+    "text": lambda value: str(value).encode(),
+    "float8": _FLOAT8.pack,
+    "jsonb": encode_jsonb,
+    "vector": encode_vector,
+}
+DECODERS = {
+    "int8": lambda data: _INT64.unpack(data)[0],
+    "text": lambda data: bytes(data).decode(),
+    "float8": lambda data: _FLOAT8.unpack(data)[0],
+    "jsonb": decode_jsonb,
+    "vector": decode_vector,
+}
+
+
+def copy_binary(rows: Iterable[Sequence[Any]], types: Sequence[str]) -> Iterator[bytes]:
+    """Frame ``rows`` as a ``COPY ... FROM STDIN (FORMAT binary)`` stream; ``None`` is NULL."""
+    encoders: List[Callable[[Any], bytes]] = [ENCODERS[t] for t in types]
+    field_count = _INT16.pack(len(types))
+    yield COPY_SIGNATURE + _INT32.pack(0) + _INT32.pack(0)
+    for row in rows:
+        parts = [field_count]
+        for encode, value in zip(encoders, row):
+            if value is None:
+                parts.append(_INT32.pack(-1))
+            else:
+                data = encode(value)
+                parts.append(_INT32.pack(len(data)))
+                parts.append(data)
+        yield b"".join(parts)
+    yield _INT16.pack(-1)
+
+
+def read_copy_binary(data: bytes, types: Sequence[str]) -> List[Tuple[Any, ...]]:
+    """Parse ``COPY ... TO STDOUT (FORMAT binary)`` output whose columns have ``types``."""
+    if not data.startswith(COPY_SIGNATURE):
+        raise ValueError("Not a binary COPY stream")
+    view = memoryview(data)
+    offset = len(COPY_SIGNATURE) + _INT32.size
+    offset += _INT32.size + _INT32.unpack_from(view, offset)[0]
+    decoders = [DECODERS[t] for t in types]
+    rows = []
+    while True:
+        fields = _INT16.unpack_from(view, offset)[0]
+        offset += _INT16.size
+        if fields == -1:
+            return rows
+        if fields != len(decoders):
+            raise ValueError(f"Expected {len(decoders)} columns, got {fields}")
+        row = []
+        for decode in decoders:
+            length = _INT32.unpack_from(view, offset)[0]
+            offset += _INT32.size
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(decode(view[offset:offset + length]))
+            offset += length
+        rows.append(tuple(row))
@@ -0,0 +1,96 @@
+"""
+Chunked writes for the HTTP-backed adapters.
+
+Large upserts are split into chunks bounded by row count and approximate JSON
+payload size. Chunks are sent independently, so one failing chunk does not
+undo or resend the others; failures are collected into a ``WriteReport``.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the JSON length of one float, e.g. "-0.012345678901234567,".
+_FLOAT_JSON_BYTES = 24
+
+
+@dataclass(frozen=True)
+class ChunkFailure:
+    index: int
+    ids: List[str]
+    error: BaseException
+
+
+@dataclass
+class WriteReport:
+    chunks: int = 0
+    rows: int = 0
+    failures: List[ChunkFailure] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def failed_ids(self) -> List[str]:
+        return [id_ for failure in self.failures for id_ in failure.ids]
+
+
+class PartialWriteError(RuntimeError):
+    """Some chunks failed after every chunk was attempted; the others were written."""
+
+    def __init__(self, report: WriteReport):
+        self.report = report
+        super().__init__(
+            f"{len(report.failures)} of {report.chunks} chunks failed ({len(report.failed_ids)} rows); "
+            f"first error: {report.failures[0].error!r}"
+        )
+
+
+def record_size(record: dict) -> int:
+    """Cheap upper-bound estimate of a vector record's JSON size, without serializing the embedding."""
+    embedding = record.get("embedding") or ()
+    rest = {k: v for k, v in record.items() if k != "embedding"}
+    return len(embedding) * _FLOAT_JSON_BYTES + len(json.dumps(rest, default=str))
+
+
+def chunk_records(
+    records: Sequence[dict],
+    max_rows: int,
+    max_bytes: int,
+    size_of: Callable[[dict], int] = record_size,
+) -> Iterator[List[dict]]:
+    """Split ``records`` into chunks of at most ``max_rows`` rows and about ``max_bytes`` of JSON.
+
+    A single record larger than ``max_bytes`` still goes out alone.
+    """
+    if max_rows < 1 or max_bytes < 1:
+        raise ValueError("max_rows and max_bytes must be positive")
+    chunk: List[dict] = []
+    chunk_bytes = 0
+    for record in records:
+        size = size_of(record)
+        if chunk and (len(chunk) >= max_rows or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(record)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def chunk_ids(ids: Sequence[Any], size: int) -> Iterator[List[Any]]:
+    if size < 1:
+        raise ValueError("size must be positive")
+    for start in range(0, len(ids), size):
+        yield list(ids[start:start + size])
+
+
+def finish(report: WriteReport, operation: str) -> None:
+    """Log and raise ``PartialWriteError`` if any chunk failed."""
+    if report.failures:
+        for failure in report.failures:
+            logger.warning("%s chunk %d (%d rows) failed: %r", operation, failure.index, len(failure.ids), failure.error)
+        raise PartialWriteError(report)
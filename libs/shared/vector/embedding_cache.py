@@ -0,0 +1,101 @@
+"""
+Persistent content-addressed cache for embeddings.
+"""
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Mapping, Optional
+from .embedding_service import EmbeddingService
+
+# SQLite caps bound parameters per statement; stay well under the limit.
+_SQL_CHUNK = 500
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by (model id, SHA-256 of the text)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model_id TEXT NOT NULL,
+                    text_hash BLOB NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model_id, text_hash)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model_id: str, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model_id, *chunk],
+                )
+                for key, blob in rows:
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model_id: str, vectors: Mapping[bytes, np.ndarray]) -> None:
+        rows = []
+        for key, vector in vectors.items():
+            packed = np.ascontiguousarray(vector, dtype=np.float32)
+            rows.append((model_id, key, packed.shape[0], packed.tobytes()))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingService(EmbeddingService):
+    """Wraps an :class:`EmbeddingService` so only texts missing from the cache are embedded."""
+
+    def __init__(self, embedder: EmbeddingService, cache: EmbeddingCache, model_id: Optional[str] = None):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_id = model_id or embedder.model_id
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(text) for text in texts]
+        vectors = self.cache.get_many(self.model_id, keys)
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            # Every miss goes to the backend in a single batch.
+            computed = self.embedder.embed(list(missing.values()))
+            if len(computed) != len(missing):
+                raise ValueError(f"Embedder returned {len(computed)} vectors for {len(missing)} texts")
+            fresh = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(missing, computed)}
+            self.cache.put_many(self.model_id, fresh)
+            vectors.update(fresh)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [vectors[key].tolist() for key in keys]
@@ -0,0 +1,200 @@
+"""
+Adaptive batching in front of an embedding backend.
+
+Inputs are sorted by length and packed into batches whose padded size (rows x
+longest row, in estimated tokens) stays under a budget. Texts of similar
+length then share a batch instead of padding short texts to a long one's
+length. Batches run on a shared worker pool with a concurrency limit, gated by
+token buckets for requests and tokens per second. Results come back in input
+order.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from .embedding_service import EmbeddingService
+
+# Rough tokens per character for English text under common BPE vocabularies.
+CHARS_PER_TOKEN = 4
+# Batch latencies kept for the percentile metrics.
+LATENCY_WINDOW = 1024
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def plan_batches(lengths: Sequence[int], max_batch_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """Group input indexes, shortest first, so ``len(batch) * longest <= max_batch_tokens``.
+
+    An input longer than the budget gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # Sorted ascending, so the newcomer is the longest row of the batch.
+        if current and ((len(current) + 1) * lengths[i] > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TokenBucket:
+    """Allows ``rate`` units per second on average, with bursts up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` units, blocking until they are available; returns seconds waited."""
+        # A request larger than the bucket could never fit; let it through at a full bucket.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve up front: the balance may go negative, and later callers
+            # queue behind the debt, so waiters are served in arrival order.
+            self._tokens -= amount
+            delay = max(0.0, -self._tokens / self.rate)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    texts: int
+    batches: int
+    tokens: int
+    padded_tokens: int
+    throttled_seconds: float
+    elapsed: float
+    p50_latency: float
+    p95_latency: float
+    p99_latency: float
+
+    @property
+    def texts_per_sec(self) -> float:
+        return self.texts / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def padding_efficiency(self) -> float:
+        # Share of the padded batch area that is real input.
+        return self.tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+
+class BatchingEmbeddingService(EmbeddingService):
+    """Wraps an :class:`EmbeddingService` with length-sorted, budgeted, rate-limited batching.
+
+    The worker pool is shared by every caller, so ``max_concurrency`` bounds the
+    backend calls in flight across threads, not per ``embed`` call.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        max_batch_tokens: int = 8192,
+        max_batch_size: int = 256,
+        max_concurrency: int = 4,
+        requests_per_second: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+    ):
+        if max_batch_tokens < 1 or max_batch_size < 1 or max_concurrency < 1:
+            raise ValueError("max_batch_tokens, max_batch_size and max_concurrency must be positive")
+        self.embedder = embedder
+        self.model_id = embedder.model_id
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.request_bucket = TokenBucket(requests_per_second) if requests_per_second else None
+        self.token_bucket = TokenBucket(tokens_per_second) if tokens_per_second else None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._texts = self._batches = self._tokens = self._padded = 0
+        self._throttled = self._elapsed = 0.0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        lengths = [estimate_tokens(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        batches = plan_batches(lengths, self.max_batch_tokens, self.max_batch_size)
+        futures = [
+            self._executor.submit(self._run, [texts[i] for i in batch], [lengths[i] for i in batch]) for batch in batches
+        ]
+        _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        # On failure, batches not yet started are dropped; the first error is raised below.
+        for future in pending:
+            future.cancel()
+        for batch, future in zip(batches, futures):
+            for i, vector in zip(batch, future.result()):
+                results[i] = vector
+        with self._lock:
+            self._texts += len(texts)
+            self._elapsed += time.perf_counter() - start
+        return results
+
+    def stats(self) -> SchedulerStats:
+        with self._lock:
+            latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            return SchedulerStats(
+                texts=self._texts,
+                batches=self._batches,
+                tokens=self._tokens,
+                padded_tokens=self._padded,
+                throttled_seconds=self._throttled,
+                elapsed=self._elapsed,
+                p50_latency=float(p50),
+                p95_latency=float(p95),
+                p99_latency=float(p99),
+            )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, texts: List[str], lengths: List[int]) -> List[List[float]]:
+        throttled = 0.0
+        if self.request_bucket is not None:
+            throttled += self.request_bucket.acquire()
+        if self.token_bucket is not None:
+            throttled += self.token_bucket.acquire(sum(lengths))
+        start = time.perf_counter()
+        vectors = self.embedder.embed(texts)
+        latency = time.perf_counter() - start
+        if len(vectors) != len(texts):
+            # Results are scattered back by position, so a short batch would misalign every later text.
+            raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(texts)} texts")
+        with self._lock:
+            self._latencies.append(latency)
+            self._batches += 1
+            self._tokens += sum(lengths)
+            self._padded += len(lengths) * max(lengths)
+            self._throttled += throttled
+        return vectors
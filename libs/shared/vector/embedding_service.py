@@ -2,6 +2,9 @@ from typing import List
 import numpy as np
 
 class EmbeddingService:
+    # Identifies the model behind the vectors; caches key on it so switching models never mixes spaces.
+    model_id: str = "placeholder-random-1536"
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         # Placeholder: Replace with real embedding model (e.g., OpenAI, HuggingFace, etc.)
         return [np.random.rand(1536).tolist() for _ in texts]
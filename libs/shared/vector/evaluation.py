@@ -0,0 +1,50 @@
+"""
+Retrieval-quality helpers for comparing approximate adapters with exact search.
+"""
+import time
+import numpy as np
+from typing import Any, List, Sequence
+from .adapter import VectorDBAdapter
+
+
+def _ids(hits: List[Any]) -> List[str]:
+    return [hit.id for hit in hits]
+
+
+def recall_at_k(approx_hits: List[List[Any]], exact_hits: List[List[Any]]) -> List[float]:
+    """Per-query fraction of the exact top-k ids that the approximate result also returned."""
+    recalls = []
+    for approx, exact in zip(approx_hits, exact_hits):
+        expected = set(_ids(exact))
+        recalls.append(len(expected & set(_ids(approx))) / len(expected) if expected else 1.0)
+    return recalls
+
+
+def recall_report(
+    approx: VectorDBAdapter,
+    exact: VectorDBAdapter,
+    queries: Sequence[Sequence[float]],
+    top_k: int = 10,
+) -> dict:
+    """Run ``queries`` one at a time against both adapters and summarise recall@k and latency."""
+    approx_hits, approx_ms = _timed(approx, queries, top_k)
+    exact_hits, exact_ms = _timed(exact, queries, top_k)
+    recalls = np.array(recall_at_k(approx_hits, exact_hits))
+    return {
+        "queries": len(queries),
+        "top_k": top_k,
+        "recall_mean": float(recalls.mean()) if len(recalls) else 1.0,
+        "recall_min": float(recalls.min()) if len(recalls) else 1.0,
+        "approx_p50_ms": float(np.percentile(approx_ms, 50)) if approx_ms else 0.0,
+        "exact_p50_ms": float(np.percentile(exact_ms, 50)) if exact_ms else 0.0,
+        "speedup": float(np.sum(exact_ms) / np.sum(approx_ms)) if np.sum(approx_ms) > 0 else 0.0,
+    }
+
+
+def _timed(adapter: VectorDBAdapter, queries: Sequence[Sequence[float]], top_k: int):
+    hits, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits.append(adapter.query(query, top_k=top_k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return hits, latencies
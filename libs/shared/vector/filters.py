@@ -0,0 +1,173 @@
+"""
+Structured metadata filters for vector queries.
+
+A filter maps a metadata key (dotted for nested keys) to either a value, for
+equality, or a dict of operators::
+
+    {"tenant": "acme", "lang": {"in": ["en", "de"]}, "price": {"gte": 10, "lt": 50}}
+
+All conditions must hold. ``compile_filter`` turns a filter into a
+parameterized SQL predicate over the JSONB ``metadata`` column; ``filter_mask``
+evaluates it in Python for the local adapters.
+"""
+import json
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MetadataFilter = Dict[str, Any]
+
+OPERATORS = ("eq", "in", "gt", "gte", "lt", "lte")
+_RANGE_SQL = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_MISSING = object()
+
+
+def validate_filter(filters: Optional[MetadataFilter]) -> None:
+    for key, condition in (filters or {}).items():
+        if not isinstance(key, str) or not key:
+            raise ValueError(f"Filter keys must be non-empty strings, got {key!r}")
+        if not isinstance(condition, dict):
+            continue
+        if not condition:
+            raise ValueError(f"Empty condition for filter key {key!r}")
+        for op, arg in condition.items():
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown filter operator {op!r}; expected one of {', '.join(OPERATORS)}")
+            if op == "in" and (isinstance(arg, (str, bytes)) or not isinstance(arg, Sequence)):
+                raise ValueError(f"'in' expects a list of values for filter key {key!r}")
+            if op in _RANGE_SQL and not _is_number(arg) and not isinstance(arg, str):
+                raise ValueError(f"'{op}' expects a number or string for filter key {key!r}")
+
+
+def canonical_filter(filters: Optional[MetadataFilter]) -> str:
+    """Stable string form of a filter, for use in cache keys."""
+    return json.dumps(filters or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def compile_filter(
+    filters: Optional[MetadataFilter],
+    column: str = "metadata",
+    placeholder: Callable[[int], str] = lambda index: "%s",
+    first_index: int = 1,
+) -> Tuple[str, List[Any]]:
+    """Compile ``filters`` to ``(predicate, params)``; the predicate is "" for no filter.
+
+    Equality and ``in`` compile to JSONB containment (``@>``) so a GIN
+    ``jsonb_path_ops`` index on the column can serve them. ``placeholder``
+    renders the n-th parameter (``%s`` for psycopg2, ``$n`` for asyncpg).
+    """
+    validate_filter(filters)
+    params: List[Any] = []
+
+    def param(value: Any) -> str:
+        params.append(value)
+        return placeholder(first_index + len(params) - 1)
+
+    clauses = []
+    for key, condition in (filters or {}).items():
+        path = key.split(".")
+        ops = condition if isinstance(condition, dict) else {"eq": condition}
+        for op, arg in ops.items():
+            if op == "eq":
+                clauses.append(f"{column} @> {param(json.dumps(_nest(path, arg)))}::jsonb")
+            elif op == "in":
+                if not arg:
+                    clauses.append("FALSE")
+                    continue
+                options = " OR ".join(f"{column} @> {param(json.dumps(_nest(path, v)))}::jsonb" for v in arg)
+                clauses.append(f"({options})")
+            else:
+                json_type = "number" if _is_number(arg) else "string"
+                cast = "::numeric" if json_type == "number" else ""
+                path_param = param(path)
+                clauses.append(
+                    f"(CASE WHEN jsonb_typeof({column} #> {path_param}::text[]) = '{json_type}' "
+                    f"THEN ({column} #>> {param(path)}::text[]){cast} END) {_RANGE_SQL[op]} {param(arg)}"
+                )
+    return " AND ".join(clauses), params
+
+
+def containment_filter(filters: Optional[MetadataFilter]) -> dict:
+    """JSONB containment document for an equality-only filter.
+
+    Used where only ``metadata @> filter`` can be pushed down (the Supabase RPC).
+    """
+    validate_filter(filters)
+    document: dict = {}
+    for key, condition in (filters or {}).items():
+        if isinstance(condition, dict):
+            if set(condition) != {"eq"}:
+                raise ValueError(f"Only equality conditions can be expressed as containment (key {key!r})")
+            condition = condition["eq"]
+        path = key.split(".")
+        target = document
+        for part in path[:-1]:
+            target = target.setdefault(part, {})
+        target[path[-1]] = condition
+    return document
+
+
+def matches(metadata: Optional[dict], filters: Optional[MetadataFilter]) -> bool:
+    for key, condition in (filters or {}).items():
+        value = _lookup(metadata, key.split("."))
+        ops = condition if isinstance(condition, dict) else {"eq": condition}
+        for op, arg in ops.items():
+            if value is _MISSING:
+                return False
+            if op == "eq":
+                if not _equal(value, arg):
+                    return False
+            elif op == "in":
+                if not any(_equal(value, option) for option in arg):
+                    return False
+            elif not _compare(value, op, arg):
+                return False
+    return True
+
+
+def filter_mask(metadata: Sequence[Optional[dict]], filters: Optional[MetadataFilter]) -> np.ndarray:
+    """Boolean row mask of ``metadata`` entries that satisfy ``filters``."""
+    validate_filter(filters)
+    if not filters:
+        return np.ones(len(metadata), dtype=bool)
+    return np.fromiter((matches(meta, filters) for meta in metadata), dtype=bool, count=len(metadata))
+
+
+def _nest(path: List[str], value: Any) -> dict:
+    for part in reversed(path):
+        value = {part: value}
+    return value
+
+
+def _lookup(metadata: Optional[dict], path: List[str]) -> Any:
+    value: Any = metadata
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _equal(value: Any, expected: Any) -> bool:
+    # JSON has no int/bool overlap: true must not equal 1.
+    if isinstance(value, bool) or isinstance(expected, bool):
+        return isinstance(value, bool) and isinstance(expected, bool) and value == expected
+    return value == expected
+
+
+def _compare(value: Any, op: str, arg: Any) -> bool:
+    if _is_number(arg):
+        if not _is_number(value):
+            return False
+    elif not isinstance(value, str):
+        return False
+    if op == "gt":
+        return value > arg
+    if op == "gte":
+        return value >= arg
+    if op == "lt":
+        return value < arg
+    return value <= arg
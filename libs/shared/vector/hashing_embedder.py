@@ -0,0 +1,170 @@
+"""
+Deterministic, offline embedding backend based on feature hashing.
+
+Each text is reduced to word n-grams and character n-grams of its normalized
+token stream. Every feature is hashed into one of ``dim`` buckets with a hashed
+sign, counts are damped with sublinear TF (``log1p``), and rows are L2
+normalized. Texts that share words or word fragments land close together, which
+is enough to exercise retrieval end to end in tests, CI and benchmarks with no
+network or model weights. It is not a semantic model.
+
+Hashing is vectorized over the whole batch. The UTF-8 bytes of all texts are
+laid out in one buffer, and the polynomial hash of any span comes from two
+prefix sums in wrapping uint64 arithmetic. No Python code runs per token.
+"""
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_service import EmbeddingService
+
+_P = 0x100000001B3  # odd, so invertible modulo 2**64
+_P_INV = pow(_P, -1, 2**64)
+_SPACE = ord(" ")
+# Runs between tokens, where a token is what hybrid.tokenize matches; NUL separates texts.
+_NON_TOKEN = re.compile(r"(?:[^\w\0]|_)+", re.UNICODE)
+# The same mapping for ASCII text as a byte table: alphanumerics and NUL stay, the rest become spaces.
+_ASCII_SEPARATORS = bytes(b if b == 0 or chr(b).isalnum() else _SPACE for b in range(256))
+# Texts per accumulation block, bounding the dense (block x dim) float64 buffer.
+_BLOCK = 128
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: spreads the polynomial hash over all 64 bits.
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _power_table(base: int, n: int) -> np.ndarray:
+    powers = np.full(n, base, dtype=np.uint64)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint64)
+
+
+class HashingEmbeddingService(EmbeddingService):
+    """Feature-hashing embedder producing L2-normalized float32 vectors.
+
+    ``word_ngrams=2`` uses unigrams and bigrams. Character n-grams, by default
+    3 to 5 bytes including the spaces around words, are weighted by
+    ``char_weight`` relative to words. ``seed`` changes the hash functions, and
+    with them the vector space.
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        word_ngrams: int = 2,
+        char_ngrams: Tuple[int, int] = (3, 5),
+        char_weight: float = 0.5,
+        seed: int = 0,
+    ):
+        low, high = char_ngrams
+        if dim < 1 or word_ngrams < 0 or low < 1 or high < low:
+            raise ValueError("dim must be positive, word_ngrams non-negative and char_ngrams a (low, high) range")
+        self.dim = dim
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = (low, high)
+        self.char_weight = char_weight
+        self.seed = seed
+        self.model_id = f"feature-hashing-{dim}-w{word_ngrams}-c{low}{high}-s{seed}"
+        # One salt per feature family, so "abc" as a word and as a 3-gram hash apart.
+        offset = np.uint64(seed * 0x9E3779B97F4A7C15 % 2**64)
+        salts = _mix(np.arange(1, word_ngrams + high + 2, dtype=np.uint64) + offset)
+        self._word_salts = salts[:word_ngrams]
+        self._char_salts = salts[word_ngrams:]
+        self._power_cache = (_power_table(_P, 1 << 16), _power_table(_P_INV, 1 << 16))
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings as one ``(len(texts), dim)`` float32 matrix."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), _BLOCK):
+            self._embed_block(texts[start:start + _BLOCK], out[start:start + _BLOCK])
+        return out
+
+    def _embed_block(self, texts: Sequence[str], out: np.ndarray) -> None:
+        # One buffer for the block: " tok tok \0 tok tok \0 ... ", tokens as in
+        # hybrid.tokenize, words split by single spaces and texts by NUL bytes.
+        joined = "\0".join(texts)
+        if joined.count("\0") != len(texts) - 1:
+            joined = "\0".join(text.replace("\0", " ") for text in texts)
+        framed = " " + joined.replace("\0", " \0 ").lower() + " "
+        if framed.isascii():
+            # Fast path: map every separator byte to a space, then collapse runs of spaces.
+            buf = np.frombuffer(framed.encode().translate(_ASCII_SEPARATORS), dtype=np.uint8)
+            space = buf == _SPACE
+            keep = np.ones(len(buf), dtype=bool)
+            keep[1:] = ~(space[1:] & space[:-1])
+            buf = buf[keep]
+        else:
+            buf = np.frombuffer(_NON_TOKEN.sub(" ", framed).encode(), dtype=np.uint8)
+        n = len(buf)
+        nul = buf == 0
+        doc_of = np.cumsum(nul)
+        # nul_before[i]: NUL bytes in buf[:i], to reject windows that straddle two texts.
+        nul_before = np.concatenate(([0], doc_of))
+        p_pow, p_inv_pow = self._powers(n)
+
+        # span(s, e) = sum(buf[j] * P**(e-1-j)) = (G[e] - G[s]) * P**(e-1), with G the prefix sums of buf[j] * P**-j.
+        prefix = np.zeros(n + 1, dtype=np.uint64)
+        np.cumsum(buf * p_inv_pow, dtype=np.uint64, out=prefix[1:])
+
+        def span(s: np.ndarray, e: np.ndarray) -> np.ndarray:
+            return (prefix[e] - prefix[s]) * p_pow[e - 1]
+
+        docs, hashes, weights = [], [], []
+
+        if self.word_ngrams:
+            delim = (buf == _SPACE) | nul
+            word_start = np.flatnonzero(~delim[1:] & delim[:-1]) + 1
+            word_end = np.flatnonzero(~delim[:-1] & delim[1:]) + 1
+            word_doc = doc_of[word_start]
+            word_hash = span(word_start, word_end)
+            for k in range(self.word_ngrams):
+                # k-th order n-grams: k+1 consecutive words of the same text.
+                count = len(word_hash) - k
+                if count <= 0:
+                    break
+                h = word_hash[:count]
+                for j in range(1, k + 1):
+                    h = _mix(h) + word_hash[j:j + count]
+                same = word_doc[:count] == word_doc[k:k + count]
+                docs.append(word_doc[:count][same])
+                hashes.append(_mix(h[same] ^ self._word_salts[k]))
+                weights.append(np.full(len(docs[-1]), 1.0))
+
+        low, high = self.char_ngrams
+        for size in range(low, high + 1):
+            s = np.arange(max(n - size + 1, 0))
+            s = s[nul_before[s + size] == nul_before[s]]
+            docs.append(doc_of[s])
+            hashes.append(_mix(span(s, s + size) ^ self._char_salts[size - low]))
+            weights.append(np.full(len(s), self.char_weight))
+
+        h = np.concatenate(hashes)
+        # Multiply-shift maps the high 32 bits onto [0, dim) without a division;
+        # the low bit picks the sign, so collisions cancel out on average.
+        bucket = (((h >> np.uint64(32)) * np.uint64(self.dim)) >> np.uint64(32)).astype(np.int64)
+        signed = np.concatenate(weights)
+        signed[(h & np.uint64(1)).astype(bool)] *= -1
+        counts = np.bincount(np.concatenate(docs) * self.dim + bucket, weights=signed, minlength=out.size)
+        # Rows are sparse, so the sublinear TF and the norms only touch non-zero buckets.
+        cells = np.flatnonzero(counts)
+        values = np.copysign(np.log1p(np.abs(counts[cells])), counts[cells])
+        rows = cells // self.dim
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+        out.reshape(-1)[cells] = values / norms[rows]
+
+    def _powers(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Cached and grown geometrically; the arrays are only ever replaced, never mutated.
+        cached = self._power_cache
+        if len(cached[0]) < n:
+            size = max(n, 2 * len(cached[0]))
+            cached = self._power_cache = (_power_table(_P, size), _power_table(_P_INV, size))
+        return cached[0][:n], cached[1][:n]
@@ -0,0 +1,82 @@
+"""
+Hybrid lexical + vector retrieval.
+
+The lexical side matches exact tokens (ids, SKUs, order numbers) that
+embeddings blur together. Both rankings are merged with weighted reciprocal
+rank fusion: a row at 1-based rank ``r`` in a list of weight ``w`` contributes
+``w / (rrf_k + r)``. Fused results carry the negated fusion score as ``score``,
+so lower is still better, as for distances.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .results import SearchResult
+
+RRF_K = 60
+# Each side fetches this many candidates per requested result before fusion.
+CANDIDATE_FACTOR = 4
+# Text search configuration for the generated search_tsv column (migration 005):
+# "simple" lowercases without stemming, so identifiers stay intact.
+TS_CONFIG = "simple"
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric runs, roughly what the ``simple`` configuration indexes."""
+    return _TOKEN.findall(text.lower())
+
+
+def or_tsquery(text: str) -> str:
+    """``to_tsquery`` input matching any term of ``text``, e.g. ``"sku | 1234 | red"``; "" if none."""
+    return " | ".join(dict.fromkeys(tokenize(text)))
+
+
+def document_tokens(id_: str, metadata: Optional[dict]) -> set:
+    """Tokens of the id and every string value in ``metadata``, like ``search_tsv``."""
+    tokens = set(tokenize(str(id_)))
+    for value in _strings(metadata):
+        tokens.update(tokenize(value))
+    return tokens
+
+
+def candidate_count(top_k: int, candidates: Optional[int]) -> int:
+    return max(top_k, candidates if candidates is not None else top_k * CANDIDATE_FACTOR)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[SearchResult]],
+    weights: Sequence[float],
+    top_k: int,
+    rrf_k: int = RRF_K,
+) -> List[SearchResult]:
+    """Merge ranked result lists; ties keep the order in which ids were first seen."""
+    if len(rankings) != len(weights):
+        raise ValueError("Expected one weight per ranking")
+    scores: Dict[str, float] = {}
+    first: Dict[str, SearchResult] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, hit in enumerate(ranking, start=1):
+            scores[hit.id] = scores.get(hit.id, 0.0) + weight / (rrf_k + rank)
+            first.setdefault(hit.id, hit)
+    order = sorted(scores, key=lambda id_: -scores[id_])[:top_k]
+    return [
+        SearchResult(id=id_, score=-scores[id_], metadata=first[id_].metadata, embedding=first[id_].embedding)
+        for id_ in order
+    ]
+
+
+def check_weights(vector_weight: float, text_weight: float) -> None:
+    if vector_weight < 0 or text_weight < 0 or vector_weight + text_weight == 0:
+        raise ValueError("Hybrid weights must be non-negative and not both zero")
+
+
+def _strings(value) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
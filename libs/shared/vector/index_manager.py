@@ -0,0 +1,300 @@
+"""
+Index lifecycle management for the pgvector ``vectors`` table.
+
+An IVFFlat index learns its list centroids from the rows present when it is
+built, so it must be (re)built after data is loaded; HNSW can be built on an
+empty table but its graph parameters should grow with the table. The
+``IndexManager`` derives build parameters from the row count, rebuilds with
+``CREATE INDEX CONCURRENTLY`` so writes keep flowing, and turns a recall/latency
+profile into the per-transaction ``ivfflat.probes`` / ``hnsw.ef_search``
+settings used at query time.
+"""
+import argparse
+import json
+import logging
+import math
+import re
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+SEARCH_PROFILES = ("fast", "balanced", "accurate")
+# Operator class per metric; the adapters order by <->, i.e. L2.
+OPCLASSES = {"l2": "vector_l2_ops", "cosine": "vector_cosine_ops", "inner_product": "vector_ip_ops"}
+
+# Above this many rows IVFFlat is preferred: HNSW builds get slow and memory-hungry.
+HNSW_MAX_ROWS = 5_000_000
+# pgvector caps hnsw.ef_search at 1000.
+_MAX_EF_SEARCH = 1000
+_EF_SEARCH = {"fast": 40, "balanced": 100, "accurate": 400}
+# Multiples of sqrt(lists), the usual starting point for ivfflat.probes.
+_PROBE_FACTOR = {"fast": 0.5, "balanced": 1.0, "accurate": 4.0}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# pgvector's build defaults, which pg_get_indexdef omits.
+_DEFAULT_OPTIONS = {"ivfflat": {"lists": 100}, "hnsw": {"m": 16, "ef_construction": 64}}
+
+
+@dataclass(frozen=True)
+class IndexParams:
+    method: str
+    opclass: str
+    lists: Optional[int] = None
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+    # Row count the index was built for, recorded in the index comment.
+    rows: Optional[int] = None
+
+    def with_clause(self) -> str:
+        if self.method == "ivfflat":
+            return f"WITH (lists = {self.lists})"
+        return f"WITH (m = {self.m}, ef_construction = {self.ef_construction})"
+
+
+def plan_index(rows: int, metric: str = "l2", method: str = "auto") -> IndexParams:
+    """Build parameters for a table of ``rows`` rows.
+
+    IVFFlat uses ``rows / 1000`` lists up to 1M rows and ``sqrt(rows)`` beyond;
+    HNSW widens ``m`` and ``ef_construction`` as the table grows.
+    """
+    if metric not in OPCLASSES:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(OPCLASSES)}")
+    if method == "auto":
+        method = "hnsw" if rows <= HNSW_MAX_ROWS else "ivfflat"
+    if method == "ivfflat":
+        lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+        return IndexParams("ivfflat", OPCLASSES[metric], lists=max(1, lists), rows=rows)
+    if method == "hnsw":
+        if rows < 100_000:
+            m, ef_construction = 16, 64
+        elif rows < 1_000_000:
+            m, ef_construction = 16, 128
+        else:
+            m, ef_construction = 24, 200
+        return IndexParams("hnsw", OPCLASSES[metric], m=m, ef_construction=ef_construction, rows=rows)
+    raise ValueError(f"Unknown index method {method!r}; expected 'auto' or one of {', '.join(INDEX_METHODS)}")
+
+
+def search_settings(profile: str, limit: int, params: Optional[IndexParams] = None) -> Dict[str, str]:
+    """Planner settings for ``profile`` when each query fetches ``limit`` rows.
+
+    ``hnsw.ef_search`` bounds how many rows an HNSW scan can return, so it is
+    never set below ``limit``. Probes depend on the list count, so they are only
+    set when the index is known to be IVFFlat.
+    """
+    if profile not in SEARCH_PROFILES:
+        raise ValueError(f"Unknown search profile {profile!r}; expected one of {', '.join(SEARCH_PROFILES)}")
+    if params is not None and params.method == "ivfflat":
+        probes = round(math.sqrt(params.lists) * _PROBE_FACTOR[profile])
+        return {"ivfflat.probes": str(min(params.lists, max(1, probes)))}
+    return {"hnsw.ef_search": str(min(_MAX_EF_SEARCH, max(limit, _EF_SEARCH[profile])))}
+
+
+def parse_indexdef(indexdef: str, comment: Optional[str] = None) -> IndexParams:
+    """Recover ``IndexParams`` from ``pg_get_indexdef`` output and the index comment."""
+    method = re.search(r"USING (\w+)", indexdef)
+    opclass = re.search(r"\(\w+ (\w+)\)", indexdef)
+    method = method.group(1) if method else ""
+    options = dict(_DEFAULT_OPTIONS.get(method, {}))
+    options.update((key, int(value)) for key, value in re.findall(r"(\w+)='?(\d+)'?", indexdef))
+    try:
+        rows = json.loads(comment)["rows"] if comment else None
+    except (ValueError, KeyError, TypeError):
+        rows = None
+    return IndexParams(
+        method=method,
+        opclass=opclass.group(1) if opclass else "",
+        lists=options.get("lists"),
+        m=options.get("m"),
+        ef_construction=options.get("ef_construction"),
+        rows=rows,
+    )
+
+
+class IndexManager:
+    """Chooses, builds and tunes the ANN index on one vector column."""
+
+    def __init__(
+        self,
+        pool: Any,
+        table: str = "vectors",
+        column: str = "embedding",
+        name: str = "idx_vectors_embedding",
+        metric: str = "l2",
+        method: str = "auto",
+        growth: float = 2.0,
+        maintenance_work_mem: Optional[str] = None,
+        ttl: float = 60.0,
+    ):
+        for identifier in (table, column, name):
+            if not _IDENTIFIER.match(identifier):
+                raise ValueError(f"Invalid SQL identifier {identifier!r}")
+        if metric not in OPCLASSES:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(OPCLASSES)}")
+        self.pool = pool
+        self.table = table
+        self.column = column
+        self.name = name
+        self.metric = metric
+        self.method = method
+        # IVFFlat centroids are refit once the table has grown by this factor.
+        self.growth = growth
+        self.maintenance_work_mem = maintenance_work_mem
+        # Seconds the live index parameters are trusted before being re-read, so
+        # rebuilds done by other processes reach this one's query-time settings.
+        self.ttl = ttl
+        self._current: Optional[IndexParams] = None
+        self._loaded = False
+        self._loaded_at = 0.0
+
+    def row_count(self, exact: bool = False) -> int:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                if not exact:
+                    # Planner estimate; -1 (or 0 before PG14) until the table is analyzed.
+                    cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (self.table,))
+                    row = cur.fetchone()
+                    if row and row[0] > 0:
+                        return int(row[0])
+                cur.execute(f"SELECT count(*) FROM {self.table}")
+                return int(cur.fetchone()[0])
+
+    def plan(self, rows: Optional[int] = None) -> IndexParams:
+        return plan_index(self.row_count() if rows is None else rows, self.metric, self.method)
+
+    def current(self, refresh: bool = False, cur: Any = None) -> Optional[IndexParams]:
+        """Parameters of the live index, or None if it is missing or invalid.
+
+        Callers that already hold a pooled connection pass its cursor, so the
+        lookup never waits on the pool for a second connection.
+        """
+        if self._loaded and not refresh and time.monotonic() - self._loaded_at < self.ttl:
+            return self._current
+        if cur is None:
+            with self.pool.connection() as conn:
+                with conn.cursor() as own:
+                    row = self._read_index(own)
+        else:
+            row = self._read_index(cur)
+        # An invalid index is the remains of a failed concurrent build: unused by the planner.
+        self._set_current(parse_indexdef(row[0], row[1]) if row and row[2] else None)
+        return self._current
+
+    def _read_index(self, cur: Any) -> Optional[tuple]:
+        cur.execute("""
+            SELECT pg_get_indexdef(i.indexrelid), obj_description(i.indexrelid, 'pg_class'), i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s
+        """, (self.name,))
+        return cur.fetchone()
+
+    def _set_current(self, params: Optional[IndexParams]) -> None:
+        self._current, self._loaded, self._loaded_at = params, True, time.monotonic()
+
+    def needs_rebuild(self, planned: IndexParams, current: Optional[IndexParams]) -> bool:
+        if current is None:
+            return True
+        if (current.method, current.opclass) != (planned.method, planned.opclass):
+            return True
+        if current.method == "ivfflat":
+            return current.rows is None or planned.rows >= self.growth * max(current.rows, 1)
+        # HNSW stays accurate under inserts; only rebuild when the size tier changes.
+        return (current.m, current.ef_construction) != (planned.m, planned.ef_construction)
+
+    def ensure(self, analyze: bool = True) -> Optional[IndexParams]:
+        """Rebuild the index if it is missing, mismatched or stale; returns the new parameters, else None.
+
+        Call after bulk loads. ``analyze`` refreshes the row estimate first.
+        """
+        if analyze:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"ANALYZE {self.table}")
+                conn.commit()
+        planned = self.plan()
+        if not self.needs_rebuild(planned, self.current(refresh=True)):
+            return None
+        return self.rebuild(planned)
+
+    def rebuild(self, params: Optional[IndexParams] = None) -> IndexParams:
+        """Build a replacement index concurrently, then swap it in under the canonical name."""
+        params = params or self.plan()
+        if params.rows is None:
+            params = replace(params, rows=self.row_count())
+        building, retired = f"{self.name}_rebuild", f"{self.name}_retired"
+        with self.pool.connection() as conn:
+            # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    if self.maintenance_work_mem:
+                        # Session-wide on a pooled connection, so it is reset however the build ends.
+                        cur.execute("SELECT set_config('maintenance_work_mem', %s, false)", (self.maintenance_work_mem,))
+                    try:
+                        self._build_and_swap(cur, params, building, retired)
+                    finally:
+                        if self.maintenance_work_mem:
+                            cur.execute("RESET maintenance_work_mem")
+            finally:
+                conn.autocommit = False
+        self._set_current(params)
+        return params
+
+    def _build_and_swap(self, cur: Any, params: IndexParams, building: str, retired: str) -> None:
+        # Leftovers of an interrupted rebuild would only slow down writes.
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}")
+        logger.info("building %s index on %s for %d rows", params.method, self.table, params.rows)
+        cur.execute(
+            f"CREATE INDEX CONCURRENTLY {building} ON {self.table} "
+            f"USING {params.method} ({self.column} {params.opclass}) {params.with_clause()}"
+        )
+        cur.execute(f"COMMENT ON INDEX {building} IS %s", (json.dumps({"rows": params.rows}),))
+        # Both renames commit together, so the name always refers to a valid index.
+        cur.execute("BEGIN")
+        try:
+            cur.execute(f"ALTER INDEX IF EXISTS {self.name} RENAME TO {retired}")
+            cur.execute(f"ALTER INDEX {building} RENAME TO {self.name}")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}")
+
+    def search_settings(self, profile: str, limit: int, cur: Any = None) -> Dict[str, str]:
+        return search_settings(profile, limit, self.current(cur=cur))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import psycopg2
+    from .pool import ConnectionPool
+
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the vectors ANN index")
+    parser.add_argument("dsn")
+    parser.add_argument("action", choices=("show", "ensure", "rebuild"))
+    parser.add_argument("--method", default="auto", choices=("auto",) + INDEX_METHODS)
+    parser.add_argument("--metric", default="l2", choices=tuple(OPCLASSES))
+    parser.add_argument("--maintenance-work-mem", help="e.g. 2GB; HNSW builds are much faster when the graph fits")
+    args = parser.parse_args(argv)
+
+    pool = ConnectionPool(lambda: psycopg2.connect(args.dsn), min_size=0, max_size=1)
+    manager = IndexManager(pool, metric=args.metric, method=args.method, maintenance_work_mem=args.maintenance_work_mem)
+    try:
+        if args.action == "show":
+            current = manager.current()
+            report = {"current": current and asdict(current), "planned": asdict(manager.plan())}
+        elif args.action == "ensure":
+            built = manager.ensure()
+            report = {"rebuilt": built is not None, "current": asdict(manager.current())}
+        else:
+            report = {"current": asdict(manager.rebuild())}
+        print(json.dumps(report, indent=2))
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Streaming ingestion: documents -> chunks -> embeddings -> vector store.
+
+Each stage runs on its own worker threads and hands items to the next one
+through a bounded queue, so a slow stage (usually embedding or the database)
+blocks the stages before it instead of letting work pile up in memory. The
+source iterator is consumed lazily, which keeps memory flat however large the
+corpus is.
+
+Progress is checkpointed as the number of leading documents whose chunks have
+all been upserted. Re-running with the same checkpoint file and the same
+document order skips that prefix; chunks of partially written documents are
+upserted again, which is harmless because chunk ids are deterministic.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .adapter import VectorDBAdapter
+from .embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+# How often blocked workers wake up to check whether the pipeline failed.
+_POLL = 0.1
+
+
+@dataclass(frozen=True)
+class Document:
+    id: str
+    text: str
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    id: str
+    text: str
+    metadata: dict
+    # Position of the source document in the input stream, for checkpointing.
+    seq: int
+
+
+@dataclass(frozen=True)
+class StageStats:
+    name: str
+    workers: int
+    items_in: int
+    items_out: int
+    batches: int
+    busy_seconds: float
+    queue_depth: int
+    elapsed: float
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items_out / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        # Fraction of worker time spent processing rather than waiting on queues.
+        return self.busy_seconds / (self.elapsed * self.workers) if self.elapsed > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class IngestReport:
+    documents: int
+    chunks: int
+    resumed_from: int
+    seconds: float
+    stages: Dict[str, StageStats]
+
+
+class IngestionError(RuntimeError):
+    """A stage failed; the checkpoint still covers every fully written document."""
+
+    def __init__(self, stage: str, error: BaseException, documents: int):
+        self.stage = stage
+        self.error = error
+        self.documents = documents
+        super().__init__(f"Ingestion stage {stage!r} failed after {documents} complete documents: {error!r}")
+
+
+def split_text(text: str, size: int = 1000, overlap: int = 100) -> List[str]:
+    """Split ``text`` into pieces of at most ``size`` characters, preferring whitespace boundaries.
+
+    Consecutive pieces share up to ``overlap`` characters of context.
+    """
+    if size < 1 or not 0 <= overlap < size:
+        raise ValueError("size must be positive and 0 <= overlap < size")
+    text = text.strip()
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + overlap + 1, end)
+            if cut > start:
+                end = cut
+        pieces.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [piece for piece in pieces if piece]
+
+
+class Checkpoint:
+    """JSON file recording how many leading documents are fully ingested."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Tuple[int, Optional[str]]:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0, None
+        return int(state["documents"]), state.get("last_id")
+
+    def save(self, documents: int, last_id: Optional[str]) -> None:
+        # Write-then-rename so a crash never leaves a truncated checkpoint.
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"documents": documents, "last_id": last_id}, f)
+        os.replace(tmp, self.path)
+
+
+class _Stage:
+    def __init__(self, name: str, process: Callable[[list], list], workers: int, batch_size: int, queue_size: int):
+        if workers < 1 or batch_size < 1:
+            raise ValueError(f"Stage {name!r} needs at least one worker and a positive batch size")
+        self.name = name
+        self.process = process
+        self.workers = workers
+        self.batch_size = batch_size
+        self.inbox: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self.outbox: Optional["_Stage"] = None
+        self.lock = threading.Lock()
+        self.items_in = self.items_out = self.batches = 0
+        self.busy = 0.0
+        self.running = workers
+
+    def stats(self, elapsed: float) -> StageStats:
+        with self.lock:
+            return StageStats(
+                self.name, self.workers, self.items_in, self.items_out, self.batches,
+                self.busy, self.inbox.qsize(), elapsed,
+            )
+
+
+class IngestionPipeline:
+    """Chunk, embed and upsert a document stream with bounded memory.
+
+    ``*_batch_size`` is the most items a worker of that stage handles per call;
+    a worker that has started a batch waits at most ``linger`` seconds for it
+    to fill. Every inter-stage queue holds at most ``queue_size`` items.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        adapter: VectorDBAdapter,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        chunk_batch_size: int = 16,
+        embed_batch_size: int = 64,
+        upsert_batch_size: int = 500,
+        chunk_workers: int = 1,
+        embed_workers: int = 2,
+        upsert_workers: int = 2,
+        queue_size: int = 256,
+        linger: float = 0.05,
+        checkpoint: Optional[str] = None,
+        checkpoint_interval: float = 5.0,
+    ):
+        self.embedder = embedder
+        self.adapter = adapter
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.linger = linger
+        self.checkpoint = Checkpoint(checkpoint) if checkpoint else None
+        self.checkpoint_interval = checkpoint_interval
+        self._stage_options = [
+            ("chunk", self._chunk, chunk_workers, chunk_batch_size),
+            ("embed", self._embed, embed_workers, embed_batch_size),
+            ("upsert", self._upsert, upsert_workers, upsert_batch_size),
+        ]
+        self._queue_size = queue_size
+        self._stages = self._build_stages()
+        self._started = 0.0
+        self._finished: Optional[float] = None
+        self._failed = threading.Event()
+        self._error: Optional[Tuple[str, BaseException]] = None
+        self._progress_lock = threading.Lock()
+        self._watermark = 0
+        self._last_id: Optional[str] = None
+        # seq -> [document id, chunks still to be upserted] for documents past the watermark
+        self._pending: Dict[int, list] = {}
+        self._last_save = 0.0
+
+    def stats(self) -> Dict[str, StageStats]:
+        """Per-stage counters; safe to call from another thread while ``run`` is in progress."""
+        end = self._finished if self._finished is not None else time.perf_counter()
+        elapsed = end - self._started if self._started else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self._stages}
+
+    def run(self, documents: Iterable[Document]) -> IngestReport:
+        start, last_id = self.checkpoint.load() if self.checkpoint else (0, None)
+        self._stages = self._build_stages()
+        self._failed.clear()
+        self._error = None
+        self._pending.clear()
+        self._watermark, self._last_id = start, last_id
+        self._started, self._finished = time.perf_counter(), None
+        threads = [
+            threading.Thread(target=self._work, args=(stage,), name=f"ingest-{stage.name}-{i}", daemon=True)
+            for stage in self._stages
+            for i in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        first = self._stages[0]
+        try:
+            for seq, document in enumerate(documents):
+                if seq < start:
+                    if seq == start - 1 and last_id is not None and document.id != last_id:
+                        raise ValueError(
+                            f"Checkpoint expects document {start - 1} to be {last_id!r}, got {document.id!r}; "
+                            "the input order changed"
+                        )
+                    continue
+                if not self._put(first, (seq, document)):
+                    break
+        except BaseException as e:
+            self._fail("source", e)
+        for _ in range(first.workers):
+            self._put(first, _DONE)
+        for thread in threads:
+            thread.join()
+        self._finished = time.perf_counter()
+        self._save_checkpoint(force=True)
+        if self._error is not None:
+            stage, error = self._error
+            raise IngestionError(stage, error, self._watermark) from error
+        stats = self.stats()
+        report = IngestReport(
+            documents=self._watermark - start,
+            chunks=stats["upsert"].items_out,
+            resumed_from=start,
+            seconds=self._finished - self._started,
+            stages=stats,
+        )
+        logger.info(
+            "ingested %d documents (%d chunks) in %.1fs: %s", report.documents, report.chunks, report.seconds,
+            ", ".join(f"{s.name} {s.items_per_sec:.0f}/s" for s in stats.values()),
+        )
+        return report
+
+    def _build_stages(self) -> List[_Stage]:
+        stages = [_Stage(*options, self._queue_size) for options in self._stage_options]
+        for stage, following in zip(stages, stages[1:]):
+            stage.outbox = following
+        return stages
+
+    def _chunk(self, batch: List[Tuple[int, Document]]) -> List[Chunk]:
+        chunks = []
+        for seq, document in batch:
+            pieces = split_text(document.text, self.chunk_size, self.chunk_overlap)
+            # Registered before any chunk is emitted so completions are never counted early.
+            self._expect(seq, document.id, len(pieces))
+            for i, piece in enumerate(pieces):
+                metadata = {**document.metadata, "doc_id": document.id, "chunk": i, "text": piece}
+                chunks.append(Chunk(f"{document.id}#{i}", piece, metadata, seq))
+        return chunks
+
+    def _embed(self, batch: List[Chunk]) -> List[Tuple[Chunk, List[float]]]:
+        vectors = self.embedder.embed([chunk.text for chunk in batch])
+        if len(vectors) != len(batch):
+            raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(batch)} texts")
+        return list(zip(batch, vectors))
+
+    def _upsert(self, batch: List[Tuple[Chunk, List[float]]]) -> list:
+        self.adapter.upsert(
+            [chunk.id for chunk, _ in batch],
+            [vector for _, vector in batch],
+            [chunk.metadata for chunk, _ in batch],
+        )
+        self._complete(chunk.seq for chunk, _ in batch)
+        return batch
+
+    def _work(self, stage: _Stage) -> None:
+        try:
+            done = False
+            while not done and not self._failed.is_set():
+                batch, done = self._take(stage)
+                if not batch:
+                    continue
+                began = time.perf_counter()
+                outputs = stage.process(batch)
+                with stage.lock:
+                    stage.busy += time.perf_counter() - began
+                    stage.items_in += len(batch)
+                    stage.items_out += len(outputs)
+                    stage.batches += 1
+                if stage.outbox is not None:
+                    for item in outputs:
+                        if not self._put(stage.outbox, item):
+                            return
+        except BaseException as e:
+            self._fail(stage.name, e)
+        finally:
+            with stage.lock:
+                stage.running -= 1
+                last = stage.running == 0
+            # The last worker out tells every worker of the next stage that input has ended.
+            if last and stage.outbox is not None:
+                for _ in range(stage.outbox.workers):
+                    self._put(stage.outbox, _DONE)
+
+    def _take(self, stage: _Stage) -> Tuple[list, bool]:
+        # Block for the first item, then top the batch up with whatever arrives
+        # within `linger` seconds (or is already queued).
+        batch: list = []
+        deadline = None
+        while len(batch) < stage.batch_size:
+            if self._failed.is_set():
+                return [], True
+            try:
+                if deadline is None:
+                    item = stage.inbox.get(timeout=_POLL)
+                else:
+                    remaining = deadline - time.monotonic()
+                    item = stage.inbox.get(timeout=remaining) if remaining > 0 else stage.inbox.get_nowait()
+            except queue.Empty:
+                if deadline is None:
+                    continue
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.linger
+        return batch, False
+
+    def _put(self, stage: _Stage, item: Any) -> bool:
+        # Blocks while the next stage is saturated (backpressure) but gives up once the pipeline fails.
+        while True:
+            if self._failed.is_set():
+                return False
+            try:
+                stage.inbox.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+
+    def _fail(self, stage: str, error: BaseException) -> None:
+        with self._progress_lock:
+            if self._error is None:
+                self._error = (stage, error)
+                logger.error("ingestion stage %s failed: %r", stage, error)
+        self._failed.set()
+
+    def _expect(self, seq: int, document_id: str, chunks: int) -> None:
+        with self._progress_lock:
+            self._pending[seq] = [document_id, chunks]
+            self._advance()
+
+    def _complete(self, seqs: Iterable[int]) -> None:
+        with self._progress_lock:
+            for seq in seqs:
+                self._pending[seq][1] -= 1
+            self._advance()
+        self._save_checkpoint()
+
+    def _advance(self) -> None:
+        # Documents finish out of order; the watermark only moves over a complete prefix.
+        while self._pending.get(self._watermark, (None, -1))[1] == 0:
+            self._last_id = self._pending.pop(self._watermark)[0]
+            self._watermark += 1
+
+    def _save_checkpoint(self, force: bool = False) -> None:
+        if self.checkpoint is None:
+            return
+        with self._progress_lock:
+            now = time.monotonic()
+            if not force and now - self._last_save < self.checkpoint_interval:
+                return
+            self._last_save = now
+            self.checkpoint.save(self._watermark, self._last_id)
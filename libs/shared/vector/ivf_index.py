@@ -0,0 +1,464 @@
+import threading
+import numpy as np
+from typing import List, Any, Callable, Dict, Optional, Sequence, Tuple
+from .adapter import VectorDBAdapter
+from .filters import MetadataFilter, filter_mask
+from .hybrid import document_tokens, tokenize
+from .results import SearchResult, similarity_to_distance
+from .scoring import check_metric, similarity, squared_norms, top_k as top_k_indices
+
+ASSIGN_CHUNK = 8192
+
+def minibatch_kmeans(
+    data: np.ndarray,
+    k: int,
+    batch_size: int = 1024,
+    iters: int = 50,
+    spherical: bool = False,
+    seed: int = 0,
+) -> np.ndarray:
+    """Mini-batch k-means (Sculley, 2010); ``spherical`` keeps centroids unit length for cosine."""
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    k = min(k, n)
+    centroids = data[rng.choice(n, size=k, replace=False)].astype(np.float32, copy=True)
+    if spherical:
+        _normalize(centroids)
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iters):
+        batch = data[rng.choice(n, size=min(batch_size, n), replace=False)]
+        labels = _nearest(centroids, batch, "cosine" if spherical else "l2")
+        sums = np.zeros_like(centroids, dtype=np.float64)
+        np.add.at(sums, labels, batch)
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        hit = batch_counts > 0
+        counts[hit] += batch_counts[hit]
+        # Per-centroid learning rate 1/count, applied to the batch mean in one step.
+        centroids[hit] += ((sums[hit] - batch_counts[hit, None] * centroids[hit]) / counts[hit, None]).astype(np.float32)
+        if spherical:
+            _normalize(centroids)
+    # Reseed centroids that never won a point so no list is permanently empty.
+    dead = np.flatnonzero(counts == 0)
+    if len(dead):
+        centroids[dead] = data[rng.choice(n, size=len(dead), replace=False)]
+        if spherical:
+            _normalize(centroids)
+    return centroids
+
+def _normalize(matrix: np.ndarray) -> None:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+def _nearest(centroids: np.ndarray, vectors: np.ndarray, metric: str) -> np.ndarray:
+    c_norms = squared_norms(centroids)
+    labels = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start:start + ASSIGN_CHUNK]
+        labels[start:start + ASSIGN_CHUNK] = similarity(centroids, c_norms, chunk, metric).argmax(axis=1)
+    return labels
+
+class _InvertedList:
+    def __init__(self, dim: int):
+        self.vectors = np.empty((16, dim), dtype=np.float32)
+        self.norms = np.empty(16, dtype=np.float32)
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend(self, ids: List[str], vectors: np.ndarray, norms: np.ndarray) -> int:
+        start = len(self.ids)
+        end = start + len(ids)
+        if end > len(self.vectors):
+            capacity = len(self.vectors)
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:start] = self.vectors[:start]
+            grown_norms = np.empty(capacity, dtype=np.float32)
+            grown_norms[:start] = self.norms[:start]
+            self.vectors, self.norms = grown, grown_norms
+        self.vectors[start:end] = vectors
+        self.norms[start:end] = norms
+        self.ids.extend(ids)
+        return start
+
+    def swap_remove(self, pos: int) -> Optional[str]:
+        # Returns the id that moved into ``pos``, if any.
+        last = len(self.ids) - 1
+        moved = None
+        if pos != last:
+            self.vectors[pos] = self.vectors[last]
+            self.norms[pos] = self.norms[last]
+            self.ids[pos] = moved = self.ids[last]
+        self.ids.pop()
+        return moved
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index.
+
+    Vectors are bucketed by their nearest k-means centroid and a query scans
+    only the ``nprobe`` closest buckets. Until ``train`` is called everything
+    sits in a single list and search is exact.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int = 256,
+        nprobe: int = 8,
+        metric: str = "cosine",
+        imbalance_threshold: float = 2.0,
+        growth_threshold: float = 2.0,
+        train_batch_size: int = 1024,
+        train_iters: int = 50,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.metric = check_metric(metric)
+        self.imbalance_threshold = imbalance_threshold
+        self.growth_threshold = growth_threshold
+        self.train_batch_size = train_batch_size
+        self.train_iters = train_iters
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[_InvertedList] = [_InvertedList(dim)]
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._trained_size = 0
+        self._trained_imbalance = 1.0
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._locations
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: Optional[np.ndarray] = None) -> None:
+        """Fit centroids (on ``vectors`` or the current contents) and reassign every stored vector."""
+        ids, stored = self._contents()
+        self._fit(ids, stored, stored if vectors is None else np.asarray(vectors, dtype=np.float32))
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray]:
+        """Copy of the stored ids and vectors, for building a replacement with ``rebuilt``."""
+        return self._contents()
+
+    def rebuilt(self, ids: List[str], vectors: np.ndarray) -> "IVFIndex":
+        """A new trained index with this one's settings holding ``ids``; ``self`` is untouched."""
+        index = IVFIndex(
+            self.dim, nlist=self.nlist, nprobe=self.nprobe, metric=self.metric,
+            imbalance_threshold=self.imbalance_threshold, growth_threshold=self.growth_threshold,
+            train_batch_size=self.train_batch_size, train_iters=self.train_iters, seed=self.seed,
+        )
+        index._fit(ids, vectors, vectors)
+        return index
+
+    def add(self, ids: List[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # Last occurrence wins for ids repeated within one call.
+        last = {id_: i for i, id_ in enumerate(ids)}
+        if len(last) != len(ids):
+            keep = sorted(last.values())
+            ids, vectors = [ids[i] for i in keep], vectors[keep]
+        self.remove([id_ for id_ in ids if id_ in self._locations])
+        self._insert(list(ids), vectors)
+
+    def remove(self, ids: List[str]) -> None:
+        for id_ in ids:
+            location = self._locations.pop(id_, None)
+            if location is None:
+                continue
+            list_no, pos = location
+            moved = self._lists[list_no].swap_remove(pos)
+            if moved is not None:
+                self._locations[moved] = (list_no, pos)
+
+    def get(self, id_: str) -> np.ndarray:
+        list_no, pos = self._locations[id_]
+        return self._lists[list_no].vectors[pos]
+
+    def imbalance(self) -> float:
+        """Largest list size over the mean list size; 1.0 means perfectly balanced."""
+        sizes = np.array([len(lst) for lst in self._lists], dtype=np.float64)
+        mean = sizes.mean() if len(sizes) else 0.0
+        return float(sizes.max() / mean) if mean > 0 else 1.0
+
+    @property
+    def needs_retrain(self) -> bool:
+        if not self.trained:
+            return False
+        grown = len(self) >= self.growth_threshold * max(self._trained_size, 1)
+        drifted = self.imbalance() > self.imbalance_threshold * self._trained_imbalance
+        return grown or drifted
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        allow: Optional[Callable[[List[str]], np.ndarray]] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """Top-k ``(id, similarity)`` per query; ``allow`` maps candidate ids to a keep-mask."""
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.trained:
+            probe = min(nprobe or self.nprobe, len(self._lists))
+            coarse = similarity(self.centroids, squared_norms(self.centroids), queries, self.metric)
+            probes = top_k_indices(coarse, probe)
+        else:
+            probes = np.zeros((len(queries), 1), dtype=np.intp)
+        # Score each probed list once against every query that probes it, keeping
+        # only that list's top_k per query, then merge the few survivors per query.
+        hit_scores: List[List[np.ndarray]] = [[] for _ in range(len(queries))]
+        hit_ids: List[List[str]] = [[] for _ in range(len(queries))]
+        flat = probes.ravel()
+        order = np.argsort(flat, kind="stable")
+        bounds = np.flatnonzero(np.diff(flat[order])) + 1
+        for group in np.split(order, bounds) if len(order) else []:
+            lst = self._lists[int(flat[group[0]])]
+            n = len(lst)
+            if not n:
+                continue
+            vectors, norms, ids = lst.vectors[:n], lst.norms[:n], lst.ids
+            if allow is not None:
+                keep = np.flatnonzero(allow(ids))
+                if not len(keep):
+                    continue
+                if len(keep) < n:
+                    vectors, norms, ids = vectors[keep], norms[keep], [ids[i] for i in keep]
+            rows = group // probes.shape[1]
+            scores = similarity(vectors, norms, queries[rows], self.metric)
+            best = top_k_indices(scores, top_k)
+            for row, row_scores, cols in zip(rows, scores, best):
+                hit_scores[row].append(row_scores[cols])
+                hit_ids[row].extend(ids[i] for i in cols)
+        results = []
+        for row_scores, row_ids in zip(hit_scores, hit_ids):
+            if not row_ids:
+                results.append([])
+                continue
+            merged = np.concatenate(row_scores)
+            best = top_k_indices(merged[None, :], top_k)[0]
+            results.append([(row_ids[i], float(merged[i])) for i in best])
+        return results
+
+    def _insert(self, ids: List[str], vectors: np.ndarray) -> None:
+        if not ids:
+            return
+        labels = _nearest(self.centroids, vectors, self.metric) if self.trained else np.zeros(len(ids), dtype=np.intp)
+        norms = squared_norms(vectors)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        for group in np.split(order, bounds):
+            label = int(labels[group[0]])
+            group_ids = [ids[i] for i in group]
+            start = self._lists[label].extend(group_ids, vectors[group], norms[group])
+            for pos, id_ in enumerate(group_ids, start):
+                self._locations[id_] = (label, pos)
+
+    def _fit(self, ids: List[str], stored: np.ndarray, sample: np.ndarray) -> None:
+        if len(sample) == 0:
+            raise ValueError("Cannot train an IVF index without vectors")
+        self.centroids = minibatch_kmeans(
+            sample, self.nlist, batch_size=self.train_batch_size, iters=self.train_iters,
+            spherical=self.metric == "cosine", seed=self.seed,
+        )
+        self._lists = [_InvertedList(self.dim) for _ in range(len(self.centroids))]
+        self._locations = {}
+        self._insert(ids, stored)
+        self._trained_size = len(self)
+        self._trained_imbalance = self.imbalance()
+
+    def _contents(self) -> Tuple[List[str], np.ndarray]:
+        ids = [id_ for lst in self._lists for id_ in lst.ids]
+        if not ids:
+            return ids, np.empty((0, self.dim), dtype=np.float32)
+        return ids, np.concatenate([lst.vectors[: len(lst)] for lst in self._lists])
+
+class IVFVectorAdapter(VectorDBAdapter):
+    """In-process approximate adapter backed by an :class:`IVFIndex`.
+
+    The index trains itself once ``min_train_size`` vectors are stored and
+    retrains when its lists drift out of balance. Training builds a replacement
+    index outside the lock, so queries and writes carry on against the old one;
+    writes made meanwhile are replayed onto the new index before it is swapped in.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int = 256,
+        nprobe: int = 8,
+        metric: str = "cosine",
+        min_train_size: Optional[int] = None,
+        auto_retrain: bool = True,
+        **index_options: Any,
+    ):
+        self.index = IVFIndex(dim, nlist=nlist, nprobe=nprobe, metric=metric, **index_options)
+        # Rule of thumb: k-means needs a few dozen points per centroid.
+        self.min_train_size = min_train_size if min_train_size is not None else 39 * nlist
+        self.auto_retrain = auto_retrain
+        self._metadata: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        # Token -> ids inverted index for lexical_query, valid for one write generation.
+        self._postings: Optional[Tuple[int, Dict[str, List[str]]]] = None
+        # Writes since the snapshot of an in-flight rebuild; None when idle.
+        self._journal: Optional[List[Tuple[str, List[str], Optional[np.ndarray]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        if not (len(ids) == len(vectors) == len(metadata)):
+            raise ValueError("ids, vectors and metadata must have the same length")
+        arr = np.asarray(vectors, dtype=np.float32)
+        if len(ids) and (arr.ndim != 2 or arr.shape[1] != self.index.dim):
+            raise ValueError(f"Expected vectors of shape (n, {self.index.dim})")
+        with self._lock:
+            self.index.add(ids, arr)
+            self._metadata.update(zip(ids, metadata))
+            if self._journal is not None:
+                self._journal.append(("add", list(ids), arr))
+            self._bump_generation()
+            snapshot = self._start_rebuild() if self._should_train() else None
+        if snapshot is not None:
+            self._rebuild(*snapshot)
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        return self.query_batch([vector], top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)[0]
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> List[List[SearchResult]]:
+        if len(vectors) == 0:
+            return []
+        # Filters apply to the probed lists only, so very selective filters may
+        # need a larger nprobe to fill top_k.
+        allow = (lambda ids: filter_mask([self._metadata[i] for i in ids], filters)) if filters else None
+        with self._lock:
+            hits = self.index.search(np.asarray(vectors, dtype=np.float32), top_k=top_k, nprobe=nprobe, allow=allow)
+            return [
+                [
+                    SearchResult(
+                        id=id_,
+                        score=float(similarity_to_distance(np.float32(sim), self.index.metric)),
+                        metadata=self._metadata[id_] if include_metadata else None,
+                        embedding=self.index.get(id_).tolist() if include_embedding else None,
+                    )
+                    for id_, sim in row
+                ]
+                for row in hits
+            ]
+
+    def lexical_query(
+        self,
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Ids are ranked by how many distinct query terms they contain (an OR query).
+        terms = set(tokenize(text))
+        with self._lock:
+            if not terms or not self._metadata:
+                return []
+            postings = self._lexical_postings()
+            counts: Dict[str, int] = {}
+            for term in terms:
+                for id_ in postings.get(term, ()):
+                    counts[id_] = counts.get(id_, 0) + 1
+            ids = list(counts)
+            if filters and ids:
+                ids = [id_ for id_, keep in zip(ids, filter_mask([self._metadata[i] for i in ids], filters)) if keep]
+            return [
+                SearchResult(
+                    id=id_,
+                    score=-float(counts[id_]),
+                    metadata=self._metadata[id_] if include_metadata else None,
+                    embedding=self.index.get(id_).tolist() if include_embedding else None,
+                )
+                for id_ in sorted(ids, key=lambda id_: (-counts[id_], id_))[:top_k]
+            ]
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            self.index.remove(ids)
+            for id_ in ids:
+                self._metadata.pop(id_, None)
+            if self._journal is not None:
+                self._journal.append(("remove", list(ids), None))
+            self._bump_generation()
+
+    def _lexical_postings(self) -> Dict[str, List[str]]:
+        if self._postings is None or self._postings[0] != self.generation:
+            index: Dict[str, List[str]] = {}
+            for id_, meta in self._metadata.items():
+                for token in document_tokens(id_, meta):
+                    index.setdefault(token, []).append(id_)
+            self._postings = (self.generation, index)
+        return self._postings[1]
+
+    def _should_train(self) -> bool:
+        if self._journal is not None:
+            return False
+        if not self.index.trained:
+            return len(self.index) >= self.min_train_size
+        return self.auto_retrain and self.index.needs_retrain
+
+    def _start_rebuild(self) -> Tuple[List[str], np.ndarray]:
+        self._journal = []
+        return self.index.snapshot()
+
+    def _rebuild(self, ids: List[str], vectors: np.ndarray) -> None:
+        try:
+            index = self.index.rebuilt(ids, vectors)
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for op, op_ids, op_vectors in self._journal:
+                if op == "add":
+                    index.add(op_ids, op_vectors)
+                else:
+                    index.remove(op_ids)
+            index.nprobe = self.index.nprobe
+            self.index, self._journal = index, None
+
+def nprobe_sweep(
+    adapter: IVFVectorAdapter,
+    exact: VectorDBAdapter,
+    queries: Sequence[Sequence[float]],
+    top_k: int = 10,
+    nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+) -> List[dict]:
+    """Recall@k and latency of ``adapter`` against ``exact`` for each nprobe."""
+    from .evaluation import recall_report
+
+    original = adapter.index.nprobe
+    reports = []
+    try:
+        for nprobe in nprobes:
+            adapter.index.nprobe = nprobe
+            reports.append({"nprobe": nprobe, **recall_report(adapter, exact, queries, top_k=top_k)})
+    finally:
+        adapter.index.nprobe = original
+    return reports
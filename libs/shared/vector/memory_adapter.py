@@ -0,0 +1,216 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from .adapter import VectorDBAdapter
+from .filters import MetadataFilter, canonical_filter, filter_mask
+from .hybrid import document_tokens, tokenize
+from .results import SearchResult, similarity_to_distance
+from .scoring import check_metric, similarity, squared_norms, top_k as top_k_indices
+
+class InMemoryVectorAdapter(VectorDBAdapter):
+    """Exact in-process vector store.
+
+    Vectors live in one contiguous float32 matrix that grows geometrically;
+    deletes move the last row into the hole so the live rows stay packed.
+    """
+
+    def __init__(self, dim: Optional[int] = None, metric: str = "cosine", capacity: int = 1024):
+        self.metric = check_metric(metric)
+        self.dim = dim
+        self._capacity = max(capacity, 1)
+        self._vectors: Optional[np.ndarray] = None
+        self._sq_norms: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._metadata: List[dict] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Filter bitmaps for recently used filters, valid for one write generation.
+        self._masks: "OrderedDict[str, tuple]" = OrderedDict()
+        # Token -> rows inverted index for lexical_query, valid for one write generation.
+        self._postings: Optional[tuple] = None
+        if dim is not None:
+            self._allocate(dim)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._index
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        if not (len(ids) == len(vectors) == len(metadata)):
+            raise ValueError("ids, vectors and metadata must have the same length")
+        if not ids:
+            return
+        arr = self._as_matrix(vectors)
+        with self._lock:
+            if self._vectors is None:
+                self._allocate(arr.shape[1])
+            if arr.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {arr.shape[1]}")
+            live = len(self._ids)
+            rows = np.empty(len(ids), dtype=np.intp)
+            for i, id_ in enumerate(ids):
+                row = self._index.get(id_)
+                if row is None:
+                    row = len(self._ids)
+                    self._index[id_] = row
+                    self._ids.append(id_)
+                    self._metadata.append(metadata[i])
+                else:
+                    self._metadata[row] = metadata[i]
+                rows[i] = row
+            self._reserve(len(self._ids), live)
+            self._store(rows, arr)
+            self._bump_generation()
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        return self.query_batch([vector], top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)[0]
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if len(vectors) == 0:
+            return []
+        queries = self._as_matrix(vectors)
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return [[] for _ in range(len(queries))]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {queries.shape[1]}")
+            if filters:
+                # Pre-filter: only rows passing the bitmap are scored at all.
+                rows = np.flatnonzero(self._filter_mask(filters))
+                if len(rows) == 0:
+                    return [[] for _ in range(len(queries))]
+                scores = similarity(self._vectors[rows], self._sq_norms[rows], queries, self.metric)
+                local = top_k_indices(scores, top_k)
+                best = rows[local]
+            else:
+                scores = similarity(self._vectors[:size], self._sq_norms[:size], queries, self.metric)
+                best = local = top_k_indices(scores, top_k)
+            distances = similarity_to_distance(np.take_along_axis(scores, local, axis=1), self.metric)
+            return [
+                [
+                    self._result(int(r), float(d), include_metadata, include_embedding)
+                    for r, d in zip(rows, dists)
+                ]
+                for rows, dists in zip(best, distances)
+            ]
+
+    def lexical_query(
+        self,
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Rows are ranked by how many distinct query terms they contain (an OR query).
+        terms = set(tokenize(text))
+        with self._lock:
+            if not terms or not self._ids:
+                return []
+            postings = self._lexical_postings()
+            counts = np.zeros(len(self._ids), dtype=np.int32)
+            for term in terms:
+                rows = postings.get(term)
+                if rows is not None:
+                    counts[rows] += 1
+            if filters:
+                counts[~self._filter_mask(filters)] = 0
+            matched = np.flatnonzero(counts)
+            best = matched[np.argsort(-counts[matched], kind="stable")[:top_k]]
+            return [self._result(int(r), -float(counts[r]), include_metadata, include_embedding) for r in best]
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for id_ in ids:
+                row = self._index.pop(id_, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._move(last, row)
+                    self._ids[row] = moved
+                    self._metadata[row] = self._metadata[last]
+                    self._index[moved] = row
+                self._ids.pop()
+                self._metadata.pop()
+            self._bump_generation()
+
+    def _filter_mask(self, filters: MetadataFilter) -> np.ndarray:
+        key = canonical_filter(filters)
+        cached = self._masks.get(key)
+        if cached is not None and cached[0] == self.generation:
+            self._masks.move_to_end(key)
+            return cached[1]
+        mask = filter_mask(self._metadata, filters)
+        self._masks[key] = (self.generation, mask)
+        if len(self._masks) > 32:
+            self._masks.popitem(last=False)
+        return mask
+
+    def _lexical_postings(self) -> Dict[str, np.ndarray]:
+        if self._postings is None or self._postings[0] != self.generation:
+            index: Dict[str, List[int]] = {}
+            for row, (id_, meta) in enumerate(zip(self._ids, self._metadata)):
+                for token in document_tokens(id_, meta):
+                    index.setdefault(token, []).append(row)
+            self._postings = (self.generation, {token: np.array(rows, dtype=np.intp) for token, rows in index.items()})
+        return self._postings[1]
+
+    def _result(self, row: int, score: float, include_metadata: bool, include_embedding: bool) -> SearchResult:
+        return SearchResult(
+            id=self._ids[row],
+            score=score,
+            metadata=self._metadata[row] if include_metadata else None,
+            embedding=self._vectors[row].tolist() if include_embedding else None,
+        )
+
+    def _store(self, rows: np.ndarray, arr: np.ndarray) -> None:
+        self._vectors[rows] = arr
+        self._sq_norms[rows] = squared_norms(arr)
+
+    def _move(self, src: int, dst: int) -> None:
+        self._vectors[dst] = self._vectors[src]
+        self._sq_norms[dst] = self._sq_norms[src]
+
+    def _allocate(self, dim: int) -> None:
+        self.dim = dim
+        self._vectors = np.empty((self._capacity, dim), dtype=np.float32)
+        self._sq_norms = np.empty(self._capacity, dtype=np.float32)
+
+    def _reserve(self, size: int, live: int) -> None:
+        if size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        vectors[:live] = self._vectors[:live]
+        sq_norms[:live] = self._sq_norms[:live]
+        self._vectors, self._sq_norms, self._capacity = vectors, sq_norms, capacity
+
+    @staticmethod
+    def _as_matrix(vectors) -> np.ndarray:
+        arr = np.asarray(vectors, dtype=np.float32)
+        if arr.ndim != 2:
+            raise ValueError("vectors must be a 2-D array-like of shape (n, dim)")
+        return arr
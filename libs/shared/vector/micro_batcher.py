@@ -0,0 +1,135 @@
+"""
+Micro-batching for concurrent search requests.
+
+Requests that arrive within ``max_wait`` seconds of each other (or until
+``max_batch`` have queued) are answered by one ``SimilaritySearch.search_batch``
+call: one embedding call for all query texts and one batched vector query.
+Requests are grouped by filter and projection, since a batch shares those;
+differing ``top_k`` values share a batch that fetches the largest and trims.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from .filters import MetadataFilter, canonical_filter, validate_filter
+from .results import SearchResult
+from .similarity_search import SimilaritySearch
+
+
+@dataclass(frozen=True)
+class BatcherStats:
+    requests: int
+    batches: int
+    max_batch_seen: int
+
+    @property
+    def mean_batch(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+
+class _Group:
+    def __init__(self, filters: Optional[MetadataFilter], include_metadata: bool, include_embedding: bool):
+        self.filters = filters
+        self.include_metadata = include_metadata
+        self.include_embedding = include_embedding
+        self.items: List[Tuple[str, int, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SearchBatcher:
+    """Coalesces concurrent ``search`` calls on one event loop into batched searches.
+
+    ``max_concurrency`` bounds the batches running at once in worker threads;
+    further batches wait their turn rather than oversubscribing the pool.
+    """
+
+    def __init__(
+        self,
+        search: SimilaritySearch,
+        max_wait: float = 0.002,
+        max_batch: int = 64,
+        max_concurrency: int = 4,
+    ):
+        if max_wait < 0 or max_batch < 1 or max_concurrency < 1:
+            raise ValueError("max_wait must be non-negative; max_batch and max_concurrency must be positive")
+        self.search_service = search
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.max_concurrency = max_concurrency
+        self._groups: Dict[tuple, _Group] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        # The event loop only keeps weak references to tasks, so in-flight batches live here.
+        self._tasks: Set[asyncio.Task] = set()
+        self._requests = 0
+        self._batches = 0
+        self._max_seen = 0
+
+    def stats(self) -> BatcherStats:
+        return BatcherStats(self._requests, self._batches, self._max_seen)
+
+    async def close(self) -> None:
+        """Send the queued requests now and wait for every batch in flight."""
+        for key in list(self._groups):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Validate here so one malformed filter fails only its own request, not a whole batch.
+        validate_filter(filters)
+        loop = asyncio.get_running_loop()
+        key = (canonical_filter(filters), include_metadata, include_embedding)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(filters, include_metadata, include_embedding)
+            group.timer = loop.call_later(self.max_wait, self._flush, key)
+        future = loop.create_future()
+        group.items.append((query_text, top_k, future))
+        self._requests += 1
+        if len(group.items) >= self.max_batch:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: tuple) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        self._batches += 1
+        self._max_seen = max(self._max_seen, len(group.items))
+        task = asyncio.ensure_future(self._run(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: _Group) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        texts = [text for text, _, _ in group.items]
+        top_k = max(k for _, k, _ in group.items)
+        try:
+            async with self._slots:
+                # search_batch blocks (embedding + DB round trip); keep it off the event loop.
+                results = await asyncio.to_thread(
+                    self.search_service.search_batch,
+                    texts,
+                    top_k=top_k,
+                    filters=group.filters,
+                    include_metadata=group.include_metadata,
+                    include_embedding=group.include_embedding,
+                )
+        except Exception as e:
+            for _, _, future in group.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, k, future), hits in zip(group.items, results):
+            # The caller may have been cancelled (client disconnect) while the batch ran.
+            if not future.done():
+                future.set_result(list(hits[:k]))
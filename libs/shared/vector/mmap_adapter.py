@@ -0,0 +1,472 @@
+import json
+import os
+import threading
+import numpy as np
+from typing import List, Any, Dict, Optional, Tuple
+from .adapter import VectorDBAdapter
+from .filters import MetadataFilter, canonical_filter, filter_mask
+from .hybrid import document_tokens, tokenize
+from .results import SearchResult, similarity_to_distance
+from .scoring import check_metric, similarity, squared_norms, top_k as top_k_indices
+
+MANIFEST = "manifest.json"
+
+class _Segment:
+    # One append-only slab of vectors. ``vectors``/``norms`` are np.memmap views,
+    # the id/metadata sidecar is a JSONL file and tombstones are appended row numbers.
+    def __init__(self, root: str, name: str, dim: int, capacity: int, count: int, writable: bool, create: bool = False):
+        self.root = root
+        self.name = name
+        self.capacity = capacity
+        self.count = count
+        # Only the active segment is appended to; sealed and merged ones are read-only.
+        self.writable = writable or create
+        mode = "w+" if create else ("r+" if writable else "r")
+        self.vectors = np.memmap(self._path(".f32"), dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self.norms = np.memmap(self._path(".norms"), dtype=np.float32, mode=mode, shape=(capacity,))
+        self.ids: List[str] = []
+        self.metadata: List[dict] = []
+        self.live = np.zeros(capacity, dtype=bool)
+        self.filter_masks: Dict[str, np.ndarray] = {}
+        # Token -> rows for lexical_query, covering the first ``indexed`` rows.
+        self.postings: Dict[str, List[int]] = {}
+        self.indexed = 0
+        if create:
+            open(self._path(".jsonl"), "w").close()
+            open(self._path(".del"), "wb").close()
+        else:
+            self._load_sidecars()
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.root, self.name + suffix)
+
+    def _load_sidecars(self) -> None:
+        with open(self._path(".jsonl")) as f:
+            for line, _ in zip(f, range(self.count)):
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self.metadata.append(record["metadata"])
+        self.live[: self.count] = True
+        dead = np.fromfile(self._path(".del"), dtype=np.int64)
+        self.live[dead[dead < self.count]] = False
+
+    @property
+    def dead(self) -> int:
+        return self.count - int(self.live[: self.count].sum())
+
+    def append(self, ids: List[str], vectors: np.ndarray, metadata: List[dict]) -> int:
+        start = self.count
+        end = start + len(ids)
+        self.vectors[start:end] = vectors
+        self.norms[start:end] = squared_norms(vectors)
+        self.vectors.flush()
+        self.norms.flush()
+        with open(self._path(".jsonl"), "a") as f:
+            for id_, meta in zip(ids, metadata):
+                f.write(json.dumps({"id": id_, "metadata": meta}) + "\n")
+        self.ids.extend(ids)
+        self.metadata.extend(metadata)
+        self.live[start:end] = True
+        self.count = end
+        return start
+
+    def filter_mask(self, filters: MetadataFilter, count: int) -> np.ndarray:
+        # Rows are never rewritten, so a cached mask only needs extending as the segment grows.
+        key = canonical_filter(filters)
+        mask = self.filter_masks.get(key)
+        if mask is None or len(mask) < count:
+            done = 0 if mask is None else len(mask)
+            tail = filter_mask(self.metadata[done:count], filters)
+            mask = tail if mask is None else np.concatenate([mask, tail])
+            if len(self.filter_masks) >= 32:
+                self.filter_masks.clear()
+            self.filter_masks[key] = mask
+        return mask[:count]
+
+    def term_counts(self, terms: set, count: int) -> np.ndarray:
+        """Number of ``terms`` each of the first ``count`` rows contains."""
+        # Like filter masks, the postings only need extending as the segment grows.
+        for row in range(self.indexed, count):
+            for token in document_tokens(self.ids[row], self.metadata[row]):
+                self.postings.setdefault(token, []).append(row)
+        self.indexed = max(self.indexed, count)
+        counts = np.zeros(count, dtype=np.int32)
+        for term in terms:
+            rows = np.asarray(self.postings.get(term, ()), dtype=np.intp)
+            counts[rows[rows < count]] += 1
+        return counts
+
+    def tombstone(self, rows: List[int]) -> None:
+        self.live[rows] = False
+        with open(self._path(".del"), "ab") as f:
+            f.write(np.asarray(rows, dtype=np.int64).tobytes())
+
+    def seal(self) -> None:
+        # Reopen read-only so the pages can be shared from the page cache.
+        self.writable = False
+        self.vectors.flush()
+        self.norms.flush()
+        shape = self.vectors.shape
+        self.vectors = np.memmap(self._path(".f32"), dtype=np.float32, mode="r", shape=shape)
+        self.norms = np.memmap(self._path(".norms"), dtype=np.float32, mode="r", shape=(shape[0],))
+
+    def remove_files(self) -> None:
+        for suffix in (".f32", ".norms", ".jsonl", ".del"):
+            try:
+                os.remove(self._path(suffix))
+            except FileNotFoundError:
+                pass
+
+class MmapVectorAdapter(VectorDBAdapter):
+    """Persistent local vector store built from append-only memory-mapped segments.
+
+    Queries scan each segment in blocks straight from the mapping, so the corpus
+    never has to fit in RAM and several processes opening the same directory
+    read-only share one copy through the page cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dim: Optional[int] = None,
+        metric: str = "cosine",
+        segment_rows: int = 65536,
+        scan_rows: int = 16384,
+        read_only: bool = False,
+    ):
+        self.path = path
+        self.read_only = read_only
+        self.scan_rows = scan_rows
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._stop_compaction = threading.Event()
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            self._load()
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"Store at {path} has dimension {self.dim}, not {dim}")
+        else:
+            if read_only:
+                raise FileNotFoundError(f"No vector store manifest in {path}")
+            if dim is None:
+                raise ValueError("dim is required when creating a new store")
+            os.makedirs(path, exist_ok=True)
+            self.dim = dim
+            self.metric = check_metric(metric)
+            self.segment_rows = segment_rows
+            self._next_segment = 1
+            self._segments: List[_Segment] = []
+            self._locations: Dict[str, Tuple[_Segment, int]] = {}
+            self._write_manifest()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._locations
+
+    def refresh(self) -> None:
+        # Pick up a snapshot published by another process.
+        with self._lock:
+            self._load()
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        self._check_writable()
+        if not (len(ids) == len(vectors) == len(metadata)):
+            raise ValueError("ids, vectors and metadata must have the same length")
+        if not ids:
+            return
+        arr = np.asarray(vectors, dtype=np.float32)
+        if arr.ndim != 2 or arr.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim})")
+        # Keep the last occurrence of an id repeated within one call.
+        last = {id_: i for i, id_ in enumerate(ids)}
+        keep = sorted(last.values())
+        ids = [ids[i] for i in keep]
+        metadata = [metadata[i] for i in keep]
+        arr = arr[keep]
+        with self._lock:
+            # Old versions are retired only once their replacements are written,
+            # so a failed append never leaves an id without a live row.
+            replaced: List[Tuple[_Segment, int]] = []
+            try:
+                offset = 0
+                while offset < len(ids):
+                    segment = self._active_segment()
+                    take = min(segment.capacity - segment.count, len(ids) - offset)
+                    chunk = ids[offset:offset + take]
+                    start = segment.append(chunk, arr[offset:offset + take], metadata[offset:offset + take])
+                    for row, id_ in enumerate(chunk, start):
+                        previous = self._locations.get(id_)
+                        if previous is not None:
+                            replaced.append(previous)
+                        self._locations[id_] = (segment, row)
+                    offset += take
+            finally:
+                self._tombstone_rows(replaced)
+                self._write_manifest()
+                self._bump_generation()
+
+    def delete(self, ids: List[str]) -> None:
+        self._check_writable()
+        with self._lock:
+            self._tombstone(ids)
+            self._bump_generation()
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        return self.query_batch([vector], top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)[0]
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if len(vectors) == 0:
+            return []
+        queries = np.asarray(vectors, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim})")
+        with self._lock:
+            snapshot = [(segment, segment.count) for segment in self._segments]
+        n_queries = len(queries)
+        best_scores = np.empty((n_queries, 0), dtype=np.float32)
+        best_seg = np.empty((n_queries, 0), dtype=np.intp)
+        best_row = np.empty((n_queries, 0), dtype=np.intp)
+        for seg_pos, (segment, count) in enumerate(snapshot):
+            allowed = segment.filter_mask(filters, count) if filters else None
+            for start in range(0, count, self.scan_rows):
+                end = min(start + self.scan_rows, count)
+                live = segment.live[start:end]
+                if allowed is not None:
+                    live = live & allowed[start:end]
+                if not live.any():
+                    continue
+                scores = similarity(segment.vectors[start:end], segment.norms[start:end], queries, self.metric)
+                scores[:, ~live] = -np.inf
+                local = top_k_indices(scores, top_k)
+                best_scores = np.concatenate([best_scores, np.take_along_axis(scores, local, axis=1)], axis=1)
+                best_seg = np.concatenate([best_seg, np.full(local.shape, seg_pos, dtype=np.intp)], axis=1)
+                best_row = np.concatenate([best_row, local + start], axis=1)
+                keep = top_k_indices(best_scores, top_k)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_seg = np.take_along_axis(best_seg, keep, axis=1)
+                best_row = np.take_along_axis(best_row, keep, axis=1)
+        distances = similarity_to_distance(best_scores, self.metric)
+        results = []
+        for q in range(n_queries):
+            hits = []
+            for score, distance, seg_pos, row in zip(best_scores[q], distances[q], best_seg[q], best_row[q]):
+                if score == -np.inf:
+                    continue
+                segment = snapshot[seg_pos][0]
+                hits.append(SearchResult(
+                    id=segment.ids[row],
+                    score=float(distance),
+                    metadata=segment.metadata[row] if include_metadata else None,
+                    embedding=segment.vectors[row].tolist() if include_embedding else None,
+                ))
+            results.append(hits)
+        return results
+
+    def lexical_query(
+        self,
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Rows are ranked by how many distinct query terms they contain (an OR query).
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+        hits: List[Tuple[int, _Segment, int]] = []
+        with self._lock:
+            for segment in self._segments:
+                count = segment.count
+                counts = segment.term_counts(terms, count)
+                counts[~segment.live[:count]] = 0
+                if filters:
+                    counts[~segment.filter_mask(filters, count)] = 0
+                hits.extend((int(counts[row]), segment, int(row)) for row in np.flatnonzero(counts))
+            hits.sort(key=lambda hit: -hit[0])
+            return [
+                SearchResult(
+                    id=segment.ids[row],
+                    score=-float(matched),
+                    metadata=segment.metadata[row] if include_metadata else None,
+                    embedding=segment.vectors[row].tolist() if include_embedding else None,
+                )
+                for matched, segment, row in hits[:top_k]
+            ]
+
+    def compact(self, min_dead_ratio: float = 0.2) -> int:
+        """Merge sealed segments that have tombstones into fresh segments.
+
+        Returns the number of dead rows reclaimed.
+        """
+        self._check_writable()
+        with self._lock:
+            active = self._segments[-1] if self._segments and self._is_active(self._segments[-1]) else None
+            victims = [
+                s for s in self._segments
+                if s is not active and s.count and s.dead / s.count >= min_dead_ratio
+            ]
+            if not victims:
+                return 0
+            names = self._reserve_names(victims)
+        # Copy live rows without holding the lock; sealed segments are immutable
+        # apart from their live masks, which are re-checked before the swap.
+        sources = []
+        for segment in victims:
+            rows = np.flatnonzero(segment.live[: segment.count])
+            sources.extend((segment, int(r)) for r in rows)
+        merged: List[_Segment] = []
+        for name, offset in zip(names, range(0, max(len(sources), 1), self.segment_rows)):
+            part = sources[offset:offset + self.segment_rows]
+            segment = _Segment(self.path, name, self.dim, self.segment_rows, 0, writable=True, create=True)
+            if part:
+                vectors = np.stack([src.vectors[row] for src, row in part])
+                segment.append([src.ids[row] for src, row in part], vectors, [src.metadata[row] for src, row in part])
+            segment.seal()
+            merged.append((segment, part))
+        with self._lock:
+            new_segments = []
+            for segment, part in merged:
+                stale = []
+                for row, (src, src_row) in enumerate(part):
+                    id_ = src.ids[src_row]
+                    if src.live[src_row] and self._locations.get(id_) == (src, src_row):
+                        self._locations[id_] = (segment, row)
+                    else:
+                        stale.append(row)
+                if stale:
+                    segment.tombstone(stale)
+                if segment.count:
+                    new_segments.append(segment)
+                else:
+                    segment.remove_files()
+            reclaimed = sum(s.dead for s in victims)
+            position = self._segments.index(victims[0])
+            remaining = [s for s in self._segments if s not in victims]
+            self._segments = remaining[:position] + new_segments + remaining[position:]
+            self._write_manifest()
+        for segment in victims:
+            segment.remove_files()
+        return reclaimed
+
+    def start_compaction(self, interval: float = 60.0, min_dead_ratio: float = 0.2) -> None:
+        self._check_writable()
+        if self._compaction_thread is not None:
+            return
+        self._stop_compaction.clear()
+
+        def run():
+            while not self._stop_compaction.wait(interval):
+                self.compact(min_dead_ratio=min_dead_ratio)
+
+        self._compaction_thread = threading.Thread(target=run, name="vector-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def close(self) -> None:
+        if self._compaction_thread is not None:
+            self._stop_compaction.set()
+            self._compaction_thread.join()
+            self._compaction_thread = None
+        with self._lock:
+            if not self.read_only:
+                for segment in self._segments:
+                    segment.vectors.flush()
+                    segment.norms.flush()
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Vector store at {self.path} is opened read-only")
+
+    def _tombstone(self, ids: List[str]) -> None:
+        locations = (self._locations.pop(id_, None) for id_ in ids)
+        self._tombstone_rows([location for location in locations if location is not None])
+
+    def _tombstone_rows(self, locations: List[Tuple[_Segment, int]]) -> None:
+        by_segment: Dict[int, Tuple[_Segment, List[int]]] = {}
+        for segment, row in locations:
+            by_segment.setdefault(id(segment), (segment, []))[1].append(row)
+        for segment, rows in by_segment.values():
+            segment.tombstone(rows)
+
+    def _active_segment(self) -> _Segment:
+        last = self._segments[-1] if self._segments else None
+        if last is not None and self._is_active(last):
+            return last
+        # A full segment is sealed here; a merged one from compact() is sealed
+        # already and may be partially filled, but is never appended to.
+        if last is not None and last.writable:
+            last.seal()
+        name = self._reserve_names([None])[0]
+        segment = _Segment(self.path, name, self.dim, self.segment_rows, 0, writable=True, create=True)
+        self._segments.append(segment)
+        return segment
+
+    @staticmethod
+    def _is_active(segment: _Segment) -> bool:
+        return segment.writable and segment.count < segment.capacity
+
+    def _reserve_names(self, items: List[Any]) -> List[str]:
+        names = []
+        for _ in items:
+            names.append(f"seg-{self._next_segment:06d}")
+            self._next_segment += 1
+        return names
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "dim": self.dim,
+            "metric": self.metric,
+            "segment_rows": self.segment_rows,
+            "next_segment": self._next_segment,
+            "segments": [
+                {"name": s.name, "capacity": s.capacity, "count": s.count, "sealed": not s.writable}
+                for s in self._segments
+            ],
+        }
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def _load(self) -> None:
+        with open(os.path.join(self.path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.dim = manifest["dim"]
+        self.metric = check_metric(manifest["metric"])
+        self.segment_rows = manifest["segment_rows"]
+        self._next_segment = manifest["next_segment"]
+        entries = manifest["segments"]
+        self._segments = []
+        for i, entry in enumerate(entries):
+            # Only the last, partially filled segment is ever appended to, and
+            # never one that was sealed, like the output of compact().
+            writable = (
+                not self.read_only
+                and i == len(entries) - 1
+                and entry["count"] < entry["capacity"]
+                and not entry.get("sealed", False)
+            )
+            self._segments.append(
+                _Segment(self.path, entry["name"], self.dim, entry["capacity"], entry["count"], writable=writable)
+            )
+        self._locations = {}
+        for segment in self._segments:
+            for row in np.flatnonzero(segment.live[: segment.count]):
+                self._locations[segment.ids[row]] = (segment, int(row))
@@ -1,14 +1,107 @@
+import io
+import json
+import logging
+import threading
+import time
 import psycopg2
-from typing import List, Any
+from dataclasses import dataclass
+from typing import List, Any, Iterator, Optional
 from .adapter import VectorDBAdapter
+from .binary_codec import copy_binary, read_copy_binary
+from .filters import MetadataFilter, compile_filter
+from .hybrid import RRF_K, TS_CONFIG, candidate_count, check_weights, or_tsquery, reciprocal_rank_fusion
+from .index_manager import SEARCH_PROFILES, IndexManager
+from .pool import ConnectionPool, PoolStats
+from .quantization import PG_QUANTIZATIONS, pg_candidate_order
+from .results import SearchResult, projection_columns, result_from_row
+
+logger = logging.getLogger(__name__)
+
+WIRE_FORMATS = ("text", "binary")
+_STAGING_TYPES = ("int8", "text", "vector", "jsonb")
+
+@dataclass(frozen=True)
+class BulkUpsertStats:
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
 
 class PgVectorAdapter(VectorDBAdapter):
-    def __init__(self, conn_str: str):
+    def __init__(
+        self,
+        conn_str: str,
+        pool: Optional[ConnectionPool] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        bulk_batch_size: int = 5000,
+        wire_format: str = "text",
+        quantization: str = "none",
+        rerank: int = 4,
+        dim: int = 1536,
+        search_profile: Optional[str] = None,
+        auto_index: bool = False,
+        index_manager: Optional[IndexManager] = None,
+    ):
+        if search_profile is not None and search_profile not in SEARCH_PROFILES:
+            raise ValueError(f"Unknown search_profile {search_profile!r}; expected one of {', '.join(SEARCH_PROFILES)}")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire_format {wire_format!r}; expected one of {', '.join(WIRE_FORMATS)}")
+        if quantization not in PG_QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {', '.join(PG_QUANTIZATIONS)}")
         self.conn_str = conn_str
+        self.bulk_batch_size = bulk_batch_size
+        # "binary" moves embeddings as packed float32 through COPY (FORMAT binary);
+        # psycopg2 itself can only bind text parameters.
+        self.wire_format = wire_format
+        # Quantized modes pick rerank * top_k candidates from a halfvec/bit
+        # expression index, then order them by full-precision distance.
+        self.quantization = quantization
+        self.rerank = rerank
+        self.dim = dim
+        # Recall/latency profile applied as ivfflat.probes / hnsw.ef_search on each query;
+        # None leaves the server settings alone.
+        self.search_profile = search_profile
+        # Rebuild the ANN index after bulk loads when it is missing or stale.
+        self.auto_index = auto_index
+        self._index_manager = index_manager
+        self._pool = pool
+        self._pool_options = dict(min_size=min_size, max_size=max_size, max_idle=max_idle, timeout=timeout)
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Created on first use so constructing the adapter never touches the network
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(lambda: psycopg2.connect(self.conn_str), **self._pool_options)
+        return self._pool
+
+    @property
+    def index_manager(self) -> IndexManager:
+        if self._index_manager is None:
+            self._index_manager = IndexManager(self.pool)
+        return self._index_manager
+
+    def pool_stats(self) -> PoolStats:
+        return self.pool.stats()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
 
     def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        if self.wire_format == "binary":
+            self.bulk_upsert(ids, vectors, metadata)
+            return
         # Example: Upsert vectors into a pgvector table
-        with psycopg2.connect(self.conn_str) as conn:
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
                 for i, vec in enumerate(vectors):
                     cur.execute("""
@@ -17,21 +110,332 @@ class PgVectorAdapter(VectorDBAdapter):
                         ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata
                     """, (ids[i], vec, metadata[i]))
             conn.commit()
+        self._bump_generation()
 
-    def query(self, vector: List[float], top_k: int = 5) -> List[Any]:
-        # Example: Query most similar vectors using pgvector
-        with psycopg2.connect(self.conn_str) as conn:
+    def bulk_upsert(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        metadata: List[dict],
+        batch_size: Optional[int] = None,
+    ) -> BulkUpsertStats:
+        # COPY each chunk into a session-local staging table, then merge it with one
+        # INSERT ... SELECT instead of one statement per row.
+        batch_size = batch_size or self.bulk_batch_size
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        start = time.perf_counter()
+        batches = 0
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    SELECT id, embedding, metadata
+                    CREATE TEMP TABLE IF NOT EXISTS vectors_staging (
+                        seq BIGINT, id TEXT, embedding vector, metadata JSONB
+                    ) ON COMMIT DELETE ROWS
+                """)
+                conn.commit()
+                for offset in range(0, len(ids), batch_size):
+                    end = offset + batch_size
+                    if self.wire_format == "binary":
+                        rows = copy_binary(
+                            zip(range(end - offset), ids[offset:end], vectors[offset:end], metadata[offset:end]),
+                            _STAGING_TYPES,
+                        )
+                        cur.copy_expert(
+                            "COPY vectors_staging (seq, id, embedding, metadata) FROM STDIN WITH (FORMAT binary)",
+                            _CopyStream(rows, empty=b""),
+                        )
+                    else:
+                        rows = _copy_rows(ids[offset:end], vectors[offset:end], metadata[offset:end])
+                        cur.copy_expert(
+                            "COPY vectors_staging (seq, id, embedding, metadata) FROM STDIN",
+                            _CopyStream(rows),
+                        )
+                    # DISTINCT ON keeps the last occurrence of an id repeated within a chunk;
+                    # ON CONFLICT cannot touch the same row twice in one statement.
+                    cur.execute("""
+                        INSERT INTO vectors (id, embedding, metadata)
+                        SELECT DISTINCT ON (id) id, embedding, metadata
+                        FROM vectors_staging
+                        ORDER BY id, seq DESC
+                        ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata
+                    """)
+                    conn.commit()
+                    batches += 1
+        self._bump_generation()
+        if self.auto_index:
+            self.index_manager.ensure()
+        stats = BulkUpsertStats(rows=len(ids), batches=batches, seconds=time.perf_counter() - start)
+        logger.info("bulk_upsert: %d rows in %d batches, %.0f rows/sec", stats.rows, stats.batches, stats.rows_per_sec)
+        return stats
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Only the requested columns cross the wire; embeddings are opt-in because
+        # their text form dwarfs the rest of the row.
+        where, params = _where(filters)
+        columns = projection_columns(include_metadata, include_embedding)
+        literal = _vector_literal(vector)
+        if self.quantization == "none":
+            sql = f"""
+                SELECT id, embedding <-> %s::vector AS distance{columns}
+                FROM vectors
+                {where}
+                ORDER BY distance
+                LIMIT %s
+            """
+            args = (literal, *params, top_k)
+        else:
+            sql = f"""
+                SELECT id, distance{columns}
+                FROM (
+                    SELECT id, embedding <-> %s::vector AS distance{columns}
+                    FROM vectors
+                    {where}
+                    ORDER BY {pg_candidate_order(self.quantization, self.dim, "%s::vector")}
+                    LIMIT %s
+                ) candidates
+                ORDER BY distance
+                LIMIT %s
+            """
+            args = (literal, *params, literal, top_k * self.rerank, top_k)
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_profile(cur, self._candidate_limit(top_k))
+                rows = self._fetch(cur, sql, args, include_metadata, include_embedding)
+        return [result_from_row(row, include_metadata, include_embedding) for row in rows]
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        # One statement for the whole batch: each unnested query vector drives its
+        # own index-ordered LIMIT through the LATERAL join.
+        if not vectors:
+            return []
+        where, params = _where(filters)
+        columns = projection_columns(include_metadata, include_embedding)
+        nearest = f"""
+                SELECT id, embedding <-> q.embedding AS distance{columns}
+                FROM vectors
+                {where}
+                ORDER BY embedding <-> q.embedding
+                LIMIT %s
+        """
+        limits: tuple = (top_k,)
+        if self.quantization != "none":
+            nearest = f"""
+                SELECT id, distance{columns}
+                FROM (
+                    SELECT id, embedding <-> q.embedding AS distance{columns}
+                    FROM vectors
+                    {where}
+                    ORDER BY {pg_candidate_order(self.quantization, self.dim, "q.embedding")}
+                    LIMIT %s
+                ) candidates
+                ORDER BY distance
+                LIMIT %s
+            """
+            limits = (top_k * self.rerank, top_k)
+        sql = f"""
+            SELECT q.ord, v.id, v.distance{projection_columns(include_metadata, include_embedding, "v.")}
+            FROM unnest(%s::vector[]) WITH ORDINALITY AS q(embedding, ord)
+            CROSS JOIN LATERAL ({nearest}) v
+            ORDER BY q.ord, v.distance
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_profile(cur, self._candidate_limit(top_k))
+                rows = self._fetch(
+                    cur,
+                    sql,
+                    ([_vector_literal(v) for v in vectors], *params, *limits),
+                    include_metadata,
+                    include_embedding,
+                    leading=("int8",),
+                )
+        results: List[List[SearchResult]] = [[] for _ in vectors]
+        for ord_, *row in rows:
+            results[ord_ - 1].append(result_from_row(row, include_metadata, include_embedding))
+        return results
+
+    def lexical_query(
+        self,
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        # Matches the generated search_tsv column (migration 005) through its GIN index.
+        tsquery = or_tsquery(text)
+        if not tsquery:
+            return []
+        predicate, params = compile_filter(filters)
+        sql = f"""
+            SELECT id, -ts_rank_cd(search_tsv, query)::float8 AS distance{projection_columns(include_metadata, include_embedding)}
+            FROM vectors, to_tsquery('{TS_CONFIG}', %s) query
+            WHERE search_tsv @@ query {f"AND {predicate}" if predicate else ""}
+            ORDER BY distance, id
+            LIMIT %s
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                rows = self._fetch(cur, sql, (tsquery, *params, top_k), include_metadata, include_embedding)
+        return [result_from_row(row, include_metadata, include_embedding) for row in rows]
+
+    def hybrid_query(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = RRF_K,
+        candidates: Optional[int] = None,
+    ) -> List[SearchResult]:
+        # Both candidate lists and the fusion run in one statement; each side keeps
+        # its own index (HNSW/IVFFlat for the vector, GIN for search_tsv).
+        check_weights(vector_weight, text_weight)
+        tsquery = or_tsquery(text)
+        projection = dict(filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        if not tsquery:
+            hits = self.query(vector, top_k=top_k, **projection)
+            return reciprocal_rank_fusion([hits], (vector_weight,), top_k, rrf_k)
+        predicate, params = compile_filter(filters)
+        limit = candidate_count(top_k, candidates)
+        sql = f"""
+            WITH semantic AS (
+                SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT id, embedding <-> %s::vector AS distance
                     FROM vectors
-                    ORDER BY embedding <-> %s
+                    {f"WHERE {predicate}" if predicate else ""}
+                    ORDER BY distance
                     LIMIT %s
-                """, (vector, top_k))
-                return cur.fetchall()
+                ) nearest
+            ),
+            lexical AS (
+                SELECT id, row_number() OVER (ORDER BY text_rank DESC, id) AS rank
+                FROM (
+                    SELECT id, ts_rank_cd(search_tsv, query) AS text_rank
+                    FROM vectors, to_tsquery('{TS_CONFIG}', %s) query
+                    WHERE search_tsv @@ query {f"AND {predicate}" if predicate else ""}
+                    ORDER BY text_rank DESC, id
+                    LIMIT %s
+                ) matches
+            ),
+            fused AS (
+                SELECT coalesce(s.id, l.id) AS id, s.rank AS vector_rank, l.rank AS text_rank,
+                       coalesce(%s::float8 / (%s + s.rank), 0) + coalesce(%s::float8 / (%s + l.rank), 0) AS rrf
+                FROM semantic s
+                FULL OUTER JOIN lexical l ON l.id = s.id
+            )
+            SELECT v.id, -f.rrf AS distance{projection_columns(include_metadata, include_embedding, "v.")}
+            FROM fused f
+            JOIN vectors v ON v.id = f.id
+            ORDER BY f.rrf DESC, f.vector_rank NULLS LAST, f.text_rank
+            LIMIT %s
+        """
+        args = (
+            _vector_literal(vector), *params, limit,
+            tsquery, *params, limit,
+            vector_weight, rrf_k, text_weight, rrf_k,
+            top_k,
+        )
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_profile(cur, limit)
+                rows = self._fetch(cur, sql, args, include_metadata, include_embedding)
+        return [result_from_row(row, include_metadata, include_embedding) for row in rows]
 
     def delete(self, ids: List[str]) -> None:
-        with psycopg2.connect(self.conn_str) as conn:
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
                 cur.executemany("DELETE FROM vectors WHERE id = %s", [(i,) for i in ids])
             conn.commit()
+        self._bump_generation()
+
+    def _candidate_limit(self, top_k: int) -> int:
+        return top_k if self.quantization == "none" else top_k * self.rerank
+
+    def _apply_search_profile(self, cur, limit: int) -> None:
+        # set_config(..., true) is SET LOCAL: it ends with the query's transaction,
+        # so pooled connections never carry it over to other callers.
+        if self.search_profile is None:
+            return
+        settings = self.index_manager.search_settings(self.search_profile, limit, cur)
+        calls = ", ".join("set_config(%s, %s, true)" for _ in settings)
+        cur.execute(f"SELECT {calls}", tuple(value for item in settings.items() for value in item))
+
+    def _fetch(
+        self,
+        cur,
+        sql: str,
+        params: tuple,
+        include_metadata: bool,
+        include_embedding: bool,
+        leading: tuple = (),
+    ) -> List[tuple]:
+        if self.wire_format == "binary" and include_embedding:
+            # Result embeddings come back as packed float32 instead of text.
+            types = leading + ("text", "float8") + (("jsonb",) if include_metadata else ()) + ("vector",)
+            return _copy_out(cur, sql, params, types)
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+def _copy_out(cur, sql: str, params: tuple, types: tuple) -> List[tuple]:
+    # COPY cannot take bind parameters, so the statement is rendered client-side first.
+    query = cur.mogrify(sql, params)
+    if isinstance(query, bytes):
+        query = query.decode()
+    buffer = io.BytesIO()
+    cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+    return read_copy_binary(buffer.getvalue(), types)
+
+def _where(filters: Optional[MetadataFilter]):
+    predicate, params = compile_filter(filters)
+    return (f"WHERE {predicate}" if predicate else ""), params
+
+def _vector_literal(vec: List[float]) -> str:
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
+
+def _copy_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _copy_rows(ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> Iterator[str]:
+    for seq, (id_, vec, meta) in enumerate(zip(ids, vectors, metadata)):
+        embedding = _vector_literal(vec)
+        meta_text = r"\N" if meta is None else _copy_escape(json.dumps(meta))
+        yield f"{seq}\t{_copy_escape(str(id_))}\t{embedding}\t{meta_text}\n"
+
+class _CopyStream:
+    # File-like view over a row generator so COPY streams without buffering the chunk.
+    def __init__(self, rows: Iterator, empty=""):
+        # empty is "" for text COPY and b"" for binary COPY
+        self._rows = rows
+        self._buffer = empty
+
+    def read(self, size: int = -1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += row
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,223 @@
+"""
+Thread-safe connection pool for the pgvector adapter.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Iterator, Optional, Tuple
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class PoolClosed(Exception):
+    """Raised when a connection is requested from a closed pool."""
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Point-in-time snapshot of pool usage, for sizing min/max."""
+
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    checkouts: int
+    timeouts: int
+    discarded: int
+    avg_checkout_ms: float
+    max_checkout_ms: float
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections.
+
+    Connections are created lazily up to ``max_size`` and kept warm down to
+    ``min_size``. Idle connections older than ``max_idle`` seconds are closed,
+    and every checkout is health-checked before it is handed out.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        health_check: Optional[Callable[[Any], bool]] = None,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._health_check = health_check or _ping
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_total = 0.0
+        self._checkout_max = 0.0
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self.getconn()
+        try:
+            yield conn
+        except BaseException:
+            self.putconn(conn, rollback=True)
+            raise
+        else:
+            self.putconn(conn)
+
+    def getconn(self) -> Any:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Connection pool is closed")
+                    self._evict_idle()
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No connection available after {self.timeout}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        # Connecting and pinging happen outside the lock so a slow backend
+        # does not serialise every other checkout behind it.
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._discarded += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = (time.monotonic() - start) * 1000
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_total += elapsed
+            self._checkout_max = max(self._checkout_max, elapsed)
+        return conn
+
+    def putconn(self, conn: Any, rollback: bool = False) -> None:
+        broken = bool(getattr(conn, "closed", False))
+        if not broken:
+            try:
+                if rollback or _in_transaction(conn):
+                    conn.rollback()
+            except Exception:
+                broken = True
+        with self._cond:
+            if self._closed or broken:
+                self._size -= 1
+                if broken:
+                    self._discarded += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            idle = len(self._idle)
+            return PoolStats(
+                size=self._size,
+                idle=idle,
+                in_use=self._size - idle,
+                waiting=self._waiting,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                discarded=self._discarded,
+                avg_checkout_ms=self._checkout_total / self._checkouts if self._checkouts else 0.0,
+                max_checkout_ms=self._checkout_max,
+            )
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _evict_idle(self) -> None:
+        # Oldest connections sit at the left; stop at the first fresh one.
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn: Any) -> bool:
+        if getattr(conn, "closed", False):
+            return False
+        try:
+            return bool(self._health_check(conn))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _ping(conn: Any) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+        cur.fetchone()
+    conn.rollback()
+    return True
+
+
+def _in_transaction(conn: Any) -> bool:
+    # psycopg2 exposes the libpq transaction status; anything other than IDLE
+    # means the caller left work uncommitted and it must not leak to the next user.
+    status = getattr(conn, "get_transaction_status", None)
+    if status is None:
+        return False
+    return status() != 0
@@ -0,0 +1,298 @@
+"""
+Quantized vector storage for the in-process adapters.
+
+A quantizer turns float32 vectors into compact codes that are scanned to pick
+candidates; the candidates are then reranked against the full-precision
+vectors, so reported scores are exact:
+
+- ``float16``: half precision, 2x smaller (the local analogue of ``halfvec``).
+- ``int8``: per-dimension scalar quantization, 4x smaller.
+- ``binary``: one sign bit per dimension scanned by Hamming distance, 32x smaller.
+"""
+import os
+import tempfile
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+from .filters import MetadataFilter
+from .memory_adapter import InMemoryVectorAdapter
+from .results import SearchResult, similarity_to_distance
+from .scoring import from_dots, similarity, top_k as top_k_indices
+
+QUANTIZATIONS = ("float16", "int8", "binary")
+# pgvector has no int8 type; halfvec and bit cover the other two modes.
+PG_QUANTIZATIONS = ("none", "halfvec", "binary")
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Quantizer(ABC):
+    dtype: np.dtype
+    # Whether encode() depends on statistics gathered by fit().
+    trainable = False
+
+    def fit(self, vectors: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def code_width(self, dim: int) -> int:
+        pass
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def scores(self, codes: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+        """Approximate (q, n) similarities of ``queries`` to ``codes``, higher is closer.
+
+        ``sq_norms`` are the exact squared norms of the encoded rows.
+        """
+        pass
+
+
+class Float16Quantizer(Quantizer):
+    dtype = np.dtype(np.float16)
+
+    def code_width(self, dim: int) -> int:
+        return dim
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.astype(np.float16)
+
+    def scores(self, codes: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+        dots = _blockwise(codes, lambda block: queries @ block.astype(np.float32).T)
+        return from_dots(dots, sq_norms, queries, metric)
+
+
+class Int8Quantizer(Quantizer):
+    """Maps each dimension's observed [min, max] onto the 256 int8 levels."""
+
+    dtype = np.dtype(np.int8)
+    trainable = True
+
+    def __init__(self):
+        self.offset: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    def fit(self, vectors: np.ndarray) -> None:
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        self.scale = np.maximum(high - low, 1e-12).astype(np.float32) / 255
+        self.offset = low.astype(np.float32)
+
+    def code_width(self, dim: int) -> int:
+        return dim
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.scale is None:
+            self.fit(vectors)
+        levels = np.rint((vectors - self.offset) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return (codes.astype(np.float32) + 128) * self.scale + self.offset
+
+    def scores(self, codes: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+        # q . decode(c) = (q * scale) . c + q . (offset + 128 * scale): the scale folds
+        # into the query, so the codes are only cast, never decoded.
+        scaled = queries * self.scale
+        bias = queries @ (self.offset + 128 * self.scale)
+        dots = _blockwise(codes, lambda block: scaled @ block.astype(np.float32).T) + bias[:, None]
+        return from_dots(dots, sq_norms, queries, metric)
+
+
+class BinaryQuantizer(Quantizer):
+    """Sign bits packed eight to a byte; candidates are ranked by Hamming distance."""
+
+    dtype = np.dtype(np.uint8)
+
+    def code_width(self, dim: int) -> int:
+        return (dim + 7) // 8
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=1)
+
+    def scores(self, codes: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+        packed = self.encode(queries)
+        return _blockwise(codes, lambda block: -np.stack([_popcount(block ^ q) for q in packed]))
+
+
+def make_quantizer(name: str) -> Quantizer:
+    if name == "float16":
+        return Float16Quantizer()
+    if name == "int8":
+        return Int8Quantizer()
+    if name == "binary":
+        return BinaryQuantizer()
+    raise ValueError(f"Unknown quantization {name!r}; expected one of {', '.join(QUANTIZATIONS)}")
+
+
+def pg_candidate_order(quantization: str, dim: int, query: str) -> str:
+    """ORDER BY expression that ranks candidates on quantized pgvector values.
+
+    Matches the expression indexes in ``libs/shared/vector/quantized_indexes.sql``.
+    """
+    if quantization == "halfvec":
+        return f"embedding::halfvec({dim}) <-> ({query})::halfvec({dim})"
+    if quantization == "binary":
+        return f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize({query})"
+    raise ValueError(f"Unknown quantization {quantization!r}; expected one of {', '.join(PG_QUANTIZATIONS)}")
+
+
+class QuantizedVectorAdapter(InMemoryVectorAdapter):
+    """In-process store that scans quantized codes and reranks with full precision.
+
+    Each query scores ``rerank * top_k`` candidates exactly. The full-precision
+    rows live in a memory-mapped scratch file (``path``, or an anonymous
+    temporary file by default), so only the codes stay resident and reranking
+    touches just the candidate rows.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        metric: str = "cosine",
+        quantization: str = "int8",
+        rerank: int = 4,
+        capacity: int = 1024,
+        path: Optional[str] = None,
+        fit_sample: int = 65536,
+    ):
+        if rerank < 1:
+            raise ValueError("rerank must be at least 1")
+        self.quantization = quantization
+        self.quantizer = make_quantizer(quantization)
+        self.rerank = rerank
+        self.path = path
+        self.fit_sample = fit_sample
+        self._codes: Optional[np.ndarray] = None
+        self._fitted_rows = 0
+        # Scratch storage: the store itself is not reopened from this file.
+        self._scratch = open(path, "w+b") if path is not None else tempfile.TemporaryFile()
+        super().__init__(dim=dim, metric=metric, capacity=capacity)
+
+    def requantize(self) -> None:
+        """Refit the quantizer on the live vectors and re-encode every row."""
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return
+            sample = self._vectors[:size]
+            if size > self.fit_sample:
+                rows = np.sort(np.random.default_rng(0).choice(size, self.fit_sample, replace=False))
+                sample = sample[rows]
+            self.quantizer.fit(np.asarray(sample))
+            for start in range(0, size, 65536):
+                end = min(start + 65536, size)
+                self._codes[start:end] = self.quantizer.encode(np.asarray(self._vectors[start:end]))
+            self._fitted_rows = size
+
+    def memory_bytes(self) -> dict:
+        """Size of the stored codes and full-precision rows, and the bytes resident in RAM."""
+        size = len(self._ids)
+        width = self._codes.shape[1] * self._codes.itemsize if self._codes is not None else 0
+        codes, full = size * width, size * (self.dim or 0) * 4
+        arrays = (self._codes, self._sq_norms, self._vectors)
+        resident = sum(a.nbytes for a in arrays if a is not None and not isinstance(a, np.memmap))
+        return {"codes": codes, "full_precision": full, "resident": resident, "compression": full / codes if codes else 0.0}
+
+    def close(self) -> None:
+        """Release the scratch file; the store is unusable afterwards."""
+        with self._lock:
+            self._vectors = None
+            self._scratch.close()
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if len(vectors) == 0:
+            return []
+        queries = self._as_matrix(vectors)
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return [[] for _ in range(len(queries))]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {queries.shape[1]}")
+            rows = np.flatnonzero(self._filter_mask(filters)) if filters else None
+            if rows is not None and len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+            if rows is None:
+                codes, sq_norms = self._codes[:size], self._sq_norms[:size]
+            else:
+                codes, sq_norms = self._codes[rows], self._sq_norms[rows]
+            approx = self.quantizer.scores(codes, sq_norms, queries, self.metric)
+            candidates = top_k_indices(approx, top_k * self.rerank)
+            if rows is not None:
+                candidates = rows[candidates]
+            results = []
+            for query, cand in zip(queries, candidates):
+                cand = np.sort(cand)  # sequential reads from a memory-mapped matrix
+                exact = similarity(np.asarray(self._vectors[cand]), self._sq_norms[cand], query[None, :], self.metric)
+                order = top_k_indices(exact, top_k)[0]
+                distances = similarity_to_distance(exact[0, order], self.metric)
+                results.append([
+                    self._result(int(cand[i]), float(d), include_metadata, include_embedding)
+                    for i, d in zip(order, distances)
+                ])
+            return results
+
+    def _store(self, rows: np.ndarray, arr: np.ndarray) -> None:
+        super()._store(rows, arr)
+        # Scalar ranges are refit whenever the store doubles, so early batches
+        # do not pin the quantization grid forever.
+        if self.quantizer.trainable and len(self._ids) >= 2 * self._fitted_rows:
+            self.requantize()
+        else:
+            self._codes[rows] = self.quantizer.encode(arr)
+
+    def _move(self, src: int, dst: int) -> None:
+        super()._move(src, dst)
+        self._codes[dst] = self._codes[src]
+
+    def _allocate(self, dim: int) -> None:
+        self.dim = dim
+        self._vectors = self._full_matrix(self._capacity)
+        self._sq_norms = np.empty(self._capacity, dtype=np.float32)
+        self._codes = np.empty((self._capacity, self.quantizer.code_width(dim)), dtype=self.quantizer.dtype)
+
+    def _reserve(self, size: int, live: int) -> None:
+        if size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        codes = np.empty((capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+        sq_norms[:live] = self._sq_norms[:live]
+        codes[:live] = self._codes[:live]
+        # Growing the file keeps existing rows in place.
+        self._vectors.flush()
+        vectors = self._full_matrix(capacity)
+        self._vectors, self._sq_norms, self._codes, self._capacity = vectors, sq_norms, codes, capacity
+
+    def _full_matrix(self, capacity: int) -> np.ndarray:
+        nbytes = capacity * self.dim * 4
+        if os.fstat(self._scratch.fileno()).st_size < nbytes:
+            self._scratch.truncate(nbytes)
+        return np.memmap(self._scratch, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+
+def _popcount(data: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(data).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[data].sum(axis=1, dtype=np.int32)
+
+
+def _blockwise(codes: np.ndarray, score: Callable[[np.ndarray], np.ndarray], block_rows: int = 65536) -> np.ndarray:
+    # Decoding a whole code matrix at once would materialise the float32 copy
+    # the codes exist to avoid.
+    if len(codes) <= block_rows:
+        return score(codes)
+    return np.concatenate([score(codes[start:start + block_rows]) for start in range(0, len(codes), block_rows)], axis=1)
@@ -0,0 +1,11 @@
+-- Opt-in expression indexes for PgVectorAdapter(quantization=...).
+-- Apply the one matching the configured mode; the dimension must match the vectors column.
+-- Candidates are ranked on the quantized index, then reranked on the full-precision embedding.
+
+-- quantization="halfvec": 2x smaller index, L2 distance on half precision
+CREATE INDEX IF NOT EXISTS idx_vectors_embedding_halfvec
+    ON vectors USING hnsw ((embedding::halfvec(1536)) halfvec_l2_ops);
+
+-- quantization="binary": 32x smaller index, Hamming distance on sign bits
+CREATE INDEX IF NOT EXISTS idx_vectors_embedding_binary
+    ON vectors USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops);
@@ -0,0 +1,136 @@
+"""
+Result caches for SimilaritySearch.
+
+Entries are stamped with the adapter's write generation, so a cached result
+is served only while no upsert/delete has happened since it was computed.
+"""
+import sys
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+def normalize_query(text: str) -> str:
+    """Canonical cache key for query text: NFKC, case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    stale: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache(ABC):
+    @abstractmethod
+    def get(self, key: Hashable, generation: Any) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def put(self, key: Hashable, generation: Any, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        pass
+
+
+class LRUResultCache(ResultCache):
+    """In-process LRU cache with a per-entry TTL and an approximate memory cap."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: Optional[float] = 300.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._stale = self._evictions = 0
+
+    def get(self, key: Hashable, generation: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, entry_generation, expires, _ = entry
+            if entry_generation != generation or (expires and self._clock() >= expires):
+                self._discard(key)
+                self._stale += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, generation: Any, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires = self._clock() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (value, generation, expires, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                stale=self._stale,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def _discard(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key)[3]
+
+
+def estimate_size(value: Any) -> int:
+    """Rough deep size in bytes of a search result (lists/tuples/dicts/dataclasses of scalars and arrays)."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif is_dataclass(value):
+        size += sum(estimate_size(getattr(value, f.name)) for f in fields(value))
+    return size
@@ -0,0 +1,69 @@
+"""
+Typed query results shared by every vector adapter.
+
+``score`` is a distance in the adapter's metric, lower is closer, matching the
+pgvector operators: L2 distance (``<->``), cosine distance (``<=>``) and
+negative inner product (``<#>``). ``metadata`` and ``embedding`` are only
+populated when the query asks for them.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    id: str
+    score: float
+    metadata: Optional[dict] = None
+    # float32 ndarray when decoded from the binary wire format
+    embedding: Optional[Union[List[float], np.ndarray]] = None
+
+
+def similarity_to_distance(scores: np.ndarray, metric: str) -> np.ndarray:
+    """Convert ``scoring.similarity`` output (higher is closer) to pgvector-style distances."""
+    if metric == "cosine":
+        return 1.0 - scores
+    if metric == "inner_product":
+        return -scores
+    # scoring returns the negative squared L2 distance.
+    return np.sqrt(np.maximum(-scores, 0.0))
+
+
+def parse_vector(text: str) -> List[float]:
+    """Parse pgvector's text representation, e.g. ``[1,2.5,3]``."""
+    return [float(x) for x in text[1:-1].split(",")] if len(text) > 2 else []
+
+
+def projection_columns(include_metadata: bool, include_embedding: bool, prefix: str = "") -> str:
+    """Optional SELECT columns, after ``id`` and ``distance``, for the pgvector adapters."""
+    columns = []
+    if include_metadata:
+        columns.append(f"{prefix}metadata")
+    if include_embedding:
+        columns.append(f"{prefix}embedding")
+    return "".join(f", {column}" for column in columns)
+
+
+def result_from_row(row, include_metadata: bool, include_embedding: bool) -> SearchResult:
+    """Build a result from ``(id, distance[, metadata][, embedding])``."""
+    id_, distance, *rest = row
+    metadata = rest.pop(0) if include_metadata else None
+    embedding = rest[0] if include_embedding else None
+    if isinstance(embedding, str):
+        embedding = parse_vector(embedding)
+    elif embedding is not None and not isinstance(embedding, np.ndarray):
+        embedding = list(embedding)
+    return SearchResult(id=id_, score=float(distance), metadata=metadata, embedding=embedding)
+
+
+def result_from_record(record: dict, include_metadata: bool, include_embedding: bool) -> SearchResult:
+    """Build a result from a ``vector_search`` RPC record returned by PostgREST."""
+    embedding = record.get("embedding") if include_embedding else None
+    return SearchResult(
+        id=record["id"],
+        score=float(record["score"]),
+        metadata=record.get("metadata") if include_metadata else None,
+        embedding=parse_vector(embedding) if isinstance(embedding, str) else embedding,
+    )
@@ -0,0 +1,51 @@
+"""
+Vectorized similarity kernels shared by the in-process vector adapters.
+
+Every kernel returns a similarity where higher is closer, so callers can rank
+with a single ``top_k`` regardless of metric.
+"""
+import numpy as np
+
+METRICS = ("cosine", "inner_product", "l2")
+
+
+def check_metric(metric: str) -> str:
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+    return metric
+
+
+def similarity(matrix: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+    """Score ``queries`` (q, d) against ``matrix`` (n, d); returns (q, n)."""
+    return from_dots(queries @ matrix.T, sq_norms, queries, metric)
+
+
+def from_dots(dots: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+    """Finish ``similarity`` from precomputed (q, n) dot products and the rows' squared norms."""
+    if metric == "inner_product":
+        return dots
+    if metric == "cosine":
+        q_norms = np.linalg.norm(queries, axis=1)[:, None]
+        denom = q_norms * np.sqrt(sq_norms)[None, :]
+        return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+    # Negative squared L2 distance, expanded so the heavy lifting stays a matmul.
+    q_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+    return 2 * dots - sq_norms[None, :] - q_sq
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores per row of a (q, n) array, best first."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), (scores.shape[0], n))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def squared_norms(vectors: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", vectors, vectors)
@@ -0,0 +1,216 @@
+"""
+Sharded vector store: one logical index over several underlying adapters.
+
+Writes are routed by consistent hashing of the id, so adding a shard moves only
+about ``1/N`` of the ids. Queries scatter to every shard in parallel and gather
+each shard's top-k, already sorted by distance, into the global top-k with a
+heap merge. Every shard must use the same metric for the scores to be comparable.
+
+A shard that fails or misses the ``timeout`` deadline is left out of the merge
+rather than failing the query. The returned ``ShardedResults`` is then marked
+``partial`` and names the ``missing`` shards.
+"""
+import bisect
+import hashlib
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .adapter import VectorDBAdapter
+from .filters import MetadataFilter
+from .hybrid import RRF_K, candidate_count, check_weights, reciprocal_rank_fusion
+from .results import SearchResult
+
+# Virtual nodes per shard on the hash ring; more evens out the shard sizes.
+RING_REPLICAS = 128
+
+
+def _hash(key: str) -> int:
+    # Stable across processes, unlike hash(), so every writer routes the same way.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring mapping ids to shard indexes ``0..shards-1``."""
+
+    def __init__(self, shards: int, replicas: int = RING_REPLICAS):
+        if shards < 1 or replicas < 1:
+            raise ValueError("shards and replicas must be positive")
+        points = sorted((_hash(f"shard-{shard}#{replica}"), shard) for shard in range(shards) for replica in range(replicas))
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, id_: str) -> int:
+        i = bisect.bisect(self._keys, _hash(id_))
+        return self._shards[i % len(self._shards)]
+
+
+class ShardedResults(list):
+    """Merged results; ``partial`` is set when some shards did not answer in time or failed."""
+
+    def __init__(self, results=(), missing: Sequence[int] = ()):
+        super().__init__(results)
+        self.missing = tuple(missing)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing)
+
+
+class ShardedVectorAdapter(VectorDBAdapter):
+    """Scatter-gather over ``shards``.
+
+    ``timeout`` (seconds) bounds how long a query waits for shards. A query only
+    fails when no shard answers, or on any missing shard with ``strict=True``.
+    Writes always wait for every shard they touch and raise the first error.
+    A shard that times out keeps its pool thread until it returns, so the pool
+    holds ``workers_per_shard`` threads per shard to absorb stragglers.
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[VectorDBAdapter],
+        timeout: Optional[float] = None,
+        strict: bool = False,
+        replicas: int = RING_REPLICAS,
+        workers_per_shard: int = 4,
+    ):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = list(shards)
+        self.timeout = timeout
+        self.strict = strict
+        self.ring = HashRing(len(self.shards), replicas)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.shards) * max(workers_per_shard, 1), thread_name_prefix="vector-shard"
+        )
+
+    def shard_for(self, id_: str) -> int:
+        return self.ring.shard_for(id_)
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        groups: Dict[int, Tuple[list, list, list]] = {}
+        for id_, vec, meta in zip(ids, vectors, metadata):
+            group = groups.setdefault(self.shard_for(id_), ([], [], []))
+            group[0].append(id_)
+            group[1].append(vec)
+            group[2].append(meta)
+        try:
+            self._write({shard: (lambda s, g=group: s.upsert(*g)) for shard, group in groups.items()})
+        finally:
+            self._bump_generation()
+
+    def delete(self, ids: List[str]) -> None:
+        groups: Dict[int, List[str]] = {}
+        for id_ in ids:
+            groups.setdefault(self.shard_for(id_), []).append(id_)
+        try:
+            self._write({shard: (lambda s, g=group: s.delete(g)) for shard, group in groups.items()})
+        finally:
+            self._bump_generation()
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> ShardedResults:
+        answers, missing = self._scatter(
+            lambda s: s.query(vector, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        )
+        return ShardedResults(_merge(answers, top_k), missing)
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[ShardedResults]:
+        if not len(vectors):
+            return []
+        # One batched round trip per shard, then a merge per query.
+        answers, missing = self._scatter(
+            lambda s: s.query_batch(vectors, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        )
+        return [ShardedResults(_merge(per_query, top_k), missing) for per_query in zip(*answers)]
+
+    @property
+    def supports_lexical(self) -> bool:
+        return all(shard.supports_lexical for shard in self.shards)
+
+    def lexical_query(
+        self,
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> ShardedResults:
+        answers, missing = self._scatter(
+            lambda s: s.lexical_query(text, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        )
+        return ShardedResults(_merge(answers, top_k), missing)
+
+    def hybrid_query(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = RRF_K,
+        candidates: Optional[int] = None,
+    ) -> ShardedResults:
+        # Fuses the merged global rankings, rather than per-shard fusions, so the
+        # reciprocal ranks stay correct; shards missing from either side carry over.
+        check_weights(vector_weight, text_weight)
+        limit = candidate_count(top_k, candidates)
+        projection = dict(filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+        rankings, weights = [self.query(vector, top_k=limit, **projection)], [vector_weight]
+        if self.supports_lexical:
+            rankings.append(self.lexical_query(text, top_k=limit, **projection))
+            weights.append(text_weight)
+        missing = sorted(set().union(*(ranking.missing for ranking in rankings)))
+        return ShardedResults(reciprocal_rank_fusion(rankings, weights, top_k, rrf_k), missing)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for shard in self.shards:
+            if hasattr(shard, "close"):
+                shard.close()
+
+    def _scatter(self, call: Callable[[VectorDBAdapter], Any]) -> Tuple[List[Any], List[int]]:
+        futures = [self._executor.submit(call, shard) for shard in self.shards]
+        done, _ = wait(futures, timeout=self.timeout)
+        answers, missing, errors = [], [], []
+        for index, future in enumerate(futures):
+            if future not in done:
+                future.cancel()
+                missing.append(index)
+                errors.append(TimeoutError(f"Shard {index} did not answer within {self.timeout}s"))
+            elif future.exception() is not None:
+                missing.append(index)
+                errors.append(future.exception())
+            else:
+                answers.append(future.result())
+        if errors and (self.strict or not answers):
+            raise errors[0]
+        return answers, missing
+
+    def _write(self, calls: Dict[int, Callable[[VectorDBAdapter], None]]) -> None:
+        futures = [self._executor.submit(call, self.shards[shard]) for shard, call in calls.items()]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+
+def _merge(rankings: Sequence[Sequence[SearchResult]], top_k: int) -> List[SearchResult]:
+    # Each shard's list is already sorted by score, so a k-way heap merge suffices.
+    return list(itertools.islice(heapq.merge(*rankings, key=lambda hit: hit.score), top_k))
@@ -1,12 +1,129 @@
-from typing import List, Any
+from typing import List, Optional
 from .adapter import VectorDBAdapter
 from .embedding_service import EmbeddingService
+from .filters import MetadataFilter, canonical_filter
+from .hybrid import RRF_K
+from .result_cache import ResultCache, normalize_query
+from .results import SearchResult
 
 class SimilaritySearch:
-    def __init__(self, vector_db: VectorDBAdapter, embedder: EmbeddingService):
+    def __init__(
+        self,
+        vector_db: VectorDBAdapter,
+        embedder: EmbeddingService,
+        cache: Optional[ResultCache] = None,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = RRF_K,
+    ):
         self.vector_db = vector_db
         self.embedder = embedder
+        self.cache = cache
+        # Defaults for hybrid_search's reciprocal-rank fusion
+        self.vector_weight = vector_weight
+        self.text_weight = text_weight
+        self.rrf_k = rrf_k
 
-    def search(self, query_text: str, top_k: int = 5) -> List[Any]:
+    def search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        projection = dict(include_metadata=include_metadata, include_embedding=include_embedding)
+        if self.cache is None:
+            query_vec = self.embedder.embed([query_text])[0]
+            return self.vector_db.query(query_vec, top_k=top_k, filters=filters, **projection)
+        # The raw text is embedded, as without a cache; only the key is normalized,
+        # so spellings differing in case, width or spacing share one entry.
+        # Read the generation before querying: a write that lands mid-query
+        # bumps it and makes this entry stale rather than silently serving it.
+        key = (normalize_query(query_text), top_k, canonical_filter(filters), include_metadata, include_embedding)
+        generation = self.vector_db.generation
+        cached = self.cache.get(key, generation)
+        if cached is not None:
+            return list(cached)
         query_vec = self.embedder.embed([query_text])[0]
-        return self.vector_db.query(query_vec, top_k=top_k)
+        results = self.vector_db.query(query_vec, top_k=top_k, filters=filters, **projection)
+        if _complete(results):
+            self.cache.put(key, generation, list(results))
+        return results
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        vector_weight: Optional[float] = None,
+        text_weight: Optional[float] = None,
+    ) -> List[SearchResult]:
+        # Vector and full-text rankings fused with reciprocal-rank fusion; score is
+        # the negated fusion score. Exact identifiers in the query hit the text side.
+        weights = dict(
+            vector_weight=self.vector_weight if vector_weight is None else vector_weight,
+            text_weight=self.text_weight if text_weight is None else text_weight,
+            rrf_k=self.rrf_k,
+        )
+        projection = dict(include_metadata=include_metadata, include_embedding=include_embedding)
+        key = None
+        if self.cache is not None:
+            key = (
+                "hybrid", normalize_query(query_text), top_k, canonical_filter(filters),
+                include_metadata, include_embedding, *weights.values(),
+            )
+            generation = self.vector_db.generation
+            cached = self.cache.get(key, generation)
+            if cached is not None:
+                return list(cached)
+        query_vec = self.embedder.embed([query_text])[0]
+        results = self.vector_db.hybrid_query(query_vec, query_text, top_k=top_k, filters=filters, **projection, **weights)
+        if key is not None and _complete(results):
+            self.cache.put(key, generation, list(results))
+        return results
+
+    def search_batch(
+        self,
+        query_texts: List[str],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[List[SearchResult]]:
+        if not query_texts:
+            return []
+        projection = dict(include_metadata=include_metadata, include_embedding=include_embedding)
+        if self.cache is None:
+            query_vecs = self.embedder.embed(query_texts)
+            return self.vector_db.query_batch(query_vecs, top_k=top_k, filters=filters, **projection)
+        generation = self.vector_db.generation
+        filter_key = canonical_filter(filters)
+        keys = [(text, top_k, filter_key, include_metadata, include_embedding) for text in map(normalize_query, query_texts)]
+        results: List[Optional[List[SearchResult]]] = [None] * len(query_texts)
+        # Key -> positions of its misses; the first text seen for a key is embedded.
+        misses = {}
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key, generation)
+            if cached is not None:
+                results[i] = list(cached)
+            else:
+                misses.setdefault(key, []).append(i)
+        if misses:
+            miss_texts = [query_texts[positions[0]] for positions in misses.values()]
+            fetched = self.vector_db.query_batch(
+                self.embedder.embed(miss_texts), top_k=top_k, filters=filters, **projection
+            )
+            for (key, positions), hits in zip(misses.items(), fetched):
+                if _complete(hits):
+                    self.cache.put(key, generation, list(hits))
+                for i in positions:
+                    results[i] = hits
+        return results
+
+def _complete(results: List[SearchResult]) -> bool:
+    # Scatter-gather adapters mark answers missing some shards as partial; a
+    # cached one would keep being served after the shards recover.
+    return not getattr(results, "partial", False)
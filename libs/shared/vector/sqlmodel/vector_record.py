@@ -1,14 +1,28 @@
 from typing import List, Dict, Any
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Column, JSON
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import ARRAY
+import numpy as np
+from pydantic import field_serializer
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy_utils import ScalarListType
+from .vector_type import Vector
+
+# Must match vector(1536) in migration 001.
+EMBEDDING_DIM = 1536
 
 class VectorRecord(SQLModel, table=True):
     __tablename__ = "vectors"
 
     id: str = Field(primary_key=True)
-    embedding: List[float] = Field(sa_column=Column(ARRAY(float)))  # pgvector: use extension in migration
-    metadata: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
-    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(default=func.now()))
+    # Loaded as a float32 NumPy array; assign any sequence of floats.
+    embedding: List[float] = Field(sa_column=Column(Vector(EMBEDDING_DIM)))
+    # "metadata" is reserved on SQLModel classes (it is the table MetaData), so the
+    # attribute is renamed; the column and the API field keep the name.
+    metadata_: Dict[str, Any] = Field(default_factory=dict, alias="metadata", sa_column=Column("metadata", JSONB))
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()))
+
+    @field_serializer("embedding")
+    def _embedding_list(self, embedding):
+        # Loaded rows hold NumPy arrays, which JSON encoders don't accept.
+        return None if embedding is None else np.asarray(embedding, dtype=np.float32).tolist()
@@ -1,26 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from supabase import create_client, Client
-from typing import List, Any, Dict
+from typing import List, Any, Callable, Dict, Optional
 from .adapter import VectorDBAdapter
+from .chunking import ChunkFailure, WriteReport, chunk_ids, chunk_records, finish
+from .filters import MetadataFilter, containment_filter
+from .hybrid import RRF_K, candidate_count, check_weights, or_tsquery, reciprocal_rank_fusion
+from .results import SearchResult, result_from_record
 import os
 
 class SupabaseVectorAdapter(VectorDBAdapter):
-    def __init__(self, url: str = None, key: str = None):
+    def __init__(
+        self,
+        url: str = None,
+        key: str = None,
+        client: Optional[Client] = None,
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 2 * 1024 * 1024,
+        parallelism: int = 4,
+        delete_chunk_size: int = 200,
+    ):
         self.url = url or os.getenv("SUPABASE_URL")
         self.key = key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        self.client: Client = create_client(self.url, self.key)
+        self.client: Client = client or create_client(self.url, self.key)
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.parallelism = parallelism
+        # ids travel in the query string of in_ filters, so keep URLs short.
+        self.delete_chunk_size = delete_chunk_size
 
     def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[dict]) -> None:
+        # Raises PartialWriteError after all chunks ran if any failed; its report
+        # lists the failed ids so only those need retrying.
         records = [
             {"id": ids[i], "embedding": vectors[i], "metadata": metadata[i]} for i in range(len(ids))
         ]
-        self.client.table("vectors").upsert(records).execute()
+        chunks = list(chunk_records(records, self.chunk_size, self.max_chunk_bytes))
+        report = self._send_chunks(
+            chunks,
+            lambda chunk: self.client.table("vectors").upsert(chunk).execute(),
+            lambda chunk: [record["id"] for record in chunk],
+        )
+        if report.rows:
+            self._bump_generation()
+        finish(report, "upsert")
 
-    def query(self, vector: List[float], top_k: int = 5) -> List[Any]:
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
         # Supabase REST API does not support vector search natively; use RPC or SQL function
-        # This is a placeholder for a custom RPC function
-        response = self.client.rpc("vector_search", {"query_embedding": vector, "top_k": top_k}).execute()
-        return response.data
+        # vector_search is defined in supabase/migrations (latest: 003_vector_search_scores.sql)
+        params = {"query_embedding": vector, "top_k": top_k, "include_embedding": include_embedding}
+        if filters:
+            # vector_search (supabase/migrations) filters with metadata @> filter
+            params["filter"] = containment_filter(filters)
+        response = self.client.rpc("vector_search", params).execute()
+        return [result_from_record(row, include_metadata, include_embedding) for row in response.data]
+
+    def hybrid_query(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[MetadataFilter] = None,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = RRF_K,
+        candidates: Optional[int] = None,
+    ) -> List[SearchResult]:
+        # hybrid_search (supabase/migrations/005_vectors_hybrid_search.sql) fuses both rankings server-side
+        check_weights(vector_weight, text_weight)
+        terms = or_tsquery(text)
+        if not terms:
+            hits = self.query(vector, top_k=top_k, filters=filters, include_metadata=include_metadata, include_embedding=include_embedding)
+            return reciprocal_rank_fusion([hits], (vector_weight,), top_k, rrf_k)
+        params = {
+            "query_embedding": vector,
+            "query_terms": terms,
+            "top_k": top_k,
+            "vector_weight": vector_weight,
+            "text_weight": text_weight,
+            "rrf_k": rrf_k,
+            "candidates": candidate_count(top_k, candidates),
+            "include_embedding": include_embedding,
+        }
+        if filters:
+            params["filter"] = containment_filter(filters)
+        response = self.client.rpc("hybrid_search", params).execute()
+        return [result_from_record(row, include_metadata, include_embedding) for row in response.data]
 
     def delete(self, ids: List[str]) -> None:
-        for id_ in ids:
-            self.client.table("vectors").delete().eq("id", id_).execute()
+        chunks = list(chunk_ids(ids, self.delete_chunk_size))
+        report = self._send_chunks(
+            chunks,
+            lambda chunk: self.client.table("vectors").delete().in_("id", chunk).execute(),
+            lambda chunk: chunk,
+        )
+        if report.rows:
+            self._bump_generation()
+        finish(report, "delete")
+
+    def _send_chunks(
+        self, chunks: List[list], send: Callable[[list], Any], ids_of: Callable[[list], List[str]]
+    ) -> WriteReport:
+        report = WriteReport(chunks=len(chunks))
+        if not chunks:
+            return report
+        with ThreadPoolExecutor(max_workers=max(1, min(self.parallelism, len(chunks)))) as executor:
+            futures = {executor.submit(send, chunk): i for i, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    future.result()
+                    report.rows += len(chunks[i])
+                except Exception as e:
+                    report.failures.append(ChunkFailure(index=i, ids=ids_of(chunks[i]), error=e))
+        report.failures.sort(key=lambda failure: failure.index)
+        return report
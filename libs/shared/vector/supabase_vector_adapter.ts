@@ -1,5 +1,5 @@
 import { createClient, SupabaseClient } from "@supabase/supabase-js";
-import { VectorRecord } from "./supabase_vector_types";
+import { VectorRecord, VectorSearchResult } from "./supabase_vector_types";
 
 export class SupabaseVectorAdapter {
   private client: SupabaseClient;
@@ -17,14 +17,16 @@ export class SupabaseVectorAdapter {
 
   async query(
     queryEmbedding: number[],
-    topK: number = 5
-  ): Promise<VectorRecord[]> {
-    // Placeholder: Use a custom RPC or SQL function for vector search
+    topK: number = 5,
+    includeEmbedding: boolean = false
+  ): Promise<VectorSearchResult[]> {
+    // vector_search is defined in supabase/migrations
     const { data } = await this.client.rpc("vector_search", {
       query_embedding: queryEmbedding,
       top_k: topK,
+      include_embedding: includeEmbedding,
     });
-    return data as VectorRecord[];
+    return data as VectorSearchResult[];
   }
 
   async delete(ids: string[]): Promise<void> {
@@ -5,3 +5,11 @@ export type VectorRecord = {
   metadata: Record<string, any>;
   created_at: string;
 };
+
+// Row returned by the vector_search RPC; score is the L2 distance (lower is closer)
+export type VectorSearchResult = {
+  id: string;
+  score: number;
+  metadata: Record<string, any>;
+  embedding: number[] | null;
+};
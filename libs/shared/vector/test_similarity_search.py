@@ -18,5 +18,13 @@ class TestSimilaritySearch(unittest.TestCase):
         self.assertIsInstance(results, list)
         self.assertEqual(len(results), 3)
 
+    def test_search_batch(self):
+        self.vector_db.query_batch.return_value = [[("doc1", 0.9)], [("doc2", 0.8)]]
+        results = self.search.search_batch(["first", "second"], top_k=1)
+        self.assertEqual(results, [[("doc1", 0.9)], [("doc2", 0.8)]])
+        vectors = self.vector_db.query_batch.call_args[0][0]
+        self.assertEqual(len(vectors), 2)
+        self.vector_db.query.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,18 @@
+-- GIN index so metadata filters compiled to JSONB containment (metadata @> ...) avoid a full scan
+CREATE INDEX IF NOT EXISTS idx_vectors_metadata ON vectors USING gin (metadata jsonb_path_ops);
+
+-- RPC used by SupabaseVectorAdapter.query; filter is a containment document ({} matches every row)
+CREATE OR REPLACE FUNCTION vector_search(
+    query_embedding vector(1536),
+    top_k INTEGER DEFAULT 5,
+    filter JSONB DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (id TEXT, embedding vector(1536), metadata JSONB)
+LANGUAGE sql STABLE
+AS $$
+    SELECT v.id, v.embedding, v.metadata
+    FROM vectors v
+    WHERE v.metadata @> filter
+    ORDER BY v.embedding <-> query_embedding
+    LIMIT top_k;
+$$;
@@ -0,0 +1,22 @@
+-- vector_search now returns the L2 distance as score and only ships embeddings on request.
+-- The return type changes, so the old function has to be dropped rather than replaced.
+DROP FUNCTION IF EXISTS vector_search(vector, INTEGER, JSONB);
+
+CREATE FUNCTION vector_search(
+    query_embedding vector(1536),
+    top_k INTEGER DEFAULT 5,
+    filter JSONB DEFAULT '{}'::jsonb,
+    include_embedding BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (id TEXT, score DOUBLE PRECISION, metadata JSONB, embedding vector(1536))
+LANGUAGE sql STABLE
+AS $$
+    SELECT v.id,
+           v.embedding <-> query_embedding AS score,
+           v.metadata,
+           CASE WHEN include_embedding THEN v.embedding END
+    FROM vectors v
+    WHERE v.metadata @> filter
+    ORDER BY v.embedding <-> query_embedding
+    LIMIT top_k;
+$$;
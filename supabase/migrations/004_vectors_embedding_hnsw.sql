@@ -0,0 +1,8 @@
+-- 001 built an ivfflat index on the empty table: its list centroids were trained on no data, and its
+-- cosine opclass cannot serve the L2 (<->) ordering every query uses. Replace it with an HNSW index,
+-- which needs no training and stays accurate as rows are inserted.
+-- On a populated table prefer `python -m libs.shared.vector.index_manager <dsn> rebuild`, which
+-- sizes the parameters from the row count and builds CONCURRENTLY without blocking writes.
+DROP INDEX IF EXISTS idx_vectors_embedding;
+CREATE INDEX IF NOT EXISTS idx_vectors_embedding ON vectors USING hnsw (embedding vector_l2_ops);
+COMMENT ON INDEX idx_vectors_embedding IS '{"rows": 0}';
@@ -0,0 +1,61 @@
+-- Lexical side of hybrid search: a generated tsvector over the id and every string value in metadata.
+-- The "simple" configuration lowercases without stemming, so SKUs and order ids match exactly.
+ALTER TABLE vectors ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('simple', id) || jsonb_to_tsvector('simple', coalesce(metadata, '{}'::jsonb), '["string"]')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_vectors_search_tsv ON vectors USING gin (search_tsv);
+
+-- RPC used by SupabaseVectorAdapter.hybrid_query. query_terms is to_tsquery input (terms joined by |).
+-- Candidates from the vector and text rankings are merged with weighted reciprocal-rank fusion;
+-- score is the negated fusion score, so lower is better as for vector_search.
+CREATE OR REPLACE FUNCTION hybrid_search(
+    query_embedding vector(1536),
+    query_terms TEXT,
+    top_k INTEGER DEFAULT 5,
+    filter JSONB DEFAULT '{}'::jsonb,
+    vector_weight DOUBLE PRECISION DEFAULT 1,
+    text_weight DOUBLE PRECISION DEFAULT 1,
+    rrf_k INTEGER DEFAULT 60,
+    candidates INTEGER DEFAULT 20,
+    include_embedding BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (id TEXT, score DOUBLE PRECISION, metadata JSONB, embedding vector(1536))
+LANGUAGE sql STABLE
+AS $$
+    WITH semantic AS (
+        SELECT n.id, row_number() OVER (ORDER BY n.distance) AS rank
+        FROM (
+            SELECT v.id, v.embedding <-> query_embedding AS distance
+            FROM vectors v
+            WHERE v.metadata @> filter
+            ORDER BY distance
+            LIMIT candidates
+        ) n
+    ),
+    lexical AS (
+        SELECT m.id, row_number() OVER (ORDER BY m.text_rank DESC, m.id) AS rank
+        FROM (
+            SELECT v.id, ts_rank_cd(v.search_tsv, q.query) AS text_rank
+            FROM vectors v, to_tsquery('simple', query_terms) AS q(query)
+            WHERE v.search_tsv @@ q.query AND v.metadata @> filter
+            ORDER BY text_rank DESC, v.id
+            LIMIT candidates
+        ) m
+    ),
+    fused AS (
+        SELECT coalesce(s.id, l.id) AS id, s.rank AS vector_rank, l.rank AS text_rank,
+               coalesce(vector_weight / (rrf_k + s.rank), 0) + coalesce(text_weight / (rrf_k + l.rank), 0) AS rrf
+        FROM semantic s
+        FULL OUTER JOIN lexical l ON l.id = s.id
+    )
+    SELECT v.id,
+           -f.rrf AS score,
+           v.metadata,
+           CASE WHEN include_embedding THEN v.embedding END
+    FROM fused f
+    JOIN vectors v ON v.id = f.id
+    ORDER BY f.rrf DESC, f.vector_rank NULLS LAST, f.text_rank
+    LIMIT top_k;
+$$;
@@ -0,0 +1,9 @@
+-- Keyset pagination of GET /vectors/?order_by=created_at resumes after (created_at, id).
+-- A row-value comparison never matches NULL, so rows without a timestamp would be skipped:
+-- backfill them (now() keeps them last, where NULLs sorted) and forbid NULLs from here on.
+UPDATE vectors SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE vectors ALTER COLUMN created_at SET DEFAULT now();
+ALTER TABLE vectors ALTER COLUMN created_at SET NOT NULL;
+
+-- This index serves both the ordering and the row-value comparison without a sort.
+CREATE INDEX IF NOT EXISTS idx_vectors_created_at_id ON vectors (created_at, id);
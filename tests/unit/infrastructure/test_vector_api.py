@@ -0,0 +1,113 @@
+"""
+Unit tests for the vector REST API list endpoint, against an in-memory SQLite database.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from libs.shared.vector.sqlmodel.vector_api import get_session, router
+from libs.shared.vector.sqlmodel.vector_record import VectorRecord
+from libs.shared.vector.sqlmodel.vector_type import Vector
+
+
+@compiles(Vector, "sqlite")
+def _vector_as_text(type_, compiler, **kw):
+    # SQLite stores the pgvector text form; the type's processors do the conversion.
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    VectorRecord.__table__.create(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with Session(engine) as session:
+        for i in range(25):
+            # ids sort differently from creation time
+            session.add(VectorRecord(id=f"v{(i * 7) % 25:02d}", metadata={"n": i}, created_at=start + timedelta(minutes=i)))
+        session.commit()
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_session] = override
+    return TestClient(app)
+
+
+def collect(client, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get("/vectors/", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_pages_by_id_without_gaps_or_repeats(client):
+    first = client.get("/vectors/", params={"limit": 10}).json()
+    assert [item["id"] for item in first["items"]] == [f"v{i:02d}" for i in range(10)]
+    assert set(first["items"][0]) == {"id", "embedding", "metadata", "created_at"}
+    assert collect(client, limit=10) == [f"v{i:02d}" for i in range(25)]
+
+
+def test_pages_by_created_at(client):
+    ids = collect(client, limit=4, order_by="created_at", fields="id,metadata")
+    assert ids == [f"v{(i * 7) % 25:02d}" for i in range(25)]
+    # A NULL created_at would never satisfy the keyset comparison and be skipped.
+    assert not VectorRecord.__table__.c.created_at.nullable
+
+
+def test_fields_exclude_embeddings(client):
+    items = client.get("/vectors/", params={"fields": "metadata", "order_by": "created_at", "limit": 2}).json()["items"]
+    assert items == [{"metadata": {"n": 0}}, {"metadata": {"n": 1}}]
+    assert client.get("/vectors/", params={"fields": "id,password"}).status_code == 422
+
+
+def test_ndjson_streams_remaining_rows(client):
+    page = client.get("/vectors/", params={"limit": 20}).json()
+    response = client.get("/vectors/", params={"format": "ndjson", "cursor": page["next_cursor"], "fields": "id"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"id": f"v{i:02d}"} for i in range(20, 25)]
+
+
+def test_rejects_bad_parameters(client):
+    assert client.get("/vectors/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/vectors/", params={"order_by": "metadata"}).status_code == 422
+    assert client.get("/vectors/", params={"limit": 5000}).status_code == 422
+
+
+def test_get_vector_uses_session_dependency(client):
+    assert client.get("/vectors/v03").json()["metadata"] == {"n": 4}
+    assert client.get("/vectors/missing").status_code == 404
+
+
+def test_create_vector_round_trips_metadata(client):
+    response = client.post("/vectors/", json={"id": "new", "metadata": {"tenant": "acme"}})
+    assert response.status_code == 200
+    assert response.json()["metadata"] == {"tenant": "acme"}
+    assert client.get("/vectors/new").json()["metadata"] == {"tenant": "acme"}
+
+
+def test_record_maps_metadata_field_to_the_jsonb_column():
+    record = VectorRecord(id="r", metadata={"a": 1})
+    assert record.metadata_ == {"a": 1}
+    assert record.model_dump(by_alias=True, include={"metadata_"}) == {"metadata": {"a": 1}}
+    assert isinstance(VectorRecord.__table__.c.metadata.type, JSONB)
+    assert VectorRecord.metadata is SQLModel.metadata
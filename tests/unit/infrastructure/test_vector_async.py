@@ -0,0 +1,74 @@
+"""
+Unit tests for the asyncio vector stack.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from libs.shared.vector.async_adapter import AsyncVectorDBAdapter
+from libs.shared.vector.async_pgvector_adapter import AsyncPgVectorAdapter, _vector_literal
+from libs.shared.vector.results import SearchResult, parse_vector
+from libs.shared.vector.async_similarity_search import AsyncSimilaritySearch
+from libs.shared.vector.embedding_service import EmbeddingService
+
+
+class SlowAdapter(AsyncVectorDBAdapter):
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def upsert(self, ids, vectors, metadata):
+        self._bump_generation()
+
+    async def query(self, vector, top_k=5, filters=None, include_metadata=True, include_embedding=False):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return [SearchResult(id="doc", score=vector[0])]
+
+    async def delete(self, ids):
+        self._bump_generation()
+
+
+def test_search_runs_concurrently():
+    adapter = SlowAdapter()
+    search = AsyncSimilaritySearch(adapter, EmbeddingService())
+
+    async def run():
+        return await asyncio.gather(*(search.search(f"q{i}", top_k=1) for i in range(20)))
+
+    results = asyncio.run(run())
+    assert len(results) == 20
+    assert adapter.peak > 1
+
+
+def test_default_query_batch_keeps_input_order():
+    adapter = SlowAdapter()
+    results = asyncio.run(adapter.query_batch([[3.0], [1.0], [2.0]], top_k=1))
+    assert [r[0].score for r in results] == [3.0, 1.0, 2.0]
+    asyncio.run(adapter.upsert([], [], []))
+    assert adapter.generation == 1
+
+
+def test_pgvector_query_batch_groups_rows():
+    pool = MagicMock()
+    pool.fetch = AsyncMock(return_value=[(2, "b", 0.2, {}), (1, "a", 0.1, {})])
+    adapter = AsyncPgVectorAdapter("postgresql://unused", pool=pool)
+    results = asyncio.run(adapter.query_batch([[0.1], [0.2]], top_k=1))
+    assert [[hit.id for hit in r] for r in results] == [["a"], ["b"]]
+    assert pool.fetch.await_args[0][1] == ["[0.1]", "[0.2]"]
+
+
+def test_pgvector_delete_is_one_statement():
+    pool = MagicMock()
+    pool.execute = AsyncMock()
+    adapter = AsyncPgVectorAdapter("postgresql://unused", pool=pool)
+    asyncio.run(adapter.delete(["a", "b"]))
+    pool.execute.assert_awaited_once()
+    assert pool.execute.await_args[0][1] == ["a", "b"]
+    assert adapter.generation == 1
+
+
+def test_vector_text_codec_round_trips():
+    assert parse_vector(_vector_literal([1, -2.5, 3e-5])) == [1.0, -2.5, 3e-5]
+    assert parse_vector("[]") == []
@@ -0,0 +1,61 @@
+"""
+Smoke tests for the vector benchmark suite.
+"""
+import json
+from unittest.mock import MagicMock
+
+from libs.shared.vector import benchmark
+from libs.shared.vector.benchmark import codec_benchmark, latency_summary, main, run_case, run_suite
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter
+
+
+def test_run_case_reports_all_measurements():
+    result = run_case("memory", rows=300, dim=8, queries=10, batch_size=100, query_batch_size=4)
+    assert result["upsert"]["rows_per_sec"] > 0
+    assert result["query"]["count"] == 10
+    assert result["query_batch"]["count"] == 3
+    assert result["delete"]["rows"] == 30
+    assert result["peak_rss_mb"] > 0
+
+
+def test_postgres_is_skipped_without_dsn(monkeypatch):
+    monkeypatch.delenv("VECTOR_BENCH_DSN", raising=False)
+    report = run_suite(adapters=["pgvector", "ivf"], sizes=[200], isolate=False, dim=8, queries=5)
+    pg, ivf = report["results"]
+    assert "skipped" in pg
+    assert ivf["rows"] == 200 and "skipped" not in ivf
+
+
+def test_postgres_cleanup_is_one_statement(monkeypatch):
+    adapter = MagicMock(spec=PgVectorAdapter)
+    adapter.pool = MagicMock()
+    monkeypatch.setitem(benchmark.ADAPTERS, "pgvector", lambda dim, rows, workdir: adapter)
+    run_case("pgvector", rows=300, dim=8, queries=4, batch_size=100)
+    cur = adapter.pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    cur.execute.assert_called_once_with("DELETE FROM vectors WHERE id LIKE %s", ("bench-%",))
+    # Only the measured delete phase goes through the adapter.
+    assert [len(call.args[0]) for call in adapter.delete.call_args_list] == [30]
+    adapter.close.assert_called_once_with()
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary(list(range(1, 101)))
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 50.5
+    assert latency_summary([]) == {"count": 0}
+
+
+def test_cli_writes_json(tmp_path, monkeypatch):
+    monkeypatch.delenv("VECTOR_BENCH_DSN", raising=False)
+    out = tmp_path / "bench.json"
+    main(["--adapters", "mmap", "--sizes", "100", "--dim", "4", "--queries", "3", "--output", str(out)])
+    report = json.loads(out.read_text())
+    assert report["results"][0]["adapter"] == "mmap"
+    assert "python" in report["meta"]
+
+
+def test_codec_benchmark_compares_wire_formats():
+    report = codec_benchmark(dim=16, vectors=20)
+    assert report["binary"]["bytes"] == 4 + 16 * 4
+    assert report["bytes_ratio"] > 1
+    assert report["encode_ratio"] > 0 and report["decode_ratio"] > 0
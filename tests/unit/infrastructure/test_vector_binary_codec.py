@@ -0,0 +1,66 @@
+"""
+Unit tests for the binary pgvector wire format.
+"""
+import struct
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.binary_codec import copy_binary, decode_vector, encode_vector, read_copy_binary
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter, _CopyStream
+from libs.shared.vector.pool import ConnectionPool
+
+
+def test_vector_round_trip_matches_pgvector_layout():
+    data = encode_vector([1.0, -2.5, 3e-5])
+    assert data[:4] == struct.pack(">HH", 3, 0)
+    assert data[4:8] == struct.pack(">f", 1.0)
+    decoded = decode_vector(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, [1.0, -2.5, 3e-5], rtol=1e-6)
+    with pytest.raises(ValueError):
+        encode_vector([[1.0]])
+
+
+def test_copy_binary_round_trip_with_nulls():
+    types = ("int8", "text", "vector", "jsonb")
+    rows = [(0, "a", [1.0, 2.0], {"k": "v"}), (1, "b", np.array([3.0, 4.0]), None)]
+    stream = b"".join(copy_binary(rows, types))
+    assert stream.startswith(b"PGCOPY\n\xff\r\n\x00")
+    parsed = read_copy_binary(stream, types)
+    assert [(r[0], r[1], r[3]) for r in parsed] == [(0, "a", {"k": "v"}), (1, "b", None)]
+    np.testing.assert_array_equal(parsed[1][2], [3.0, 4.0])
+
+
+def binary_adapter():
+    pool = MagicMock(spec=ConnectionPool)
+    conn = pool.connection.return_value.__enter__.return_value
+    cur = conn.cursor.return_value.__enter__.return_value
+    return PgVectorAdapter("postgresql://unused", pool=pool, wire_format="binary"), cur
+
+
+def test_binary_bulk_upsert_streams_bytes():
+    adapter, cur = binary_adapter()
+    adapter.upsert(["a", "b"], [[1.0], [2.0]], [{}, {"x": 1}])
+    sql, stream = cur.copy_expert.call_args[0]
+    assert "FORMAT binary" in sql
+    assert isinstance(stream, _CopyStream)
+    assert read_copy_binary(stream.read(), ("int8", "text", "vector", "jsonb"))[1][3] == {"x": 1}
+
+
+def test_binary_query_decodes_embeddings_from_copy():
+    adapter, cur = binary_adapter()
+    cur.mogrify.return_value = b"SELECT 1"
+    payload = b"".join(copy_binary([("a", 0.5, {"k": 1}, [1.0, 2.0])], ("text", "float8", "jsonb", "vector")))
+    cur.copy_expert.side_effect = lambda sql, buffer: buffer.write(payload)
+    hit = adapter.query([1.0, 2.0], top_k=1, include_embedding=True)[0]
+    assert cur.copy_expert.call_args[0][0] == "COPY (SELECT 1) TO STDOUT WITH (FORMAT binary)"
+    assert (hit.id, hit.score, hit.metadata) == ("a", 0.5, {"k": 1})
+    np.testing.assert_array_equal(hit.embedding, np.array([1.0, 2.0], dtype=np.float32))
+    cur.execute.assert_not_called()
+
+
+def test_unknown_wire_format_is_rejected():
+    with pytest.raises(ValueError):
+        PgVectorAdapter("postgresql://unused", wire_format="hex")
@@ -0,0 +1,55 @@
+"""
+Unit tests for the persistent embedding cache.
+"""
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.embedding_cache import CachedEmbeddingService, EmbeddingCache, text_key
+from libs.shared.vector.embedding_service import EmbeddingService
+
+
+def fake_embedder():
+    embedder = MagicMock(spec=EmbeddingService)
+    embedder.model_id = "fake-3"
+    embedder.embed.side_effect = lambda texts: [[float(len(t)), 0.5, -1.0] for t in texts]
+    return embedder
+
+
+def test_cache_round_trips_float32_blobs(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.db"))
+    cache.put_many("m", {text_key("a"): np.array([1.5, 2.5], dtype=np.float32)})
+    found = cache.get_many("m", [text_key("a"), text_key("b")])
+    assert list(found) == [text_key("a")]
+    assert found[text_key("a")].dtype == np.float32
+    assert cache.get_many("other-model", [text_key("a")]) == {}
+
+
+def test_only_misses_are_embedded_in_one_batch(tmp_path):
+    embedder = fake_embedder()
+    service = CachedEmbeddingService(embedder, EmbeddingCache(str(tmp_path / "emb.db")))
+    first = service.embed(["alpha", "beta", "alpha"])
+    assert embedder.embed.call_args[0][0] == ["alpha", "beta"]
+    second = service.embed(["beta", "gamma", "alpha"])
+    assert embedder.embed.call_count == 2
+    assert embedder.embed.call_args[0][0] == ["gamma"]
+    assert second[0] == first[1] and second[2] == first[0]
+    assert (service.hits, service.misses) == (3, 3)
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "emb.db")
+    CachedEmbeddingService(fake_embedder(), EmbeddingCache(path)).embed(["alpha", "beta"])
+    embedder = fake_embedder()
+    service = CachedEmbeddingService(embedder, EmbeddingCache(path))
+    assert service.embed(["beta", "alpha"]) == [[4.0, 0.5, -1.0], [5.0, 0.5, -1.0]]
+    embedder.embed.assert_not_called()
+
+
+def test_short_embedder_output_is_rejected(tmp_path):
+    embedder = fake_embedder()
+    embedder.embed.side_effect = lambda texts: [[1.0, 0.5, -1.0]]
+    service = CachedEmbeddingService(embedder, EmbeddingCache(str(tmp_path / "emb.db")))
+    with pytest.raises(ValueError, match="1 vectors for 2 texts"):
+        service.embed(["alpha", "beta"])
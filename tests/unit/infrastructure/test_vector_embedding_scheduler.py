@@ -0,0 +1,121 @@
+"""
+Unit tests for the adaptive embedding batch scheduler.
+"""
+import threading
+import time
+
+import pytest
+
+from libs.shared.vector.embedding_scheduler import (
+    BatchingEmbeddingService,
+    TokenBucket,
+    estimate_tokens,
+    plan_batches,
+)
+
+
+class RecordingEmbedder:
+    model_id = "recording"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return [[float(len(text))] for text in texts]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_plan_batches_sorts_by_length_within_budget():
+    lengths = [50, 1, 10, 2, 40, 3, 500]
+    batches = plan_batches(lengths, max_batch_tokens=100, max_batch_size=3)
+    assert [i for batch in batches for i in batch] == sorted(range(len(lengths)), key=lengths.__getitem__)
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 100
+    # The overlong input is alone.
+    assert [6] in batches
+
+
+def test_results_keep_input_order():
+    embedder = RecordingEmbedder()
+    service = BatchingEmbeddingService(embedder, max_batch_tokens=20, max_batch_size=4)
+    texts = ["x" * n for n in (40, 3, 17, 0, 90, 8, 8, 33)]
+    assert service.embed(texts) == [[float(len(text))] for text in texts]
+    assert len(embedder.batches) > 1
+    assert all(len(batch) <= 4 for batch in embedder.batches)
+    assert service.embed([]) == []
+    service.close()
+
+
+def test_concurrency_is_bounded():
+    embedder = RecordingEmbedder(delay=0.02)
+    service = BatchingEmbeddingService(embedder, max_batch_size=1, max_concurrency=3)
+    service.embed([f"text {i}" for i in range(12)])
+    assert embedder.peak == 3
+    service.close()
+
+
+def test_token_bucket_paces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(15)]
+    # The first five ride the burst, the rest at 10 per second.
+    assert waits[:5] == [0.0] * 5
+    assert clock.now == pytest.approx(1.0)
+    assert bucket.acquire(100) == pytest.approx(0.5)
+
+
+def test_stats_report_padding_and_latency():
+    service = BatchingEmbeddingService(RecordingEmbedder(delay=0.001), max_batch_tokens=64)
+    texts = ["a" * 4, "b" * 400, "c" * 8]
+    service.embed(texts)
+    stats = service.stats()
+    assert stats.texts == 3 and stats.batches == 2
+    assert stats.tokens == sum(estimate_tokens(text) for text in texts)
+    assert 0 < stats.padding_efficiency <= 1
+    assert stats.p50_latency > 0 and stats.p99_latency >= stats.p50_latency
+    assert stats.texts_per_sec > 0
+    service.close()
+
+
+def test_backend_error_propagates():
+    class Failing(RecordingEmbedder):
+        def embed(self, texts):
+            raise RuntimeError("backend unavailable")
+
+    service = BatchingEmbeddingService(Failing())
+    with pytest.raises(RuntimeError, match="backend unavailable"):
+        service.embed(["a", "b"])
+    service.close()
+
+
+def test_wrong_vector_count_is_an_error():
+    class Dropping(RecordingEmbedder):
+        def embed(self, texts):
+            return super().embed(texts)[:-1]
+
+    service = BatchingEmbeddingService(Dropping())
+    with pytest.raises(ValueError, match="returned 1 vectors for 2 texts"):
+        service.embed(["a", "b"])
+    service.close()
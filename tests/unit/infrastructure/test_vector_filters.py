@@ -0,0 +1,85 @@
+"""
+Unit tests for metadata filter compilation and local evaluation.
+"""
+import numpy as np
+import pytest
+
+from libs.shared.vector.filters import compile_filter, containment_filter, filter_mask, matches
+from libs.shared.vector.ivf_index import IVFVectorAdapter
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.mmap_adapter import MmapVectorAdapter
+
+ROWS = [
+    {"tenant": "acme", "lang": "en", "price": 5, "doc": {"kind": "faq"}},
+    {"tenant": "acme", "lang": "de", "price": 20},
+    {"tenant": "globex", "lang": "en", "price": "n/a"},
+    {"tenant": "acme", "flag": True},
+    None,
+]
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"tenant": "acme"}, [True, True, False, True, False]),
+        ({"lang": {"in": ["de", "fr"]}}, [False, True, False, False, False]),
+        ({"price": {"gte": 5, "lt": 20}}, [True, False, False, False, False]),
+        ({"doc.kind": "faq"}, [True, False, False, False, False]),
+        ({"flag": 1}, [False, False, False, False, False]),
+        ({"tenant": "acme", "lang": "en"}, [True, False, False, False, False]),
+        ({}, [True] * 5),
+    ],
+)
+def test_filter_mask(filters, expected):
+    assert filter_mask(ROWS, filters).tolist() == expected
+    assert [matches(row, filters) for row in ROWS] == expected
+
+
+def test_invalid_filters_are_rejected():
+    with pytest.raises(ValueError):
+        filter_mask(ROWS, {"price": {"between": [1, 2]}})
+    with pytest.raises(ValueError):
+        compile_filter({"lang": {"in": "en"}})
+
+
+def test_compile_filter_placeholders_and_params():
+    sql, params = compile_filter({"doc.kind": "faq", "price": {"gt": 1}}, placeholder=lambda i: f"${i}", first_index=3)
+    assert sql.startswith("metadata @> $3::jsonb AND ")
+    assert "$4::text[]" in sql and "$5::text[]" in sql and sql.endswith("> $6")
+    assert params == ['{"doc": {"kind": "faq"}}', ["price"], ["price"], 1]
+    assert compile_filter(None) == ("", [])
+
+
+def test_containment_filter_only_accepts_equality():
+    assert containment_filter({"doc.kind": "faq", "tenant": {"eq": "acme"}}) == {
+        "doc": {"kind": "faq"},
+        "tenant": "acme",
+    }
+    with pytest.raises(ValueError):
+        containment_filter({"price": {"lt": 3}})
+
+
+@pytest.fixture(params=["memory", "mmap", "ivf"])
+def adapter(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryVectorAdapter(dim=8)
+    if request.param == "mmap":
+        return MmapVectorAdapter(str(tmp_path / "mmap"), dim=8, segment_rows=64, scan_rows=16)
+    return IVFVectorAdapter(dim=8, nlist=4, nprobe=4, min_train_size=50)
+
+
+def test_filtered_query_only_returns_matching_rows(adapter):
+    rng = np.random.default_rng(1)
+    corpus = rng.normal(size=(200, 8)).astype(np.float32)
+    ids = [f"v{i}" for i in range(len(corpus))]
+    adapter.upsert(ids, corpus, [{"shard": i % 4} for i in range(len(corpus))])
+    query = corpus[3]
+    hits = adapter.query(query, top_k=5, filters={"shard": 3})
+    assert len(hits) == 5
+    assert hits[0].id == "v3"
+    assert all(hit.metadata["shard"] == 3 for hit in hits)
+
+    adapter.delete(["v3"])
+    hits = adapter.query(query, top_k=5, filters={"shard": 3})
+    assert "v3" not in [hit.id for hit in hits]
+    assert adapter.query(query, top_k=5, filters={"shard": 9}) == []
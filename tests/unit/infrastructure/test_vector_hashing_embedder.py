@@ -0,0 +1,89 @@
+"""
+Unit tests for the feature-hashing embedding backend.
+"""
+import json
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.hashing_embedder import HashingEmbeddingService
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.similarity_search import SimilaritySearch
+from libs.shared.vector.supabase_adapter import SupabaseVectorAdapter
+
+
+def test_vectors_are_normalized_float32():
+    embedder = HashingEmbeddingService(dim=256)
+    matrix = embedder.embed_array(["red running shoe", "Blue denim jacket", "", "!!!"])
+    assert matrix.shape == (4, 256) and matrix.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(matrix[:2], axis=1), 1.0, rtol=1e-5)
+    # No tokens, no features.
+    assert not matrix[2:].any()
+    rows = embedder.embed(["a", "b"])
+    assert all(type(row) is list and type(row[0]) is float for row in rows)
+    np.testing.assert_array_equal(np.asarray(rows, dtype=np.float32), embedder.embed_array(["a", "b"]))
+    assert embedder.embed_array([]).shape == (0, 256)
+
+
+def test_deterministic_and_independent_of_batch():
+    texts = [f"document number {i} about topic {i % 7}" for i in range(300)]
+    first = HashingEmbeddingService().embed_array(texts)
+    second = HashingEmbeddingService().embed_array(list(reversed(texts)))[::-1]
+    np.testing.assert_array_equal(first, second)
+    alone = HashingEmbeddingService().embed_array([texts[123]])[0]
+    np.testing.assert_array_equal(first[123], alone)
+
+
+def test_embed_output_serializes_in_supabase_payloads():
+    embedder = HashingEmbeddingService(dim=8)
+    client = MagicMock()
+    adapter = SupabaseVectorAdapter(url="http://unused", key="unused", client=client)
+    adapter.upsert(["a", "b"], embedder.embed(["red shoe", "blue hat"]), [{}, {}])
+    sent = client.table.return_value.upsert.call_args.args[0]
+    assert json.loads(json.dumps(sent))[0]["embedding"] == pytest.approx(embedder.embed(["red shoe"])[0])
+    adapter.query(embedder.embed(["red shoe"])[0], top_k=1)
+    json.dumps(client.rpc.call_args.args[1])
+
+
+def test_seed_and_dim_change_the_space():
+    base = HashingEmbeddingService(dim=128)
+    assert base.model_id != HashingEmbeddingService(dim=128, seed=1).model_id
+    assert not np.array_equal(base.embed_array(["hello world"]), HashingEmbeddingService(dim=128, seed=1).embed_array(["hello world"]))
+
+
+def test_normalization_matches_tokenize():
+    embedder = HashingEmbeddingService()
+    plain = embedder.embed_array(["quick brown fox jumps"])[0]
+    for variant in ["Quick, brown -- FOX jumps!!", "  quick_brown\tfox\njumps ", "quick brown fox\0jumps"]:
+        np.testing.assert_allclose(embedder.embed_array([variant])[0], plain, rtol=1e-6)
+    # Non-ASCII text takes the regex path and still lowercases and splits the same way.
+    np.testing.assert_allclose(embedder.embed_array(["CAFÉ—crème"])[0], embedder.embed_array(["café crème"])[0], rtol=1e-6)
+
+
+def test_similar_texts_are_closer():
+    embedder = HashingEmbeddingService()
+    query, near, far = embedder.embed_array(["wireless noise cancelling headphones", "noise-cancelling wireless headphone", "organic tomato soup recipe"])
+    assert query @ near > 0.5 > query @ far
+
+
+def test_retrieval_end_to_end():
+    catalogue = {
+        "p1": "trail running shoes with a rock plate",
+        "p2": "waterproof hiking boots",
+        "p3": "cast iron skillet for camping",
+        "p4": "lightweight running shorts",
+        "p5": "stainless steel camping kettle",
+    }
+    embedder = HashingEmbeddingService()
+    adapter = InMemoryVectorAdapter(metric="cosine")
+    adapter.upsert(list(catalogue), embedder.embed(list(catalogue.values())), [{} for _ in catalogue])
+    search = SimilaritySearch(adapter, embedder)
+    assert search.search("running shoes for trails", top_k=1)[0].id == "p1"
+    assert search.search("kettle for camping", top_k=1)[0].id == "p5"
+
+
+@pytest.mark.parametrize("kwargs", [{"dim": 0}, {"word_ngrams": -1}, {"char_ngrams": (4, 3)}])
+def test_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        HashingEmbeddingService(**kwargs)
@@ -0,0 +1,169 @@
+"""
+Unit tests for hybrid lexical + vector retrieval and reciprocal-rank fusion.
+"""
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.hybrid import or_tsquery, reciprocal_rank_fusion, tokenize
+from libs.shared.vector.ivf_index import IVFVectorAdapter
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.mmap_adapter import MmapVectorAdapter
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter
+from libs.shared.vector.pool import ConnectionPool
+from libs.shared.vector.quantization import QuantizedVectorAdapter
+from libs.shared.vector.result_cache import LRUResultCache
+from libs.shared.vector.results import SearchResult
+from libs.shared.vector.similarity_search import SimilaritySearch
+from libs.shared.vector.supabase_adapter import SupabaseVectorAdapter
+
+
+def hits(*ids):
+    return [SearchResult(id=id_, score=float(i)) for i, id_ in enumerate(ids)]
+
+
+class FixedEmbedder:
+    def __init__(self, vector):
+        self.vector = vector
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return [self.vector for _ in texts]
+
+
+def populate(adapter):
+    adapter.upsert(
+        ["doc-1", "doc-2", "doc-3", "SKU-7781"],
+        [[0.0, 0.0], [0.1, 0.0], [0.2, 0.0], [9.0, 9.0]],
+        [
+            {"title": "red running shoes", "tenant": "a"},
+            {"title": "blue running shoes", "tenant": "b"},
+            {"title": "red sandals", "tenant": "a"},
+            {"title": "trail shoe", "tags": ["outdoor", "SKU 7781"], "tenant": "a"},
+        ],
+    )
+    return adapter
+
+
+@pytest.fixture
+def store():
+    return populate(InMemoryVectorAdapter(dim=2, metric="l2"))
+
+
+def test_tokenize_and_or_tsquery():
+    assert tokenize("SKU-7781 Red_shoes!") == ["sku", "7781", "red", "shoes"]
+    assert or_tsquery("red RED shoes") == "red | shoes"
+    assert or_tsquery(" -- ") == ""
+
+
+def test_rrf_weights_and_ties():
+    fused = reciprocal_rank_fusion([hits("a", "b"), hits("b", "c")], (1.0, 1.0), top_k=3, rrf_k=60)
+    assert [hit.id for hit in fused] == ["b", "a", "c"]
+    assert fused[0].score == pytest.approx(-(1 / 62 + 1 / 61))
+    text_heavy = reciprocal_rank_fusion([hits("a", "b"), hits("c")], (1.0, 3.0), top_k=2)
+    assert [hit.id for hit in text_heavy] == ["c", "a"]
+    # Equal fused scores keep first-seen order: the vector ranking's.
+    assert [hit.id for hit in reciprocal_rank_fusion([hits("x"), hits("y")], (1.0, 1.0), top_k=2)] == ["x", "y"]
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([hits("a")], (1.0, 1.0), top_k=1)
+
+
+def test_memory_lexical_query_ranks_by_matched_terms(store):
+    assert [hit.id for hit in store.lexical_query("red shoes", top_k=5)] == ["doc-1", "doc-2", "doc-3"]
+    assert store.lexical_query("red shoes")[0].score == -2.0
+    assert [hit.id for hit in store.lexical_query("sku 7781")] == ["SKU-7781"]
+    assert [hit.id for hit in store.lexical_query("shoes", filters={"tenant": "b"})] == ["doc-2"]
+    assert store.lexical_query("nothing matches") == []
+    store.delete(["doc-1"])
+    store.upsert(["doc-9"], [[0.0, 0.0]], [{"title": "red boots"}])
+    assert [hit.id for hit in store.lexical_query("red")] == ["doc-3", "doc-9"]
+
+
+def test_hybrid_surfaces_exact_identifier_missed_by_vectors(store):
+    assert "SKU-7781" not in [hit.id for hit in store.query([0.0, 0.0], top_k=2)]
+    fused = store.hybrid_query([0.0, 0.0], "SKU-7781", top_k=2)
+    assert [hit.id for hit in fused] == ["SKU-7781", "doc-1"]
+    assert fused[0].metadata["title"] == "trail shoe"
+    vector_only = store.hybrid_query([0.0, 0.0], "SKU-7781", top_k=2, text_weight=0.0)
+    assert [hit.id for hit in vector_only] == ["doc-1", "doc-2"]
+    with pytest.raises(ValueError):
+        store.hybrid_query([0.0, 0.0], "x", vector_weight=0.0, text_weight=0.0)
+
+
+def test_similarity_search_hybrid_uses_cache_and_weights(store):
+    embedder = FixedEmbedder([0.0, 0.0])
+    search = SimilaritySearch(store, embedder, cache=LRUResultCache(), text_weight=2.0)
+    first = search.hybrid_search("red sandals", top_k=2)
+    assert [hit.id for hit in first] == ["doc-3", "doc-1"]
+    assert search.hybrid_search("Red  Sandals", top_k=2) == first
+    assert embedder.calls == 1
+    # A per-call weight is a different cache entry.
+    assert [hit.id for hit in search.hybrid_search("red sandals", top_k=2, text_weight=0.0)] == ["doc-1", "doc-2"]
+    assert embedder.calls == 2
+
+
+def test_pgvector_hybrid_is_one_statement():
+    pool = MagicMock(spec=ConnectionPool)
+    cur = pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [("SKU-7781", -0.032, {"title": "trail shoe"})]
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    results = adapter.hybrid_query([0.5], "SKU-7781", top_k=3, filters={"tenant": "a"}, text_weight=2.0)
+    assert cur.execute.call_count == 1
+    sql, params = cur.execute.call_args[0]
+    assert "FULL OUTER JOIN lexical" in sql and "to_tsquery('simple', %s)" in sql
+    assert params == (
+        "[0.5]", '{"tenant": "a"}', 12,
+        "sku | 7781", '{"tenant": "a"}', 12,
+        1.0, 60, 2.0, 60,
+        3,
+    )
+    assert results == [SearchResult(id="SKU-7781", score=-0.032, metadata={"title": "trail shoe"})]
+
+    cur.execute.reset_mock()
+    assert adapter.lexical_query("?!") == []
+    cur.execute.assert_not_called()
+
+
+def test_supabase_hybrid_calls_rpc():
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value.data = [{"id": "a", "score": -0.03, "metadata": {}}]
+    adapter = SupabaseVectorAdapter(url="http://unused", key="unused", client=client)
+    results = adapter.hybrid_query([0.1], "order 42", top_k=2, filters={"tenant": "a"})
+    name, params = client.rpc.call_args[0]
+    assert name == "hybrid_search"
+    assert params["query_terms"] == "order | 42"
+    assert params["candidates"] == 8
+    assert params["filter"] == {"tenant": "a"}
+    assert [hit.id for hit in results] == ["a"]
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp_path: MmapVectorAdapter(str(tmp_path / "store"), dim=2, metric="l2", segment_rows=2),
+    lambda tmp_path: IVFVectorAdapter(dim=2, nlist=2, metric="l2", min_train_size=3),
+    lambda tmp_path: QuantizedVectorAdapter(dim=2, metric="l2"),
+], ids=["mmap", "ivf", "quantized"])
+def test_local_adapters_support_lexical_and_hybrid(make, tmp_path, store):
+    adapter = populate(make(tmp_path))
+    assert adapter.supports_lexical
+    for text, filters in [("red shoes", None), ("sku 7781", None), ("shoes", {"tenant": "b"}), ("?!", None)]:
+        got = adapter.lexical_query(text, filters=filters, include_embedding=True)
+        expected = store.lexical_query(text, filters=filters, include_embedding=True)
+        assert [(hit.id, hit.score) for hit in got] == [(hit.id, hit.score) for hit in expected]
+        for hit, want in zip(got, expected):
+            np.testing.assert_allclose(hit.embedding, want.embedding, rtol=1e-6)
+    adapter.delete(["doc-1"])
+    assert [hit.id for hit in adapter.lexical_query("red")] == ["doc-3"]
+    assert adapter.hybrid_query([9.0, 9.0], "sku 7781", top_k=1)[0].id == "SKU-7781"
+
+
+def test_hybrid_without_lexical_support_ranks_by_vector_only():
+    class VectorOnly(InMemoryVectorAdapter):
+        lexical_query = None
+
+    adapter = populate(VectorOnly(dim=2, metric="l2"))
+    assert not adapter.supports_lexical
+    results = adapter.hybrid_query([0.0, 0.0], "sku 7781", top_k=2)
+    assert [hit.id for hit in results] == ["doc-1", "doc-2"]
+    assert results[0].score == pytest.approx(-1 / 61)
@@ -0,0 +1,210 @@
+"""
+Unit tests for IndexManager parameter planning, rebuilds and query-time profiles.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from libs.shared.vector.index_manager import (
+    IndexManager,
+    IndexParams,
+    parse_indexdef,
+    plan_index,
+    search_settings,
+)
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter
+from libs.shared.vector.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool():
+    return MagicMock(spec=ConnectionPool)
+
+
+def cursor_of(pool):
+    conn = pool.connection.return_value.__enter__.return_value
+    return conn, conn.cursor.return_value.__enter__.return_value
+
+
+def statements(cur):
+    return [" ".join(call[0][0].split()) for call in cur.execute.call_args_list]
+
+
+def test_plan_index_scales_with_rows():
+    assert plan_index(50_000).method == "hnsw"
+    assert (plan_index(50_000).m, plan_index(50_000).ef_construction) == (16, 64)
+    assert (plan_index(2_000_000).m, plan_index(2_000_000).ef_construction) == (24, 200)
+    assert plan_index(10_000_000).method == "ivfflat"
+    assert plan_index(500_000, method="ivfflat").lists == 500
+    assert plan_index(4_000_000, method="ivfflat").lists == 2000
+    assert plan_index(10, method="ivfflat").lists == 1
+    assert plan_index(10, metric="cosine").opclass == "vector_cosine_ops"
+    with pytest.raises(ValueError):
+        plan_index(10, method="diskann")
+
+
+def test_search_settings_follow_profile_and_index():
+    assert search_settings("fast", 10) == {"hnsw.ef_search": "40"}
+    assert search_settings("balanced", 500) == {"hnsw.ef_search": "500"}
+    assert search_settings("accurate", 5000) == {"hnsw.ef_search": "1000"}
+    ivf = IndexParams("ivfflat", "vector_l2_ops", lists=400)
+    assert search_settings("fast", 10, ivf) == {"ivfflat.probes": "10"}
+    assert search_settings("balanced", 10, ivf) == {"ivfflat.probes": "20"}
+    assert search_settings("accurate", 10, IndexParams("ivfflat", "vector_l2_ops", lists=4)) == {"ivfflat.probes": "4"}
+    with pytest.raises(ValueError):
+        search_settings("exhaustive", 10)
+
+
+def test_parse_indexdef_reads_options_and_defaults():
+    params = parse_indexdef(
+        "CREATE INDEX idx ON public.vectors USING hnsw (embedding vector_l2_ops) WITH (m='24', ef_construction='200')",
+        '{"rows": 1200000}',
+    )
+    assert params == IndexParams("hnsw", "vector_l2_ops", m=24, ef_construction=200, rows=1_200_000)
+    legacy = parse_indexdef("CREATE INDEX idx ON public.vectors USING ivfflat (embedding vector_cosine_ops)")
+    assert (legacy.method, legacy.opclass, legacy.lists, legacy.rows) == ("ivfflat", "vector_cosine_ops", 100, None)
+
+
+def test_needs_rebuild(pool):
+    manager = IndexManager(pool)
+    planned = plan_index(50_000)
+    assert manager.needs_rebuild(planned, None)
+    # The index from migration 001 cannot serve <-> ordering.
+    assert manager.needs_rebuild(planned, IndexParams("ivfflat", "vector_cosine_ops", lists=100))
+    assert not manager.needs_rebuild(planned, IndexParams("hnsw", "vector_l2_ops", m=16, ef_construction=64, rows=0))
+    assert manager.needs_rebuild(plan_index(200_000), IndexParams("hnsw", "vector_l2_ops", m=16, ef_construction=64))
+
+    ivf = IndexManager(pool, method="ivfflat")
+    built = plan_index(100_000, method="ivfflat")
+    assert not ivf.needs_rebuild(plan_index(150_000, method="ivfflat"), built)
+    assert ivf.needs_rebuild(plan_index(200_000, method="ivfflat"), built)
+
+
+def test_rebuild_builds_concurrently_then_swaps(pool):
+    conn, cur = cursor_of(pool)
+    manager = IndexManager(pool, maintenance_work_mem="1GB")
+    params = manager.rebuild(plan_index(50_000))
+    sql = statements(cur)
+    assert sql[1] == "DROP INDEX CONCURRENTLY IF EXISTS idx_vectors_embedding_rebuild"
+    assert sql[3] == (
+        "CREATE INDEX CONCURRENTLY idx_vectors_embedding_rebuild ON vectors "
+        "USING hnsw (embedding vector_l2_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    assert sql[5:9] == [
+        "BEGIN",
+        "ALTER INDEX IF EXISTS idx_vectors_embedding RENAME TO idx_vectors_embedding_retired",
+        "ALTER INDEX idx_vectors_embedding_rebuild RENAME TO idx_vectors_embedding",
+        "COMMIT",
+    ]
+    assert sql[-2] == "DROP INDEX CONCURRENTLY IF EXISTS idx_vectors_embedding_retired"
+    assert sql[-1] == "RESET maintenance_work_mem"
+    assert conn.autocommit is False
+    # The rebuilt parameters are cached for query-time settings.
+    assert manager.current() == params
+    assert manager.search_settings("balanced", 10) == {"hnsw.ef_search": "100"}
+
+
+def test_failed_rebuild_still_resets_maintenance_work_mem(pool):
+    conn, cur = cursor_of(pool)
+
+    def execute(sql, params=None):
+        if sql.startswith("ALTER INDEX idx_vectors_embedding_rebuild"):
+            raise RuntimeError("lock timeout")
+
+    cur.execute.side_effect = execute
+    with pytest.raises(RuntimeError, match="lock timeout"):
+        IndexManager(pool, maintenance_work_mem="1GB").rebuild(plan_index(50_000))
+    sql = statements(cur)
+    assert sql[-2:] == ["ROLLBACK", "RESET maintenance_work_mem"]
+    assert conn.autocommit is False
+
+
+def test_ensure_skips_a_current_index(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchone.side_effect = [
+        (40_000,),
+        ("CREATE INDEX idx ON public.vectors USING hnsw (embedding vector_l2_ops)", '{"rows": 0}', True),
+    ]
+    assert IndexManager(pool).ensure() is None
+    assert statements(cur)[0] == "ANALYZE vectors"
+    assert not any("CREATE INDEX" in sql for sql in statements(cur))
+
+
+def test_ensure_replaces_an_invalid_index(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchone.side_effect = [
+        (-1,),
+        (300_000,),
+        ("CREATE INDEX idx ON public.vectors USING hnsw (embedding vector_l2_ops)", None, False),
+    ]
+    params = IndexManager(pool).ensure()
+    assert (params.m, params.ef_construction, params.rows) == (16, 128, 300_000)
+    assert any(sql.startswith("CREATE INDEX CONCURRENTLY") for sql in statements(cur))
+
+
+def test_manager_rejects_unsafe_identifiers(pool):
+    with pytest.raises(ValueError):
+        IndexManager(pool, table="vectors; DROP TABLE users")
+
+
+def test_adapter_sets_profile_in_query_transaction(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchall.return_value = []
+    manager = IndexManager(pool)
+    manager._set_current(IndexParams("ivfflat", "vector_l2_ops", lists=100))
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool, search_profile="accurate", index_manager=manager)
+    adapter.query([0.5], top_k=3)
+    setting = cur.execute.call_args_list[0][0]
+    assert setting == ("SELECT set_config(%s, %s, true)", ("ivfflat.probes", "40"))
+
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool, quantization="halfvec", rerank=50, dim=1)
+    adapter.search_profile = "fast"
+    adapter._index_manager = IndexManager(pool)
+    adapter._index_manager._set_current(None)
+    cur.execute.reset_mock()
+    adapter.query_batch([[0.5]], top_k=4)
+    assert cur.execute.call_args_list[0][0][1] == ("hnsw.ef_search", "200")
+    with pytest.raises(ValueError):
+        PgVectorAdapter("postgresql://unused", search_profile="slow")
+
+
+def test_profile_lookup_reuses_the_query_connection(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchone.return_value = (
+        "CREATE INDEX idx ON public.vectors USING ivfflat (embedding vector_l2_ops) WITH (lists='400')", None, True
+    )
+    cur.fetchall.return_value = []
+    manager = IndexManager(pool, ttl=0)
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool, search_profile="balanced", index_manager=manager)
+    adapter.query([0.5], top_k=3)
+    # One checkout: the index lookup runs on the cursor the query already holds.
+    assert pool.connection.call_count == 1
+    assert "pg_get_indexdef" in statements(cur)[0]
+    assert cur.execute.call_args_list[1][0][1] == ("ivfflat.probes", "20")
+
+    # A rebuild elsewhere shows up once the cached parameters expire.
+    cur.fetchone.return_value = ("CREATE INDEX idx ON public.vectors USING hnsw (embedding vector_l2_ops)", None, True)
+    cur.execute.reset_mock()
+    adapter.query([0.5], top_k=3)
+    assert cur.execute.call_args_list[1][0][1] == ("hnsw.ef_search", "100")
+
+
+def test_current_is_cached_within_ttl(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchone.return_value = ("CREATE INDEX idx ON public.vectors USING hnsw (embedding vector_l2_ops)", None, True)
+    manager = IndexManager(pool)
+    assert manager.current().method == "hnsw"
+    assert manager.current().method == "hnsw"
+    assert cur.fetchone.call_count == 1
+    assert manager.current(refresh=True).method == "hnsw"
+    assert cur.fetchone.call_count == 2
+
+
+def test_bulk_upsert_ensures_index_when_enabled(pool):
+    manager = MagicMock(spec=IndexManager)
+    PgVectorAdapter("postgresql://unused", pool=pool, index_manager=manager).bulk_upsert(["a"], [[1.0]], [{}])
+    manager.ensure.assert_not_called()
+    PgVectorAdapter("postgresql://unused", pool=pool, index_manager=manager, auto_index=True).bulk_upsert(
+        ["a"], [[1.0]], [{}]
+    )
+    manager.ensure.assert_called_once_with()
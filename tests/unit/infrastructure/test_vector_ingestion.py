@@ -0,0 +1,139 @@
+"""
+Unit tests for the streaming ingestion pipeline.
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from libs.shared.vector.ingestion import Document, IngestionError, IngestionPipeline, split_text
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+
+
+class LengthEmbedder:
+    model_id = "test-length"
+
+    def __init__(self):
+        self.batches = []
+
+    def embed(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FlakyAdapter(InMemoryVectorAdapter):
+    def __init__(self, fail_after=None, delay=0.0):
+        super().__init__(dim=2)
+        self.fail_after = fail_after
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, ids, vectors, metadata):
+        with self.lock:
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise ConnectionError("database went away")
+        time.sleep(self.delay)
+        super().upsert(ids, vectors, metadata)
+
+
+def corpus(n, words=30):
+    return [Document(f"doc{i}", " ".join(f"w{i}_{j}" for j in range(words)), {"source": "test"}) for i in range(n)]
+
+
+def test_split_text_prefers_whitespace_and_overlaps():
+    pieces = split_text("alpha beta gamma delta epsilon", size=12, overlap=4)
+    assert all(len(piece) <= 12 for piece in pieces)
+    assert pieces[0] == "alpha beta"
+    assert "".join(pieces).replace(" ", "").startswith("alphabeta")
+    assert split_text("   ") == []
+    assert split_text("x" * 25, size=10, overlap=0) == ["x" * 10, "x" * 10, "x" * 5]
+    with pytest.raises(ValueError):
+        split_text("text", size=10, overlap=10)
+
+
+def test_pipeline_chunks_embeds_and_upserts_everything():
+    adapter = FlakyAdapter()
+    embedder = LengthEmbedder()
+    pipeline = IngestionPipeline(
+        embedder, adapter, chunk_size=60, chunk_overlap=10, embed_batch_size=8, upsert_batch_size=16, linger=0.01
+    )
+    report = pipeline.run(iter(corpus(40)))
+    assert report.documents == 40 and report.resumed_from == 0
+    assert len(adapter) == report.chunks > 40
+    assert max(embedder.batches) <= 8
+    hit = adapter.lexical_query("w3_0", top_k=1)[0]
+    assert hit.id == "doc3#0"
+    assert hit.metadata["doc_id"] == "doc3" and hit.metadata["source"] == "test" and "w3_0" in hit.metadata["text"]
+    stats = report.stages
+    assert stats["chunk"].items_in == 40
+    assert stats["embed"].items_out == stats["upsert"].items_in == report.chunks
+    assert stats["upsert"].items_per_sec > 0 and stats["embed"].batches >= report.chunks / 8
+
+
+def test_bounded_queues_apply_backpressure_to_the_source():
+    adapter = FlakyAdapter(delay=0.01)
+    pulled = []
+
+    def documents():
+        for document in corpus(60, words=3):
+            pulled.append(document.id)
+            yield document
+
+    pipeline = IngestionPipeline(
+        LengthEmbedder(), adapter, chunk_batch_size=1, embed_batch_size=1, upsert_batch_size=1,
+        embed_workers=1, upsert_workers=1, queue_size=2, linger=0.0,
+    )
+    leads = []
+    runner = threading.Thread(target=lambda: pipeline.run(documents()))
+    runner.start()
+    while runner.is_alive():
+        leads.append(len(pulled) - len(adapter))
+        time.sleep(0.005)
+    runner.join()
+    assert len(adapter) == 60
+    # Three queues of two items plus one item in hand per worker, never the whole corpus.
+    assert max(leads) <= 12
+
+
+def test_failure_checkpoints_complete_prefix_and_resume_finishes(tmp_path):
+    path = str(tmp_path / "ingest.json")
+    options = dict(chunk_size=1000, upsert_batch_size=5, upsert_workers=1, linger=0.0, checkpoint=path)
+    flaky = FlakyAdapter(fail_after=3)
+    with pytest.raises(IngestionError) as excinfo:
+        IngestionPipeline(LengthEmbedder(), flaky, **options).run(corpus(50))
+    assert excinfo.value.stage == "upsert"
+    state = json.load(open(path))
+    done = excinfo.value.documents
+    assert 3 <= done < 50
+    assert state == {"documents": done, "last_id": f"doc{done - 1}"}
+    assert all(f"doc{i}#0" in flaky for i in range(done))
+
+    flaky.fail_after = None
+    report = IngestionPipeline(LengthEmbedder(), flaky, **options).run(corpus(50))
+    assert report.resumed_from == done and report.documents == 50 - done
+    assert len(flaky) == 50
+    assert json.load(open(path)) == {"documents": 50, "last_id": "doc49"}
+
+    with pytest.raises(IngestionError, match="input order changed"):
+        IngestionPipeline(LengthEmbedder(), flaky, **options).run(reversed(corpus(60)))
+
+
+def test_embedder_errors_surface_with_stage_name():
+    class Broken(LengthEmbedder):
+        def embed(self, texts):
+            raise RuntimeError("model unavailable")
+
+    with pytest.raises(IngestionError, match="embed"):
+        IngestionPipeline(Broken(), FlakyAdapter(), linger=0.0).run(corpus(500))
+
+
+def test_pipeline_can_be_rerun():
+    adapter = FlakyAdapter()
+    pipeline = IngestionPipeline(LengthEmbedder(), adapter, linger=0.0)
+    pipeline.run(corpus(5))
+    report = pipeline.run(corpus(8))
+    assert report.documents == 8 and report.stages["chunk"].items_in == 8
+    assert len(adapter) == 8
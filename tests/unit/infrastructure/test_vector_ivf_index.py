@@ -0,0 +1,121 @@
+"""
+Unit tests for the NumPy IVF index and its adapter.
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.evaluation import recall_report
+from libs.shared.vector.ivf_index import IVFIndex, IVFVectorAdapter, minibatch_kmeans, nprobe_sweep
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+
+
+def clustered(n, dim=16, centers=20, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(scale=5.0, size=(centers, dim))
+    return (means[rng.integers(centers, size=n)] + rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_minibatch_kmeans_recovers_separated_clusters():
+    data = np.concatenate([np.full((50, 2), -10.0), np.full((50, 2), 10.0)]).astype(np.float32)
+    data += np.random.default_rng(0).normal(scale=0.1, size=data.shape).astype(np.float32)
+    centroids = minibatch_kmeans(data, 2, batch_size=32, iters=20)
+    assert sorted(np.round(centroids[:, 0]).tolist()) == [-10.0, 10.0]
+
+
+def test_untrained_index_is_exact_and_trains_on_threshold():
+    data = clustered(400)
+    adapter = IVFVectorAdapter(dim=16, nlist=8, nprobe=8, min_train_size=300, metric="l2")
+    adapter.upsert([f"v{i}" for i in range(200)], data[:200], [{}] * 200)
+    assert not adapter.index.trained
+    adapter.upsert([f"v{i}" for i in range(200, 400)], data[200:], [{}] * 200)
+    assert adapter.index.trained
+    assert len(adapter) == 400
+    # Probing every list must reproduce exact search.
+    exact = InMemoryVectorAdapter(metric="l2")
+    exact.upsert([f"v{i}" for i in range(400)], data, [{}] * 400)
+    assert recall_report(adapter, exact, data[:20], top_k=5)["recall_mean"] == 1.0
+
+
+def test_recall_improves_with_nprobe():
+    data = clustered(3000)
+    ids = [f"v{i}" for i in range(len(data))]
+    adapter = IVFVectorAdapter(dim=16, nlist=32, min_train_size=1000)
+    exact = InMemoryVectorAdapter()
+    for store in (adapter, exact):
+        store.upsert(ids, data, [{"i": i} for i in range(len(data))])
+    queries = clustered(30, seed=1)
+    reports = nprobe_sweep(adapter, exact, queries, top_k=10, nprobes=(1, 32))
+    assert reports[0]["recall_mean"] <= reports[1]["recall_mean"] == 1.0
+    assert adapter.index.nprobe == 8
+
+
+def test_upsert_and_delete_keep_locations_consistent():
+    data = clustered(200)
+    adapter = IVFVectorAdapter(dim=16, nlist=4, min_train_size=100, metric="l2")
+    adapter.upsert([f"v{i}" for i in range(200)], data, [{"i": i} for i in range(200)])
+    adapter.delete([f"v{i}" for i in range(0, 200, 2)])
+    adapter.upsert(["v1"], data[:1], [{"i": "moved"}])
+    assert len(adapter) == 100
+    hit = adapter.query(data[0], top_k=1)[0]
+    assert hit.id == "v1" and hit.metadata == {"i": "moved"}
+    for id_ in ("v3", "v199"):
+        assert np.allclose(adapter.index.get(id_), data[int(id_[1:])])
+
+
+def test_retrain_triggered_by_imbalance():
+    index = IVFIndex(dim=2, nlist=4, metric="l2", imbalance_threshold=1.5, growth_threshold=100)
+    spread = np.array([[x, y] for x in (-10, 10) for y in (-10, 10)] * 10, dtype=np.float32)
+    index.add([f"s{i}" for i in range(len(spread))], spread)
+    index.train()
+    assert not index.needs_retrain
+    index.add([f"h{i}" for i in range(200)], np.full((200, 2), 10.0, dtype=np.float32))
+    assert index.needs_retrain
+
+
+def test_train_requires_data():
+    with pytest.raises(ValueError):
+        IVFIndex(dim=4).train()
+
+
+def test_retrain_runs_outside_the_lock_and_keeps_concurrent_writes():
+    data = clustered(300)
+    adapter = IVFVectorAdapter(dim=16, nlist=4, nprobe=4, min_train_size=200, metric="l2")
+    adapter.upsert([f"v{i}" for i in range(199)], data[:199], [{}] * 199)
+    rebuilt = adapter.index.rebuilt
+
+    def rebuild_with_traffic(ids, vectors):
+        # Another thread must be able to query and write while training runs.
+        def traffic():
+            assert adapter.query(data[0], top_k=1)[0].id == "v0"
+            adapter.upsert(["late"], data[250:251], [{"late": True}])
+            adapter.delete(["v1"])
+
+        worker = threading.Thread(target=traffic)
+        worker.start()
+        worker.join(5)
+        assert not worker.is_alive()
+        return rebuilt(ids, vectors)
+
+    adapter.index.rebuilt = rebuild_with_traffic
+    adapter.upsert(["v199"], data[199:200], [{}])
+    assert adapter.index.trained
+    assert len(adapter) == 200 and "late" in adapter.index and "v1" not in adapter.index
+    assert adapter.query(data[250], top_k=1)[0].metadata == {"late": True}
+
+
+def test_grouped_search_matches_per_query_scan():
+    data = clustered(500)
+    index = IVFIndex(dim=16, nlist=8, nprobe=3, metric="cosine")
+    index.add([f"v{i}" for i in range(500)], data)
+    index.train()
+    queries = clustered(12, seed=2)
+    allow = lambda ids: np.array([int(id_[1:]) % 3 != 0 for id_ in ids])
+    hits = index.search(queries, top_k=6, allow=allow)
+    probes = np.argsort(-(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ index.centroids.T, axis=1)[:, :3]
+    for query, lists, row in zip(queries, probes, hits):
+        candidates = [(id_, lst.vectors[pos]) for i in lists for lst in [index._lists[i]] for pos, id_ in enumerate(lst.ids) if allow([id_])[0]]
+        scores = [float(query @ vec / (np.linalg.norm(query) * np.linalg.norm(vec))) for _, vec in candidates]
+        expected = [candidates[i][0] for i in np.argsort(scores)[::-1][:6]]
+        assert [id_ for id_, _ in row] == expected
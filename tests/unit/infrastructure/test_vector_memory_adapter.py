@@ -0,0 +1,93 @@
+"""
+Unit tests for the in-process NumPy vector adapter.
+"""
+import numpy as np
+import pytest
+
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+
+
+def brute_force(corpus, query, metric, k):
+    if metric == "inner_product":
+        scores = corpus @ query
+    elif metric == "cosine":
+        scores = corpus @ query / (np.linalg.norm(corpus, axis=1) * np.linalg.norm(query))
+    else:
+        scores = -np.linalg.norm(corpus - query, axis=1)
+    return list(np.argsort(-scores, kind="stable")[:k])
+
+
+@pytest.mark.parametrize("metric", ["cosine", "inner_product", "l2"])
+def test_query_matches_brute_force(metric):
+    rng = np.random.default_rng(0)
+    corpus = rng.normal(size=(200, 16)).astype(np.float32)
+    adapter = InMemoryVectorAdapter(metric=metric, capacity=8)
+    ids = [f"v{i}" for i in range(len(corpus))]
+    adapter.upsert(ids, corpus, [{"i": i} for i in range(len(corpus))])
+    for query in rng.normal(size=(5, 16)).astype(np.float32):
+        expected = [ids[i] for i in brute_force(corpus, query, metric, 7)]
+        assert [hit.id for hit in adapter.query(query, top_k=7)] == expected
+
+
+def test_upsert_overwrites_existing_ids():
+    adapter = InMemoryVectorAdapter(dim=2)
+    adapter.upsert(["a", "b"], [[1, 0], [0, 1]], [{"v": 1}, {"v": 1}])
+    adapter.upsert(["a"], [[0, 1]], [{"v": 2}])
+    assert len(adapter) == 2
+    hits = adapter.query([0, 1], top_k=2)
+    assert {h.id for h in hits} == {"a", "b"}
+    assert {h.id: h.metadata for h in hits}["a"] == {"v": 2}
+
+
+def test_delete_swap_removes_and_keeps_index_consistent():
+    adapter = InMemoryVectorAdapter(metric="l2")
+    adapter.upsert(["a", "b", "c", "d"], [[0.0], [1.0], [2.0], [3.0]], [{}] * 4)
+    adapter.delete(["b", "missing"])
+    assert len(adapter) == 3
+    assert "b" not in adapter
+    assert adapter.query([3.0], top_k=1)[0].id == "d"
+    assert adapter.query([1.6], top_k=1)[0].id == "c"
+    adapter.upsert(["d"], [[10.0]], [{}])
+    hit = adapter.query([10.0], top_k=1, include_embedding=True)[0]
+    assert (hit.id, hit.embedding) == ("d", [10.0])
+
+
+def test_query_batch_preserves_input_order():
+    adapter = InMemoryVectorAdapter(metric="l2")
+    adapter.upsert(["a", "b"], [[0.0], [5.0]], [{}, {}])
+    results = adapter.query_batch([[5.0], [0.0], [4.0]], top_k=1)
+    assert [r[0].id for r in results] == ["b", "a", "b"]
+
+
+def test_empty_store_and_dimension_checks():
+    adapter = InMemoryVectorAdapter()
+    assert adapter.query([1.0, 2.0]) == []
+    adapter.upsert(["a"], [[1.0, 2.0]], [{}])
+    with pytest.raises(ValueError):
+        adapter.upsert(["b"], [[1.0, 2.0, 3.0]], [{}])
+    with pytest.raises(ValueError):
+        InMemoryVectorAdapter(metric="hamming")
+
+
+@pytest.mark.parametrize(
+    "metric, expected",
+    [("l2", np.sqrt(8)), ("inner_product", -11.0), ("cosine", 1 - 11 / (5 * np.sqrt(5)))],
+)
+def test_scores_are_pgvector_style_distances(metric, expected):
+    adapter = InMemoryVectorAdapter(metric=metric)
+    adapter.upsert(["a"], [[3.0, 4.0]], [{"k": 1}])
+    hit = adapter.query([1.0, 2.0], top_k=1)[0]
+    assert hit.score == pytest.approx(expected, rel=1e-5)
+    if metric == "l2":
+        assert adapter.query([3.0, 4.0], top_k=1)[0].score == pytest.approx(0.0, abs=1e-3)
+
+
+def test_projection_flags():
+    adapter = InMemoryVectorAdapter(dim=2)
+    adapter.upsert(["a"], [[1.0, 0.0]], [{"k": 1}])
+    default = adapter.query([1.0, 0.0], top_k=1)[0]
+    assert default.metadata == {"k": 1} and default.embedding is None
+    lean = adapter.query([1.0, 0.0], top_k=1, include_metadata=False)[0]
+    assert lean.metadata is None and lean.embedding is None
+    full = adapter.query([1.0, 0.0], top_k=1, include_embedding=True)[0]
+    assert full.embedding == [1.0, 0.0]
@@ -0,0 +1,173 @@
+"""
+Unit tests for the search micro-batcher and the /vectors/search endpoint.
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.micro_batcher import SearchBatcher
+from libs.shared.vector.similarity_search import SimilaritySearch
+from libs.shared.vector.sqlmodel import vector_api
+from libs.shared.vector.sqlmodel.vector_api import get_search_batcher, router
+
+
+class CountingEmbedder:
+    model_id = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(text[1:]), 0.0] for text in texts]
+
+
+class CountingAdapter(InMemoryVectorAdapter):
+    def __init__(self):
+        super().__init__(dim=2, metric="l2")
+        self.batches = []
+        self.upsert([f"v{i}" for i in range(10)], [[float(i), 0.0] for i in range(10)], [{"even": i % 2 == 0} for i in range(10)])
+
+    def query_batch(self, vectors, top_k=5, filters=None, include_metadata=True, include_embedding=False):
+        self.batches.append((len(vectors), top_k))
+        return super().query_batch(vectors, top_k, filters, include_metadata, include_embedding)
+
+
+def make_batcher(**kwargs):
+    embedder, adapter = CountingEmbedder(), CountingAdapter()
+    return SearchBatcher(SimilaritySearch(adapter, embedder), **kwargs), embedder, adapter
+
+
+def test_concurrent_requests_share_one_embed_and_one_query():
+    batcher, embedder, adapter = make_batcher(max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(*(batcher.search(f"q{i}", top_k=1 + i % 3) for i in range(9)))
+
+    results = asyncio.run(run())
+    assert len(embedder.calls) == 1 and len(embedder.calls[0]) == 9
+    assert adapter.batches == [(9, 3)]
+    for i, hits in enumerate(results):
+        # Each caller gets its own top_k, trimmed from the shared batch.
+        assert len(hits) == 1 + i % 3
+        assert hits[0].id == f"v{i}"
+    stats = batcher.stats()
+    assert (stats.requests, stats.batches, stats.mean_batch) == (9, 1, 9.0)
+
+
+def test_full_batch_flushes_without_waiting():
+    batcher, embedder, _ = make_batcher(max_wait=10.0, max_batch=4)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.search(f"q{i}") for i in range(8))), 5)
+
+    asyncio.run(run())
+    assert [len(call) for call in embedder.calls] == [4, 4]
+    assert batcher.stats().max_batch_seen == 4
+
+
+def test_requests_with_different_filters_batch_separately():
+    batcher, _, adapter = make_batcher(max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.search("q3", top_k=1, filters={"even": True}),
+            batcher.search("q5", top_k=1, filters={"even": True}),
+            batcher.search("q3", top_k=1),
+        )
+
+    even_a, even_b, plain = asyncio.run(run())
+    assert sorted(adapter.batches) == [(1, 1), (2, 1)]
+    assert even_a[0].id in {"v2", "v4"} and even_b[0].id in {"v4", "v6"}
+    assert plain[0].id == "v3"
+
+
+def test_invalid_filter_fails_only_its_request():
+    batcher, embedder, _ = make_batcher(max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.search("q1", filters={"n": {"$bogus": 1}}), batcher.search("q2", top_k=1), return_exceptions=True
+        )
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert good[0].id == "v2"
+    assert embedder.calls == [["q2"]]
+
+
+def test_batch_error_reaches_every_caller():
+    batcher, embedder, _ = make_batcher(max_wait=0.01)
+
+    def fail(texts):
+        raise RuntimeError("embedding backend down")
+
+    embedder.embed = fail
+
+    async def run():
+        return await asyncio.gather(*(batcher.search(f"q{i}") for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+def test_search_endpoint():
+    batcher, _, _ = make_batcher(max_wait=0.001)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_search_batcher] = lambda: batcher
+    client = TestClient(app)
+
+    response = client.post("/vectors/search", json={"query": "q4", "top_k": 2, "include_embedding": True})
+    assert response.status_code == 200
+    hits = response.json()
+    assert [hit["id"] for hit in hits][0] == "v4"
+    assert hits[0] == {"id": "v4", "score": 0.0, "metadata": {"even": True}, "embedding": [4.0, 0.0]}
+
+    response = client.post("/vectors/search", json={"query": "q4", "filters": {"even": {"$bogus": 1}}})
+    assert response.status_code == 422
+
+
+def test_close_flushes_queued_requests_and_awaits_batches():
+    batcher, embedder, _ = make_batcher(max_wait=10.0)
+
+    async def run():
+        pending = [asyncio.ensure_future(batcher.search(f"q{i}", top_k=1)) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert not batcher._tasks
+        assert all(task.done() for task in pending)
+        return [task.result()[0].id for task in pending]
+
+    assert asyncio.run(run()) == ["v0", "v1", "v2"]
+    assert len(embedder.calls) == 1
+
+
+def test_router_lifespan_creates_and_closes_the_batcher(monkeypatch):
+    batcher, _, _ = make_batcher(max_wait=0.001)
+    closed = []
+    batcher.search_service.vector_db.close = lambda: closed.append(True)
+    monkeypatch.setattr(vector_api, "make_search_batcher", lambda embedder: batcher)
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        assert app.state.search_batcher is batcher
+        assert client.post("/vectors/search", json={"query": "q2", "top_k": 1}).json()[0]["id"] == "v2"
+    assert closed == [True]
+
+
+def test_router_lifespan_uses_the_embedder_dependency():
+    embedder = CountingEmbedder()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[vector_api.get_embedder] = lambda: embedder
+    with TestClient(app):
+        assert app.state.search_batcher.search_service.embedder is embedder
+
+
+@pytest.mark.parametrize("kwargs", [{"max_wait": -1}, {"max_batch": 0}, {"max_concurrency": 0}])
+def test_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        make_batcher(**kwargs)
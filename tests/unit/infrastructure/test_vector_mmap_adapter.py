@@ -0,0 +1,121 @@
+"""
+Unit tests for the memory-mapped segment vector adapter.
+"""
+import numpy as np
+import pytest
+
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.mmap_adapter import MmapVectorAdapter
+
+
+def ids_of(hits):
+    return [hit.id for hit in hits]
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(1)
+    return [f"v{i}" for i in range(50)], rng.normal(size=(50, 8)).astype(np.float32)
+
+
+def test_matches_in_memory_adapter_across_segments(tmp_path, corpus):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=16, scan_rows=5)
+    reference = InMemoryVectorAdapter(dim=8)
+    for adapter in (store, reference):
+        adapter.upsert(ids, vectors, [{"i": i} for i in range(50)])
+    queries = np.random.default_rng(2).normal(size=(4, 8)).astype(np.float32)
+    assert [ids_of(h) for h in store.query_batch(queries, top_k=5)] == [
+        ids_of(h) for h in reference.query_batch(queries, top_k=5)
+    ]
+    assert len(list(tmp_path.glob("seg-*.f32"))) == 4
+
+
+def test_reopen_restores_rows_and_tombstones(tmp_path, corpus):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=16)
+    store.upsert(ids, vectors, [{"i": i} for i in range(50)])
+    store.delete(["v3"])
+    store.upsert(["v4"], vectors[:1], [{"i": "moved"}])
+    store.close()
+
+    reader = MmapVectorAdapter(str(tmp_path), read_only=True)
+    assert len(reader) == 49
+    assert "v3" not in reader
+    hit = reader.query(vectors[0], top_k=2)
+    assert set(ids_of(hit)) == {"v0", "v4"}
+    assert {h.id: h.metadata for h in hit}["v4"] == {"i": "moved"}
+    with pytest.raises(PermissionError):
+        reader.upsert(["x"], vectors[:1], [{}])
+
+
+def test_compaction_merges_segments_and_preserves_results(tmp_path, corpus):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=16)
+    store.upsert(ids, vectors, [{}] * 50)
+    store.delete(ids[:30])
+    before = [ids_of(store.query(q, top_k=5)) for q in vectors[30:35]]
+    assert store.compact(min_dead_ratio=0.5) == 30
+    after = [ids_of(store.query(q, top_k=5)) for q in vectors[30:35]]
+    assert before == after
+    assert len(store) == 20
+
+    reopened = MmapVectorAdapter(str(tmp_path))
+    assert [ids_of(reopened.query(q, top_k=5)) for q in vectors[30:35]] == before
+    assert len(list(tmp_path.glob("seg-*.f32"))) == 3
+
+
+def test_upsert_after_compacting_the_last_segment(tmp_path, corpus):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=4)
+    store.upsert(ids[:4], vectors[:4], [{}] * 4)
+    store.delete(ids[:2])
+    # The full last segment is merged into a sealed, half-filled one.
+    assert store.compact() == 2
+    store.upsert([ids[2], ids[10]], vectors[[20, 10]], [{"v": 2}, {}])
+    assert len(store) == 3
+    hit = store.query(vectors[20], top_k=1)[0]
+    assert (hit.id, hit.metadata) == (ids[2], {"v": 2})
+
+    reopened = MmapVectorAdapter(str(tmp_path))
+    assert sorted(ids_of(reopened.query(vectors[0], top_k=5))) == sorted([ids[2], ids[3], ids[10]])
+
+
+def test_reopen_never_appends_to_a_merged_segment(tmp_path, corpus):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=4)
+    store.upsert(ids[:4], vectors[:4], [{}] * 4)
+    store.delete(ids[:2])
+    store.compact()
+    store.close()
+
+    reopened = MmapVectorAdapter(str(tmp_path))
+    merged = reopened._segments[-1]
+    assert not merged.writable
+    reopened.upsert([ids[10]], vectors[10:11], [{}])
+    assert merged.count == 2 and len(reopened._segments) == 2
+    assert sorted(ids_of(reopened.query(vectors[0], top_k=5))) == sorted([ids[2], ids[3], ids[10]])
+
+
+def test_failed_upsert_keeps_the_previous_version(tmp_path, corpus, monkeypatch):
+    ids, vectors = corpus
+    store = MmapVectorAdapter(str(tmp_path), dim=8, segment_rows=4)
+    store.upsert(ids[:4], vectors[:4], [{"v": 1}] * 4)
+
+    def full_disk(self):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(MmapVectorAdapter, "_active_segment", full_disk)
+    with pytest.raises(OSError):
+        store.upsert([ids[0]], vectors[20:21], [{"v": 2}])
+    monkeypatch.undo()
+    hit = store.query(vectors[0], top_k=1)[0]
+    assert (hit.id, hit.metadata) == (ids[0], {"v": 1})
+    assert len(MmapVectorAdapter(str(tmp_path))) == 4
+
+
+def test_new_store_requires_dimension(tmp_path):
+    with pytest.raises(ValueError):
+        MmapVectorAdapter(str(tmp_path / "store"))
+    with pytest.raises(FileNotFoundError):
+        MmapVectorAdapter(str(tmp_path / "missing"), read_only=True)
@@ -0,0 +1,89 @@
+"""
+Unit tests for PgVectorAdapter SQL paths, run against a mocked connection pool.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter, _CopyStream, _copy_rows
+from libs.shared.vector.pool import ConnectionPool
+from libs.shared.vector.results import SearchResult
+
+
+@pytest.fixture
+def pool():
+    return MagicMock(spec=ConnectionPool)
+
+
+def cursor_of(pool):
+    conn = pool.connection.return_value.__enter__.return_value
+    return conn, conn.cursor.return_value.__enter__.return_value
+
+
+def test_copy_rows_escape_text_format():
+    rows = list(_copy_rows(["a\tb"], [[1, 2.5]], [{"note": "line\nbreak"}]))
+    assert rows == ['0\ta\\tb\t[1.0,2.5]\t{"note": "line\\\\nbreak"}\n']
+    assert list(_copy_rows(["x"], [[0.0]], [None]))[0].endswith("\t\\N\n")
+
+
+def test_copy_stream_reads_in_chunks():
+    stream = _CopyStream(iter(["abc\n", "defg\n"]))
+    assert stream.read(5) == "abc\nd"
+    assert stream.read(100) == "efg\n"
+    assert stream.read(100) == ""
+
+
+def test_bulk_upsert_copies_each_batch(pool):
+    conn, cur = cursor_of(pool)
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    ids = [f"id{i}" for i in range(5)]
+    stats = adapter.bulk_upsert(ids, [[float(i)] for i in range(5)], [{}] * 5, batch_size=2)
+    assert cur.copy_expert.call_count == 3
+    # one commit for the staging table, then one per batch
+    assert conn.commit.call_count == 4
+    assert stats.rows == 5
+    assert stats.batches == 3
+    assert stats.rows_per_sec > 0
+
+
+def test_query_batch_is_one_statement_in_input_order(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchall.return_value = [(1, "a", 0.0, {}), (1, "b", 0.1, {}), (3, "c", 0.2, {})]
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    results = adapter.query_batch([[0.0], [5.0], [0.2]], top_k=2)
+    assert cur.execute.call_count == 1
+    assert cur.execute.call_args[0][1] == (["[0.0]", "[5.0]", "[0.2]"], 2)
+    assert [[hit.id for hit in hits] for hits in results] == [["a", "b"], [], ["c"]]
+
+
+def test_query_pushes_filters_into_where_clause(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchall.return_value = []
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    adapter.query([0.5], top_k=3, filters={"tenant": "acme", "price": {"lt": 10}})
+    sql, params = cur.execute.call_args[0]
+    assert "WHERE metadata @> %s::jsonb AND" in sql
+    assert params == ("[0.5]", '{"tenant": "acme"}', ["price"], ["price"], 10, 3)
+
+
+def test_query_batch_filter_params_follow_query_array(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchall.return_value = []
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    adapter.query_batch([[0.0], [1.0]], top_k=2, filters={"lang": {"in": ["en", "de"]}})
+    params = cur.execute.call_args[0][1]
+    assert params == (["[0.0]", "[1.0]"], '{"lang": "en"}', '{"lang": "de"}', 2)
+
+
+def test_query_selects_only_requested_columns(pool):
+    _, cur = cursor_of(pool)
+    cur.fetchall.return_value = [("a", 0.25, "[1,2]")]
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    hits = adapter.query([1.0, 2.0], top_k=1, include_metadata=False, include_embedding=True)
+    sql = cur.execute.call_args[0][0]
+    assert "AS distance, embedding\n" in sql and "metadata" not in sql
+    assert hits == [SearchResult(id="a", score=0.25, embedding=[1.0, 2.0])]
+
+    adapter.query([1.0, 2.0], top_k=1)
+    sql = cur.execute.call_args[0][0]
+    assert "AS distance, metadata\n" in sql
@@ -0,0 +1,120 @@
+"""
+Unit tests for the pgvector connection pool.
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter
+from libs.shared.vector.results import SearchResult
+from libs.shared.vector.pool import ConnectionPool, PoolClosed, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    kwargs.setdefault("health_check", lambda conn: True)
+    return ConnectionPool(connect, **kwargs), created
+
+
+def test_pool_reuses_connections():
+    pool, created = make_pool(min_size=0, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats().checkouts == 2
+
+
+def test_pool_prefills_min_size():
+    pool, created = make_pool(min_size=3, max_size=5)
+    stats = pool.stats()
+    assert len(created) == 3
+    assert stats.idle == 3
+    assert stats.in_use == 0
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=0.05)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats().timeouts == 1
+    pool.putconn(conn)
+
+
+def test_pool_hands_released_connection_to_waiter():
+    pool, created = make_pool(min_size=0, max_size=1, timeout=5)
+    conn = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    pool.putconn(conn)
+    waiter.join(timeout=5)
+    assert got == [conn]
+    assert len(created) == 1
+
+
+def test_pool_replaces_unhealthy_connection():
+    pool, created = make_pool(min_size=1, max_size=1, health_check=lambda conn: conn is not created[0])
+    with pool.connection() as conn:
+        assert conn is created[1]
+    assert pool.stats().discarded == 1
+
+
+def test_pool_evicts_idle_connections_above_min_size():
+    pool, created = make_pool(min_size=1, max_size=3, max_idle=0.0)
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    with pool.connection():
+        pass
+    assert pool.stats().size == 1
+    assert sum(c.closed for c in created) == 1
+
+
+def test_pool_rolls_back_on_error():
+    pool, created = make_pool(min_size=1, max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("boom")
+    assert created[0].rollbacks == 1
+    assert pool.stats().idle == 1
+
+
+def test_closed_pool_rejects_checkouts():
+    pool, created = make_pool(min_size=2, max_size=2)
+    pool.close()
+    assert all(c.closed for c in created)
+    with pytest.raises(PoolClosed):
+        pool.getconn()
+
+
+def test_pgvector_adapter_uses_pool():
+    pool = MagicMock(spec=ConnectionPool)
+    conn = pool.connection.return_value.__enter__.return_value
+    conn.cursor.return_value.__enter__.return_value.fetchall.return_value = [("doc1", 0.0, {})]
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool)
+    assert adapter.query([0.1], top_k=1) == [SearchResult(id="doc1", score=0.0, metadata={})]
+    adapter.close()
+    pool.close.assert_called_once()
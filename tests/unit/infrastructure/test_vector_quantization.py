@@ -0,0 +1,90 @@
+"""
+Unit tests for quantized vector storage and full-precision rerank.
+"""
+import numpy as np
+import pytest
+
+from libs.shared.vector.evaluation import recall_report
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.pgvector_adapter import PgVectorAdapter
+from libs.shared.vector.quantization import BinaryQuantizer, Int8Quantizer, QuantizedVectorAdapter
+
+
+def clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(100, dim))
+    data = centers[rng.integers(0, 100, n)] + 0.3 * rng.normal(size=(n, dim))
+    return data.astype(np.float32)
+
+
+@pytest.mark.parametrize(
+    "quantization, compression, min_recall",
+    [("float16", 2, 0.99), ("int8", 4, 0.99), ("binary", 32, 0.95)],
+)
+def test_rerank_keeps_recall_and_shrinks_codes(quantization, compression, min_recall):
+    data = clustered(2000, 128)
+    ids = [f"v{i}" for i in range(len(data))]
+    exact = InMemoryVectorAdapter(dim=128)
+    exact.upsert(ids, data, [{}] * len(ids))
+    quantized = QuantizedVectorAdapter(dim=128, quantization=quantization, rerank=4)
+    quantized.upsert(ids, data, [{}] * len(ids))
+
+    memory = quantized.memory_bytes()
+    assert memory["compression"] == compression
+    # Full-precision rows stay in the scratch file; only codes and norms are on the heap.
+    assert isinstance(quantized._vectors, np.memmap)
+    assert memory["resident"] == quantized._codes.nbytes + quantized._sq_norms.nbytes < memory["full_precision"]
+    queries = data[:30] + 0.1 * np.random.default_rng(1).normal(size=(30, 128)).astype(np.float32)
+    report = recall_report(quantized, exact, queries, top_k=10)
+    assert report["recall_mean"] >= min_recall
+
+    hit = quantized.query(data[7], top_k=1)[0]
+    assert hit.id == "v7" and hit.score == pytest.approx(0.0, abs=1e-5)
+
+
+def test_memmap_rerank_store_survives_growth_and_deletes(tmp_path):
+    data = clustered(300, 16)
+    ids = [f"v{i}" for i in range(len(data))]
+    store = QuantizedVectorAdapter(dim=16, quantization="int8", capacity=8, path=str(tmp_path / "full.f32"))
+    for start in range(0, 300, 50):
+        store.upsert(ids[start:start + 50], data[start:start + 50], [{"i": i} for i in range(start, start + 50)])
+    assert isinstance(store._vectors, np.memmap)
+    store.delete(["v0", "v1"])
+    assert len(store) == 298
+    hit = store.query(data[299], top_k=1, include_embedding=True)[0]
+    assert hit.id == "v299" and hit.metadata == {"i": 299}
+    np.testing.assert_allclose(hit.embedding, data[299], rtol=1e-6)
+    assert "v0" not in [h.id for h in store.query(data[0], top_k=5)]
+
+
+def test_int8_refits_as_store_grows():
+    store = QuantizedVectorAdapter(dim=2, quantization="int8")
+    store.upsert(["a"], [[0.0, 0.0]], [{}])
+    store.upsert(["b", "c"], [[10.0, -10.0], [5.0, 5.0]], [{}, {}])
+    assert store._fitted_rows == 3
+    np.testing.assert_allclose(store.quantizer.offset, [0.0, -10.0])
+    assert store.query([10.0, -10.0], top_k=1)[0].id == "b"
+
+
+def test_quantizer_codes():
+    codes = BinaryQuantizer().encode(np.array([[1.0, -1.0] * 8], dtype=np.float32))
+    assert codes.tolist() == [[0b10101010, 0b10101010]]
+    int8 = Int8Quantizer()
+    int8.fit(np.array([[0.0], [255.0]], dtype=np.float32))
+    assert int8.encode(np.array([[0.0], [128.0], [400.0]], dtype=np.float32)).ravel().tolist() == [-128, 0, 127]
+
+
+def test_pgvector_quantized_query_reranks_candidates():
+    from unittest.mock import MagicMock
+    from libs.shared.vector.pool import ConnectionPool
+
+    pool = MagicMock(spec=ConnectionPool)
+    cur = pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = []
+    adapter = PgVectorAdapter("postgresql://unused", pool=pool, quantization="binary", rerank=5, dim=2)
+    adapter.query([1.0, 0.0], top_k=3)
+    sql, params = cur.execute.call_args[0]
+    assert "binary_quantize(embedding)::bit(2) <~> binary_quantize(%s::vector)" in sql
+    assert params == ("[1.0,0.0]", "[1.0,0.0]", 15, 3)
+    with pytest.raises(ValueError):
+        PgVectorAdapter("postgresql://unused", quantization="int8")
@@ -0,0 +1,102 @@
+"""
+Unit tests for the SimilaritySearch result cache.
+"""
+from unittest.mock import MagicMock
+
+from libs.shared.vector.embedding_service import EmbeddingService
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.result_cache import LRUResultCache, normalize_query
+from libs.shared.vector.similarity_search import SimilaritySearch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("  Hello\tWORLD \n") == "hello world"
+    assert normalize_query("ＳＫＵ-１２") == "sku-12"
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUResultCache(max_entries=2, ttl=None)
+    cache.put("a", 0, [1])
+    cache.put("b", 0, [2])
+    assert cache.get("a", 0) == [1]
+    cache.put("c", 0, [3])
+    assert cache.get("b", 0) is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 1, 1, 2)
+
+
+def test_ttl_and_generation_invalidate_entries():
+    clock = FakeClock()
+    cache = LRUResultCache(ttl=10, clock=clock)
+    cache.put("a", 0, [])
+    assert cache.get("a", 0) == []
+    assert cache.get("a", 1) is None
+    cache.put("a", 1, [])
+    clock.now = 11
+    assert cache.get("a", 1) is None
+    assert cache.stats().stale == 2
+
+
+def test_memory_cap_evicts_oldest():
+    cache = LRUResultCache(max_bytes=1500, ttl=None)
+    cache.put("a", 0, ["x" * 800])
+    cache.put("b", 0, ["y" * 800])
+    assert cache.stats().bytes <= 1500
+    assert cache.get("a", 0) is None
+    cache.put("huge", 0, ["z" * 5000])
+    assert cache.get("huge", 0) is None
+
+
+def test_search_serves_cached_results_until_write():
+    adapter = InMemoryVectorAdapter(dim=1536, metric="l2")
+    adapter.upsert(["a"], [[0.5] * 1536], [{}])
+    embedder = MagicMock(spec=EmbeddingService)
+    embedder.embed.side_effect = lambda texts: [[1.0] * 1536 for _ in texts]
+    cache = LRUResultCache()
+    search = SimilaritySearch(adapter, embedder, cache=cache)
+
+    first = search.search("Widget  SKU", top_k=1)
+    assert search.search("widget sku", top_k=1) == first
+    assert embedder.embed.call_count == 1
+    # The raw text is embedded, as it is without a cache.
+    assert embedder.embed.call_args[0][0] == ["Widget  SKU"]
+
+    adapter.upsert(["b"], [[1.0] * 1536], [{}])
+    assert search.search("widget sku", top_k=1)[0].id == "b"
+    assert embedder.embed.call_count == 2
+    assert cache.stats().stale == 1
+
+
+def test_search_batch_only_embeds_misses():
+    adapter = InMemoryVectorAdapter(dim=2)
+    adapter.upsert(["a"], [[1.0, 0.0]], [{}])
+    embedder = MagicMock(spec=EmbeddingService)
+    embedder.embed.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    search = SimilaritySearch(adapter, embedder, cache=LRUResultCache())
+    search.search("one", top_k=1)
+    results = search.search_batch(["one", "TWO", "two"], top_k=1)
+    assert [r[0].id for r in results] == ["a", "a", "a"]
+    assert embedder.embed.call_args[0][0] == ["TWO"]
+
+
+def test_cache_does_not_change_the_embedded_text():
+    adapter = InMemoryVectorAdapter(dim=2)
+    adapter.upsert(["a"], [[1.0, 0.0]], [{"text": "Widget"}])
+    embedder = MagicMock(spec=EmbeddingService)
+    embedder.embed.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    seen = []
+    for make_cache in (lambda: None, LRUResultCache):
+        embedder.embed.reset_mock()
+        SimilaritySearch(adapter, embedder, cache=make_cache()).search("Ｗidget  SKU", top_k=1)
+        SimilaritySearch(adapter, embedder, cache=make_cache()).hybrid_search("Ｗidget  SKU", top_k=1)
+        SimilaritySearch(adapter, embedder, cache=make_cache()).search_batch(["Ｗidget  SKU"], top_k=1)
+        seen.append([call.args[0] for call in embedder.embed.call_args_list])
+    assert seen[0] == seen[1] == [["Ｗidget  SKU"]] * 3
@@ -0,0 +1,76 @@
+"""
+Unit tests for synthetic vector seeding, with a fake bulk-upsert adapter.
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.pgvector_adapter import BulkUpsertStats
+from libs.shared.vector.sqlmodel import seed_vectors
+from libs.shared.vector.sqlmodel.seed_vectors import generate_blocks, seed
+
+
+class RecordingAdapter:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.active = 0
+        self.peak = 0
+
+    def bulk_upsert(self, ids, vectors, metadata):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            for id_, vector, meta in zip(ids, vectors, metadata):
+                self.rows[id_] = (np.asarray(vector), meta)
+        return BulkUpsertStats(rows=len(ids), batches=1, seconds=self.delay)
+
+
+def test_import_has_no_side_effects():
+    assert not hasattr(seed_vectors, "engine")
+    assert not hasattr(seed_vectors, "example_vectors")
+
+
+def test_uniform_blocks_are_bounded_and_reproducible():
+    blocks = list(generate_blocks(25, dim=8, block_size=10))
+    assert [(offset, len(vectors)) for offset, vectors, _ in blocks] == [(0, 10), (10, 10), (20, 5)]
+    data = np.concatenate([vectors for _, vectors, _ in blocks])
+    assert data.dtype == np.float32 and data.min() >= 0.0 and data.max() < 1.0
+    again = np.concatenate([vectors for _, vectors, _ in generate_blocks(25, dim=8, block_size=10)])
+    assert np.array_equal(data, again)
+    other = np.concatenate([vectors for _, vectors, _ in generate_blocks(25, dim=8, block_size=10, seed=1)])
+    assert not np.array_equal(data, other)
+
+
+def test_clustered_blocks_stay_near_their_centre():
+    offset, vectors, labels = next(generate_blocks(2000, dim=32, distribution="clustered", block_size=2000, clusters=4, spread=0.01))
+    assert set(labels) == {0, 1, 2, 3}
+    for label in range(4):
+        members = vectors[labels == label]
+        centre = members.mean(axis=0)
+        assert np.linalg.norm(centre) == pytest.approx(1.0, abs=0.01)
+        assert np.linalg.norm(members - centre, axis=1).max() < 0.2
+    with pytest.raises(ValueError):
+        next(generate_blocks(10, distribution="zipf"))
+
+
+def test_seed_loads_every_row_with_parallel_workers():
+    adapter = RecordingAdapter(delay=0.02)
+    reports = []
+    stats = seed(
+        adapter, 1050, dim=4, distribution="clustered", clusters=3, block_size=100, workers=4,
+        progress=lambda done, total, seconds: reports.append((done, total)),
+    )
+    assert stats.rows == 1050 and stats.batches == 11 and stats.rows_per_sec > 0
+    assert set(adapter.rows) == {f"seed_{i}" for i in range(1050)}
+    assert adapter.peak > 1
+    assert reports[-1] == (1050, 1050)
+    assert [done for done, _ in reports] == sorted(done for done, _ in reports)
+    vector, meta = adapter.rows["seed_7"]
+    assert vector.shape == (4,) and meta["label"] == f"clustered_{meta['cluster']}"
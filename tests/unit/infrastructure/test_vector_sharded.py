@@ -0,0 +1,150 @@
+"""
+Unit tests for the sharded scatter-gather vector adapter.
+"""
+import threading
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from libs.shared.vector.memory_adapter import InMemoryVectorAdapter
+from libs.shared.vector.result_cache import LRUResultCache
+from libs.shared.vector.sharded_adapter import HashRing, ShardedVectorAdapter
+from libs.shared.vector.similarity_search import SimilaritySearch
+
+
+class SlowShard(InMemoryVectorAdapter):
+    def __init__(self, release: threading.Event):
+        super().__init__(dim=2, metric="l2")
+        self.release = release
+
+    def query(self, *args, **kwargs):
+        self.release.wait(5)
+        return super().query(*args, **kwargs)
+
+
+class BrokenShard(InMemoryVectorAdapter):
+    def query(self, *args, **kwargs):
+        raise ConnectionError("shard down")
+
+
+def populate(adapter, n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((n, 2), dtype=np.float32)
+    ids = [f"doc{i}" for i in range(n)]
+    adapter.upsert(ids, vectors.tolist(), [{"i": i, "even": i % 2 == 0} for i in range(n)])
+    return ids, vectors
+
+
+def test_ring_is_stable_and_balanced():
+    ring = HashRing(4)
+    counts = Counter(ring.shard_for(f"id{i}") for i in range(20_000))
+    assert set(counts) == {0, 1, 2, 3}
+    assert max(counts.values()) < 1.5 * min(counts.values())
+    assert [HashRing(4).shard_for(f"id{i}") for i in range(100)] == [ring.shard_for(f"id{i}") for i in range(100)]
+
+
+def test_adding_a_shard_moves_few_ids():
+    before, after = HashRing(4), HashRing(5)
+    moved = sum(before.shard_for(f"id{i}") != after.shard_for(f"id{i}") for i in range(10_000))
+    # Ideal is 1/5 of the ids; a modulo hash would move about 4/5.
+    assert moved < 0.3 * 10_000
+
+
+def test_writes_route_to_one_shard_per_id():
+    shards = [InMemoryVectorAdapter(dim=2, metric="l2") for _ in range(3)]
+    adapter = ShardedVectorAdapter(shards)
+    ids, _ = populate(adapter)
+    assert sum(len(shard) for shard in shards) == len(ids)
+    for id_ in ids:
+        assert id_ in shards[adapter.shard_for(id_)]
+    adapter.delete(ids[:10])
+    assert sum(len(shard) for shard in shards) == len(ids) - 10
+    assert adapter.generation == 2
+
+
+def test_query_matches_a_single_store():
+    adapter = ShardedVectorAdapter([InMemoryVectorAdapter(dim=2, metric="l2") for _ in range(4)])
+    reference = InMemoryVectorAdapter(dim=2, metric="l2")
+    populate(adapter)
+    populate(reference)
+    rng = np.random.default_rng(1)
+    queries = rng.random((5, 2), dtype=np.float32).tolist()
+    for query in queries:
+        results = adapter.query(query, top_k=7, filters={"even": True})
+        assert [r.id for r in results] == [r.id for r in reference.query(query, top_k=7, filters={"even": True})]
+        assert not results.partial
+    batched = adapter.query_batch(queries, top_k=3)
+    assert [[r.id for r in hits] for hits in batched] == [[r.id for r in reference.query(q, top_k=3)] for q in queries]
+
+
+def test_slow_shard_yields_partial_results():
+    release = threading.Event()
+    fast = InMemoryVectorAdapter(dim=2, metric="l2")
+    slow = SlowShard(release)
+    adapter = ShardedVectorAdapter([fast, slow], timeout=0.05)
+    populate(adapter)
+    try:
+        results = adapter.query([0.5, 0.5], top_k=5)
+        assert results.partial and results.missing == (1,)
+        assert results and all(r.id in fast for r in results)
+        adapter.strict = True
+        with pytest.raises(TimeoutError):
+            adapter.query([0.5, 0.5])
+    finally:
+        release.set()
+        adapter.close()
+
+
+def test_failed_shard_is_skipped_unless_all_fail():
+    adapter = ShardedVectorAdapter([InMemoryVectorAdapter(dim=2, metric="l2"), BrokenShard(dim=2, metric="l2")])
+    populate(adapter)
+    results = adapter.query([0.5, 0.5], top_k=3)
+    assert results.missing == (1,) and len(results) == 3
+    with pytest.raises(ConnectionError):
+        ShardedVectorAdapter([BrokenShard(dim=2)]).query([0.5, 0.5])
+
+
+def test_hybrid_query_fuses_global_rankings():
+    adapter = ShardedVectorAdapter([InMemoryVectorAdapter(dim=2, metric="l2") for _ in range(3)])
+    adapter.upsert(["sku-1234", "a", "b"], [[0.9, 0.9], [0.1, 0.1], [0.2, 0.2]], [{"name": "red shoe"}, {}, {}])
+    results = adapter.hybrid_query([0.1, 0.1], "sku 1234", top_k=2)
+    assert {r.id for r in results} == {"sku-1234", "a"}
+
+
+class FlakyShard(InMemoryVectorAdapter):
+    def __init__(self):
+        super().__init__(dim=2, metric="l2")
+        self.down = True
+
+    def query_batch(self, *args, **kwargs):
+        if self.down:
+            raise ConnectionError("shard down")
+        return super().query_batch(*args, **kwargs)
+
+
+class FixedEmbedder:
+    def embed(self, texts):
+        return [[0.5, 0.5] for _ in texts]
+
+
+def test_partial_results_are_not_cached():
+    flaky = FlakyShard()
+    adapter = ShardedVectorAdapter([InMemoryVectorAdapter(dim=2, metric="l2"), flaky])
+    populate(adapter)
+    search = SimilaritySearch(adapter, FixedEmbedder(), cache=LRUResultCache())
+    complete = InMemoryVectorAdapter(dim=2, metric="l2")
+    populate(complete)
+    expected = [r.id for r in complete.query([0.5, 0.5], top_k=5)]
+
+    first = search.search("q", top_k=5)
+    assert first.partial
+    assert search.hybrid_search("q", top_k=5).partial
+    assert search.search_batch(["q"], top_k=5)[0].partial
+    assert search.cache.stats().entries == 0
+    # Once the shard recovers, the repeated query sees it instead of a cached partial answer.
+    flaky.down = False
+    assert [r.id for r in search.search("q", top_k=5)] == expected
+    assert [[r.id for r in hits] for hits in search.search_batch(["q"], top_k=5)] == [expected]
+    assert not search.hybrid_search("q", top_k=5).partial
+    assert search.cache.stats().entries == 2
@@ -0,0 +1,111 @@
+"""
+Unit tests for chunked Supabase vector writes, run against a mocked client.
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from libs.shared.vector.async_supabase_adapter import AsyncSupabaseVectorAdapter
+from libs.shared.vector.chunking import PartialWriteError, chunk_records, record_size
+from libs.shared.vector.supabase_adapter import SupabaseVectorAdapter
+
+
+def records(n, dim=4):
+    return [{"id": f"id{i}", "embedding": [0.5] * dim, "metadata": {}} for i in range(n)]
+
+
+def test_chunk_records_bounds_rows_and_bytes():
+    rows = records(10)
+    assert [len(c) for c in chunk_records(rows, max_rows=4, max_bytes=10**6)] == [4, 4, 2]
+    size = record_size(rows[0])
+    assert [len(c) for c in chunk_records(rows, max_rows=100, max_bytes=3 * size)] == [3, 3, 3, 1]
+    # an oversized record still goes out, alone
+    assert [len(c) for c in chunk_records(rows[:2], max_rows=100, max_bytes=1)] == [1, 1]
+
+
+def sync_adapter(**options):
+    client = MagicMock()
+    return SupabaseVectorAdapter(url="http://unused", key="unused", client=client, **options), client
+
+
+def test_upsert_sends_bounded_chunks_concurrently():
+    adapter, client = sync_adapter(chunk_size=2, parallelism=3)
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def upsert(chunk):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return MagicMock()
+
+    client.table.return_value.upsert.side_effect = upsert
+    assert adapter.upsert([f"id{i}" for i in range(9)], [[0.0]] * 9, [{}] * 9) is None
+    sent = [call.args[0] for call in client.table.return_value.upsert.call_args_list]
+    assert sorted(len(chunk) for chunk in sent) == [1, 2, 2, 2, 2]
+    assert 1 < active["peak"] <= 3
+    assert adapter.generation == 1
+
+
+def test_failed_chunks_are_reported_without_resending_others():
+    adapter, client = sync_adapter(chunk_size=2)
+
+    def upsert(chunk):
+        if chunk[0]["id"] == "id2":
+            raise TimeoutError("gateway timeout")
+        return MagicMock()
+
+    client.table.return_value.upsert.side_effect = upsert
+    with pytest.raises(PartialWriteError) as excinfo:
+        adapter.upsert([f"id{i}" for i in range(5)], [[0.0]] * 5, [{}] * 5)
+    report = excinfo.value.report
+    assert report.failed_ids == ["id2", "id3"]
+    assert report.rows == 3
+    assert client.table.return_value.upsert.call_count == 3
+    assert adapter.generation == 1
+
+
+def test_delete_uses_chunked_in_filter():
+    adapter, client = sync_adapter(delete_chunk_size=2)
+    assert adapter.delete(["a", "b", "c"]) is None
+    in_calls = client.table.return_value.delete.return_value.in_.call_args_list
+    assert sorted(call.args[1] for call in in_calls) == [["a", "b"], ["c"]]
+    assert all(call.args[0] == "id" for call in in_calls)
+    assert adapter.generation == 1
+
+
+def test_async_upsert_limits_parallelism_and_reports_failures():
+    client = MagicMock()
+    active = {"now": 0, "peak": 0}
+
+    async def execute(chunk):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if chunk[0]["id"] == "id0":
+            raise ConnectionError("reset")
+
+    client.table.return_value.upsert.side_effect = lambda chunk: MagicMock(execute=lambda: execute(chunk))
+    adapter = AsyncSupabaseVectorAdapter(client=client, chunk_size=1, parallelism=2)
+    with pytest.raises(PartialWriteError) as excinfo:
+        asyncio.run(adapter.upsert([f"id{i}" for i in range(6)], [[0.0]] * 6, [{}] * 6))
+    assert excinfo.value.report.failed_ids == ["id0"]
+    assert excinfo.value.report.rows == 5
+    assert active["peak"] == 2
+
+
+def test_async_delete_chunks_ids():
+    client = MagicMock()
+    client.table.return_value.delete.return_value.in_.return_value.execute = AsyncMock()
+    adapter = AsyncSupabaseVectorAdapter(client=client, delete_chunk_size=2)
+    assert asyncio.run(adapter.delete(["a", "b", "c", "d", "e"])) is None
+    in_calls = client.table.return_value.delete.return_value.in_.call_args_list
+    assert [call.args[1] for call in in_calls] == [["a", "b"], ["c", "d"], ["e"]]
+    assert adapter.generation == 1
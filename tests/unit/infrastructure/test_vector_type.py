@@ -0,0 +1,74 @@
+"""
+Unit tests for the pgvector SQLAlchemy column type.
+"""
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+from libs.shared.vector.binary_codec import encode_vector
+from libs.shared.vector.sqlmodel.vector_record import EMBEDDING_DIM, VectorRecord
+from libs.shared.vector.sqlmodel.vector_type import Vector, to_array
+
+
+def test_binds_as_pgvector_text_and_loads_float32():
+    vector = Vector(3)
+    text = vector.bind_processor(None)(np.array([1.0, 2.5, 0.1], dtype=np.float32))
+    assert text == "[1.0,2.5,0.10000000149011612]"
+    loaded = vector.result_processor(None, None)(text)
+    assert loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, np.array([1.0, 2.5, 0.1], dtype=np.float32))
+    assert vector.bind_processor(None)(None) is None
+
+
+def test_checks_dimensions():
+    with pytest.raises(ValueError, match="Expected 3 dimensions"):
+        Vector(3).bind_processor(None)([1.0, 2.0])
+    with pytest.raises(ValueError, match="1-d"):
+        Vector().bind_processor(None)([[1.0], [2.0]])
+
+
+def test_parses_pgvector_text():
+    np.testing.assert_array_equal(to_array("[1, -2.5,3e-1]"), np.array([1.0, -2.5, 0.3], dtype=np.float32))
+    assert to_array("[]").shape == (0,)
+    for bad in ("1,2", "[1,,2]", "[1,x]"):
+        with pytest.raises(ValueError):
+            to_array(bad)
+
+
+def test_decodes_binary_and_sequences():
+    np.testing.assert_array_equal(to_array(encode_vector([1.0, -2.0])), [1.0, -2.0])
+    assert to_array([1, 2]).dtype == np.float32
+
+
+def test_column_spec():
+    assert Vector(1536).get_col_spec() == "VECTOR(1536)"
+    assert Vector().get_col_spec() == "VECTOR"
+
+
+@pytest.mark.parametrize(
+    "method, operator", [("l2_distance", "<->"), ("cosine_distance", "<=>"), ("max_inner_product", "<#>")]
+)
+def test_distance_operators_compile_for_index_scans(method, operator):
+    query = [0.5] * EMBEDDING_DIM
+    statement = select(VectorRecord.id).order_by(getattr(VectorRecord.embedding, method)(query)).limit(5)
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert f"ORDER BY vectors.embedding {operator} %(embedding_1)s" in str(compiled)
+    # The query vector goes through the type's bind processor, as pgvector text.
+    assert compiled.construct_params()["embedding_1"] == query
+    processed = compiled.binds["embedding_1"].type.bind_processor(None)(query)
+    assert processed.startswith("[0.5,0.5")
+
+
+def test_orm_round_trip():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    VectorRecord.__table__.create(engine)
+    embedding = np.linspace(-1, 1, EMBEDDING_DIM, dtype=np.float32)
+    with Session(engine) as session:
+        session.add(VectorRecord(id="a", embedding=embedding, metadata={"k": 1}))
+        session.commit()
+    with Session(engine) as session:
+        record = session.get(VectorRecord, "a")
+        np.testing.assert_array_equal(record.embedding, embedding)
+        assert record.model_dump()["embedding"][:2] == embedding[:2].tolist()